@@ -0,0 +1,255 @@
+"""
+Compact Account-Level State
+
+Exported base populations (base_population, base_population_overall,
+base_population_42plus) arrive as wide DataFrames with object columns, at
+hundreds of bytes per row. AccountState holds the same account x statement
+rows as parallel numpy arrays, about 19 bytes per row:
+
+    account         int32   dense account id (index into account_ids)
+    person          int32   dense person id (index into person_ids)
+    outcome         int8    index into outcomes ('APPROVED', 'PRE_EVAL_APPROVED')
+    statement       int16   statement number
+    cohort          int16   statement end month, months since 1970-01
+    eval_day        int32   evaluation date, days since 1970-01-01
+    days_to_income  int16   days from evaluation to first income, -1 if none
+
+Original ids are kept once, in sorted dictionaries (account_ids, person_ids),
+so dense ids compare and sort like the originals. Filters return another
+AccountState; per-account reductions use bincount over the dense ids, and
+joins to per-account or per-person arrays are gathers, so cohort
+computations never build a DataFrame.
+
+The rows come from sql/pie_account_statement_state.sql, streamed in Arrow
+batches. sql/pie_account_statement_rows.sql instead streams every raw
+evaluation row of a range of cohort months; dedup() then applies the base
+population dedup (PIE first, then the lowest PERSON_ID) to all of them at
+once, without sorting.
+
+Usage:
+    from account_state import load_account_state
+
+    state = load_account_state({'cohort_month': '2025-04-01'})
+    stmt_18_plus = state.where(state.statement >= 18)
+    curves = state.statements([18, 26, 34, 42]).curves()
+
+    base = load_account_rows('2024-11-01', '2026-01-01').dedup()
+"""
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from cohort_curves import DEFAULT_BUCKET_DAYS, DEFAULT_HORIZON_DAYS, cumulative_curves
+
+ACCOUNT_STATE_SQL = '/Users/Alfred.Lee/Documents/github/2026 income collection analysis/sql/pie_account_statement_state.sql'
+ACCOUNT_ROWS_SQL = '/Users/Alfred.Lee/Documents/github/2026 income collection analysis/sql/pie_account_statement_rows.sql'
+
+OUTCOMES = ['APPROVED', 'PRE_EVAL_APPROVED']
+PIE_CODE = OUTCOMES.index('PRE_EVAL_APPROVED')
+
+# days_to_income of rows without an income in the horizon
+NO_INCOME = -1
+
+ROW_ARRAYS = ['account', 'person', 'outcome', 'statement', 'cohort', 'eval_day', 'days_to_income']
+
+
+def first_by_priority(group, n_groups, priority):
+    """Row index of the lowest priority in each group (0..n_groups - 1); the first row on ties"""
+    best = np.full(n_groups, np.iinfo(np.int64).max)
+    np.minimum.at(best, group, priority)
+    winners = np.flatnonzero(priority == best[group])
+    first = np.full(n_groups, len(group), dtype=np.int64)
+    np.minimum.at(first, group[winners], winners)
+    return first
+
+
+class AccountState:
+    """Account x statement rows as compact parallel arrays"""
+
+    def __init__(self, account, person, outcome, statement, cohort, eval_day, days_to_income, account_ids, person_ids):
+        self.account = account
+        self.person = person
+        self.outcome = outcome
+        self.statement = statement
+        self.cohort = cohort
+        self.eval_day = eval_day
+        self.days_to_income = days_to_income
+        self.account_ids = account_ids
+        self.person_ids = person_ids
+
+    def __len__(self):
+        return len(self.account)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the row arrays (the id dictionaries are shared and not counted)"""
+        return sum(getattr(self, name).nbytes for name in ROW_ARRAYS)
+
+    @property
+    def pie(self):
+        return self.outcome == PIE_CODE
+
+    @property
+    def collected(self):
+        return self.days_to_income != NO_INCOME
+
+    def where(self, mask):
+        """Rows selected by a boolean mask or index array, sharing the id dictionaries"""
+        return AccountState(*(getattr(self, name)[mask] for name in ROW_ARRAYS), self.account_ids, self.person_ids)
+
+    def statements(self, statement_set):
+        return self.where(np.isin(self.statement, np.asarray(statement_set, dtype=np.int16)))
+
+    def cohorts(self, months):
+        """Rows of some cohort months ('YYYY-MM-DD' strings or dates)"""
+        months = np.asarray(months, dtype='datetime64[D]').astype('datetime64[M]').astype(np.int16)
+        return self.where(np.isin(self.cohort, months))
+
+    def dedup(self):
+        """One row per cohort x account x statement: PIE first, then the lowest person
+
+        Same rows as the qualify row_number() dedup of base_population; the
+        kept row is PIE exactly when the group had PIE (had_pie_in_month).
+        Groups come from hashing one int64 key and the winner from a priority
+        code (PIE flag, then dense person id) reduced with minimum.at, so
+        there is no sort. Ties on outcome and person keep the first row.
+        """
+        import pandas as pd
+
+        if len(self) == 0:
+            return self
+        first_cohort = int(self.cohort.min())
+        n_statements = int(self.statement.max()) + 1
+        key = ((self.cohort.astype(np.int64) - first_cohort) * n_statements + self.statement) * len(self.account_ids) \
+            + self.account
+        group, keys = pd.factorize(key, sort=False)
+        priority = np.where(self.pie, 0, len(self.person_ids)) + self.person.astype(np.int64)
+
+        keep = np.zeros(len(self), dtype=bool)
+        keep[first_by_priority(group, len(keys), priority)] = True
+        return self.where(keep)
+
+    def account_index(self, ids):
+        """Dense ids of original account ids; -1 for ids not in the state"""
+        ids = np.asarray(ids, dtype=np.int64)
+        index = np.searchsorted(self.account_ids, ids)
+        found = index < len(self.account_ids)
+        found[found] = self.account_ids[index[found]] == ids[found]
+        return np.where(found, index, -1).astype(np.int32)
+
+    def per_account(self, values, reduce='max', empty=0):
+        """Reduce a per-row array to one value per dense account id ('max', 'min' or 'sum')"""
+        n = len(self.account_ids)
+        if reduce == 'sum':
+            return np.bincount(self.account, weights=values, minlength=n)
+        out = np.full(n, empty, dtype=np.asarray(values).dtype)
+        (np.maximum if reduce == 'max' else np.minimum).at(out, self.account, values)
+        return out
+
+    def account_had_pie(self):
+        """True for every account with a PIE row in this state"""
+        return np.bincount(self.account[self.pie], minlength=len(self.account_ids)) > 0
+
+    def earliest_eval_day(self):
+        return self.per_account(self.eval_day, reduce='min', empty=np.iinfo(np.int32).max)
+
+    def join_accounts(self, values):
+        """Gather a per-account array (indexed by dense account id) onto the rows"""
+        return np.asarray(values)[self.account]
+
+    def join_persons(self, person_ids, values, missing=0):
+        """Gather values keyed by original person ids (sorted) onto the rows"""
+        person_ids = np.asarray(person_ids, dtype=np.int64)
+        values = np.asarray(values)
+        if len(person_ids) == 0:
+            return np.full(len(self), missing, dtype=values.dtype)
+        index = np.minimum(np.searchsorted(person_ids, self.person_ids), len(person_ids) - 1)
+        by_dense_person = np.where(person_ids[index] == self.person_ids, values[index], missing)
+        return by_dense_person[self.person]
+
+    def curves(self, horizon_days=DEFAULT_HORIZON_DAYS, bucket_days=DEFAULT_BUCKET_DAYS):
+        """Statement-level cumulative success curves (columns of the fixed SQL)"""
+        days = np.where(self.collected, self.days_to_income, np.nan)
+        return cumulative_curves(self.statement, self.pie, days, horizon_days, bucket_days)
+
+    def to_frame(self):
+        """Rows with original ids, for display and export"""
+        import pandas as pd
+
+        return pd.DataFrame({
+            'ACCOUNT_ID': self.account_ids[self.account],
+            'PERSON_ID': self.person_ids[self.person],
+            'STATEMENT_NUMBER': self.statement,
+            'COHORT_MONTH': self.cohort.astype('datetime64[M]').astype('datetime64[D]'),
+            'OUTCOME': pd.Categorical.from_codes(self.outcome, OUTCOMES),
+            'EVALUATED_DATE': self.eval_day.astype('datetime64[D]'),
+            'DAYS_TO_COLLECTION': np.where(self.collected, self.days_to_income, np.nan)
+        })
+
+    def save(self, path):
+        np.savez(path, account_ids=self.account_ids, person_ids=self.person_ids,
+                 **{name: getattr(self, name) for name in ROW_ARRAYS})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(*(data[name] for name in ROW_ARRAYS), data['account_ids'], data['person_ids'])
+
+    @classmethod
+    def from_arrow_batches(cls, batches):
+        """Build from Arrow tables with the columns of pie_account_statement_state.sql
+
+        DAYS_TO_COLLECTION is optional (pie_account_statement_rows.sql has none).
+        """
+        parts = {name: [] for name in ['ACCOUNT_ID', 'PERSON_ID'] + ROW_ARRAYS[2:]}
+        outcomes = pa.array(OUTCOMES)
+        for table in batches:
+            table = table.rename_columns([name.upper() for name in table.column_names])
+            outcome = pc.index_in(table['OUTCOME'].cast(pa.string()), value_set=outcomes)
+            if outcome.null_count:
+                raise ValueError(f"Unexpected outcome in account state rows (expected {', '.join(OUTCOMES)})")
+            if 'DAYS_TO_COLLECTION' in table.column_names:
+                days = table['DAYS_TO_COLLECTION'].cast(pa.int64()).fill_null(NO_INCOME).to_numpy()
+            else:
+                days = np.full(table.num_rows, NO_INCOME)
+            eval_date = table['EVALUATED_TIMESTAMP'].cast(pa.timestamp('s')).cast(pa.date32())
+            cohort = table['COHORT_MONTH'].cast(pa.date32()).to_numpy(zero_copy_only=False).astype('datetime64[M]')
+
+            parts['ACCOUNT_ID'].append(table['ACCOUNT_ID'].cast(pa.int64()).to_numpy())
+            parts['PERSON_ID'].append(table['PERSON_ID'].cast(pa.int64()).to_numpy())
+            parts['outcome'].append(outcome.to_numpy().astype(np.int8))
+            parts['statement'].append(table['STATEMENT_NUMBER'].cast(pa.int64()).to_numpy().astype(np.int16))
+            parts['cohort'].append(cohort.astype(np.int16))
+            parts['eval_day'].append(eval_date.cast(pa.int32()).to_numpy())
+            parts['days_to_income'].append(days.astype(np.int16))
+
+        arrays = {name: (np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int64))
+                  for name, chunks in parts.items()}
+        account_ids, account = np.unique(arrays['ACCOUNT_ID'], return_inverse=True)
+        person_ids, person = np.unique(arrays['PERSON_ID'], return_inverse=True)
+        return cls(
+            account.astype(np.int32), person.astype(np.int32),
+            arrays['outcome'].astype(np.int8), arrays['statement'].astype(np.int16), arrays['cohort'].astype(np.int16),
+            arrays['eval_day'].astype(np.int32), arrays['days_to_income'].astype(np.int16),
+            account_ids, person_ids
+        )
+
+
+def load_account_state(params=None, batch_size=None):
+    """Stream pie_account_statement_state.sql into an AccountState"""
+    from batched_extract import DEFAULT_BATCH_SIZE, iter_query_batches
+
+    with open(ACCOUNT_STATE_SQL, 'r') as f:
+        query = f.read()
+    return AccountState.from_arrow_batches(iter_query_batches(query, params, batch_size or DEFAULT_BATCH_SIZE))
+
+
+def load_account_rows(month_start, month_end, batch_size=None):
+    """Stream the raw evaluation rows of cohort months in [month_start, month_end) into an AccountState"""
+    from batched_extract import DEFAULT_BATCH_SIZE, iter_query_batches
+
+    with open(ACCOUNT_ROWS_SQL, 'r') as f:
+        query = f.read()
+    params = {'month_start': str(month_start), 'month_end': str(month_end)}
+    return AccountState.from_arrow_batches(iter_query_batches(query, params, batch_size or DEFAULT_BATCH_SIZE))
@@ -0,0 +1,116 @@
+"""
+Arrow-Native Result Fetch
+
+Builds result DataFrames from Arrow record batches instead of
+cursor.fetchall(), which materializes one Python tuple of Decimal/datetime
+objects per row. Columns are mapped straight to compact dtypes:
+
+- NUMBER(p, 0)       -> int32 when the values fit, otherwise int64
+- NUMBER(p, s > 0)   -> float64
+- TIMESTAMP / DATE   -> datetime64
+- VARCHAR            -> object (unchanged)
+
+Integers are never narrowed below int32 so that arithmetic like
+MONTH_OFFSET * 30 cannot overflow.
+
+Cursors without an Arrow path (sqlite3 stand-in, JSON result format) fall back
+to fetchall() followed by the same dtype compaction.
+"""
+
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+INT32_MIN = np.iinfo(np.int32).min
+INT32_MAX = np.iinfo(np.int32).max
+
+
+def column_names(cur):
+    """Result column names, upper-cased the way Snowflake reports them"""
+    return [col[0].upper() for col in cur.description]
+
+
+def _compact_int(values):
+    """Narrow an integer array to int32 when every value fits"""
+    if len(values) == 0 or (values.min() >= INT32_MIN and values.max() <= INT32_MAX):
+        return values.astype(np.int32)
+    return values.astype(np.int64)
+
+
+def _arrow_column_to_series(column, name):
+    """Convert one Arrow column to a compact pandas Series"""
+    arrow_type = column.type
+
+    if pa.types.is_decimal(arrow_type):
+        if arrow_type.scale == 0 and column.null_count == 0:
+            column = column.cast(pa.int64())
+            arrow_type = column.type
+        else:
+            return pd.Series(column.cast(pa.float64()).to_numpy(zero_copy_only=False), name=name)
+
+    if pa.types.is_integer(arrow_type):
+        if column.null_count == 0:
+            return pd.Series(_compact_int(column.to_numpy()), name=name)
+        # Integers with NULLs become float64 (NaN), as pandas does by default
+        return pd.Series(column.cast(pa.float64()).to_numpy(zero_copy_only=False), name=name)
+
+    return column.to_pandas(date_as_object=False).rename(name)
+
+
+def arrow_to_frame(table):
+    """Convert an Arrow table to a DataFrame with compact numeric dtypes"""
+    columns = {}
+    for name, column in zip(table.column_names, table.columns):
+        series = _arrow_column_to_series(column.combine_chunks(), name.upper())
+        columns[name.upper()] = series.reset_index(drop=True)
+    return pd.DataFrame(columns)
+
+
+def _compact_object_column(series):
+    """Convert a column of Decimal values (DB-API fallback) to int32/int64/float64"""
+    non_null = series.dropna()
+    if len(non_null) == 0 or not all(isinstance(v, Decimal) for v in non_null):
+        return series
+    if series.isna().any() or any(v != v.to_integral_value() for v in non_null):
+        return series.astype(np.float64)
+    return pd.Series(_compact_int(series.astype(np.int64).to_numpy()), name=series.name)
+
+
+def compact_dtypes(df):
+    """Narrow integer and Decimal columns of a fetchall()-built frame"""
+    for name in df.columns:
+        series = df[name]
+        if series.dtype == object:
+            df[name] = _compact_object_column(series)
+        elif pd.api.types.is_integer_dtype(series.dtype):
+            df[name] = _compact_int(series.to_numpy())
+    return df
+
+
+def _fetch_arrow_table(cur):
+    """Return the cursor's result as an Arrow table, or None if unsupported"""
+    fetch_arrow_all = getattr(cur, 'fetch_arrow_all', None)
+    if fetch_arrow_all is None:
+        return None
+    try:
+        table = fetch_arrow_all()
+    except Exception as e:
+        # Results delivered in JSON format have no Arrow path
+        if type(e).__name__ == 'NotSupportedError':
+            return None
+        raise
+    if table is None:
+        # Snowflake returns None for an empty result set
+        return pa.table({name: pa.array([], pa.null()) for name in column_names(cur)})
+    return table
+
+
+def fetch_frame(cur):
+    """Fetch the complete result of an executed cursor as a compact DataFrame"""
+    table = _fetch_arrow_table(cur)
+    if table is not None:
+        return arrow_to_frame(table)
+    df = pd.DataFrame(cur.fetchall(), columns=column_names(cur))
+    return compact_dtypes(df)
@@ -0,0 +1,114 @@
+"""
+Concurrent Query Execution
+
+Multi-cohort scripts used to run their queries one after another, so a
+refresh took the sum of every query's warehouse time. run_queries() submits
+independent queries together and returns their frames in the order given:
+
+- Snowflake: every query is submitted with execute_async() on one pooled
+  connection and polled until it finishes; at most max_concurrent queries
+  are in flight at once, the rest are submitted as earlier ones complete
+- Other backends (no async API) run the queries on a thread pool, one
+  pooled connection per query
+
+Wall-clock time is roughly that of the slowest query rather than the sum.
+The local stand-in can simulate warehouse latency with PIE_LOCAL_LATENCY_MS
+(see snowflake_session.py), which is enough to check the speed-up offline.
+
+Usage:
+    from async_queries import run_queries
+
+    df_mar, df_apr = run_queries([(query, {'cohort_month': '2025-03-01'}),
+                                  (query, {'cohort_month': '2025-04-01'})])
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from arrow_fetch import fetch_frame
+from query_params import bind
+from snowflake_session import connection, get_pool, run_query
+
+# Queries in flight at once
+DEFAULT_MAX_CONCURRENT = int(os.environ.get('PIE_MAX_CONCURRENT', '4'))
+
+# Delay between status polls of running async queries
+POLL_INTERVAL_SECONDS = 0.5
+
+
+def normalize_queries(queries):
+    """Accept plain SQL strings or (query, params) pairs"""
+    return [(item, None) if isinstance(item, str) else tuple(item) for item in queries]
+
+
+def _supports_async(conn):
+    """True for Snowflake connections, which can poll queries by id"""
+    return hasattr(conn, 'get_query_status_throw_if_error')
+
+
+def _run_async(conn, queries, max_concurrent, paramstyle):
+    """Submit queries with execute_async() and poll them to completion"""
+    frames = [None] * len(queries)
+    pending = list(enumerate(queries))
+    running = {}  # position -> (cursor, query id)
+
+    try:
+        while pending or running:
+            while pending and len(running) < max_concurrent:
+                position, (query, params) = pending.pop(0)
+                sql, values = bind(query, params, paramstyle)
+                cur = conn.cursor()
+                cur.execute_async(sql, values)
+                running[position] = (cur, cur.sfqid)
+
+            finished = []
+            for position, (cur, query_id) in running.items():
+                status = conn.get_query_status_throw_if_error(query_id)
+                if not conn.is_still_running(status):
+                    cur.get_results_from_sfqid(query_id)
+                    frames[position] = fetch_frame(cur)
+                    cur.close()
+                    finished.append(position)
+            for position in finished:
+                del running[position]
+
+            if running and not finished:
+                time.sleep(POLL_INTERVAL_SECONDS)
+    finally:
+        # Do not leave queries burning warehouse time after a failure
+        for cur, query_id in running.values():
+            try:
+                cur.execute(f"select system$cancel_query('{query_id}')")
+            except Exception:
+                pass
+            cur.close()
+
+    return frames
+
+
+def _run_threaded(queries, max_concurrent):
+    """Run queries on a thread pool, each on its own pooled connection"""
+    workers = max(1, min(max_concurrent, get_pool().size, len(queries)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_query, query, params) for query, params in queries]
+        return [future.result() for future in futures]
+
+
+def run_queries(queries, max_concurrent=DEFAULT_MAX_CONCURRENT):
+    """Run independent queries concurrently and return their frames in order
+
+    queries is a list of SQL strings or (query, params) pairs. With
+    max_concurrent=1 the queries run one after another.
+    """
+    queries = normalize_queries(queries)
+    if not queries:
+        return []
+    if max_concurrent <= 1 or len(queries) == 1:
+        return [run_query(query, params) for query, params in queries]
+
+    pool = get_pool()
+    with connection() as conn:
+        if _supports_async(conn):
+            return _run_async(conn, queries, max_concurrent, pool.paramstyle)
+    return _run_threaded(queries, max_concurrent)
@@ -0,0 +1,154 @@
+"""
+Streaming Batched Extract
+
+Account-level queries (e.g. INCOME_VALIDATION across every Stmt 18+ statement)
+can return millions of rows, more than we want to hold in one DataFrame. This
+module streams a result in fixed-size batches instead:
+
+- iter_record_batches() yields Arrow tables of exactly batch_size rows
+  (the last one may be shorter)
+- iter_frames() yields the same batches as compact DataFrames
+- extract_to_parquet() writes each batch to a Parquet file as it arrives,
+  one row group per batch, so peak memory is bounded by the batch size
+
+Runners and export scripts support this as "extract mode":
+
+    python export_chart_data_account_level.py --extract account_level.parquet --batch-size 500000
+"""
+
+import os
+import sys
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from arrow_fetch import arrow_to_frame, column_names
+from snowflake_session import cursor, execute
+
+DEFAULT_BATCH_SIZE = 250_000
+
+
+def _raw_batches(cur, batch_size):
+    """Yield Arrow tables straight from the cursor, in whatever size it delivers"""
+    fetch_arrow_batches = getattr(cur, 'fetch_arrow_batches', None)
+    if fetch_arrow_batches is not None:
+        try:
+            yield from fetch_arrow_batches()
+            return
+        except Exception as e:
+            # Results delivered in JSON format have no Arrow path
+            if type(e).__name__ != 'NotSupportedError':
+                raise
+
+    names = column_names(cur)
+    while True:
+        rows = cur.fetchmany(batch_size)
+        if not rows:
+            return
+        yield pa.Table.from_pandas(pd.DataFrame(rows, columns=names), preserve_index=False)
+
+
+def _stable_types(table):
+    """Widen numeric columns so every batch of one result shares a schema
+
+    Snowflake picks the narrowest integer width per result chunk, so the same
+    NUMBER column can arrive as int8 in one chunk and int32 in the next.
+    """
+    fields = []
+    for field in table.schema:
+        if pa.types.is_integer(field.type):
+            fields.append(field.with_type(pa.int64()))
+        elif pa.types.is_decimal(field.type):
+            fields.append(field.with_type(pa.int64() if field.type.scale == 0 else pa.float64()))
+        else:
+            fields.append(field)
+    return table.cast(pa.schema(fields))
+
+
+def iter_record_batches(cur, batch_size=DEFAULT_BATCH_SIZE):
+    """Re-chunk an executed cursor's result into Arrow tables of batch_size rows"""
+    schema = None
+    pending = []
+    pending_rows = 0
+
+    for table in _raw_batches(cur, batch_size):
+        table = _stable_types(table)
+        if schema is None:
+            schema = table.schema
+        elif table.schema != schema:
+            table = table.cast(schema)
+        pending.append(table)
+        pending_rows += table.num_rows
+
+        while pending_rows >= batch_size:
+            combined = pa.concat_tables(pending)
+            yield combined.slice(0, batch_size)
+            rest = combined.slice(batch_size)
+            pending = [rest]
+            pending_rows = rest.num_rows
+
+    if pending_rows:
+        yield pa.concat_tables(pending)
+
+
+def iter_query_batches(query, params=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Execute a query on the shared session and yield Arrow tables of batch_size rows"""
+    with cursor() as cur:
+        execute(cur, query, params)
+        yield from iter_record_batches(cur, batch_size)
+
+
+def iter_frames(query, params=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Execute a query and yield compact DataFrames of batch_size rows"""
+    for table in iter_query_batches(query, params, batch_size):
+        yield arrow_to_frame(table)
+
+
+def extract_to_parquet(query, path, params=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Stream a query result into a Parquet file, one row group per batch
+
+    The file is written under a temporary name and renamed when complete, so
+    an interrupted extract never leaves a truncated file behind.
+    Returns the number of rows written.
+    """
+    tmp_path = path + '.partial'
+    writer = None
+    rows = 0
+    complete = False
+    try:
+        with cursor() as cur:
+            execute(cur, query, params)
+            for table in iter_record_batches(cur, batch_size):
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, table.schema, compression='zstd')
+                writer.write_table(table, row_group_size=batch_size)
+                rows += table.num_rows
+
+            if writer is None:
+                # Empty result: still write a file with the result's columns
+                empty = pa.table({name: pa.array([], pa.null()) for name in column_names(cur)})
+                writer = pq.ParquetWriter(tmp_path, empty.schema, compression='zstd')
+                writer.write_table(empty)
+
+        writer.close()
+        writer = None
+        os.replace(tmp_path, path)
+        complete = True
+    finally:
+        if writer is not None:
+            writer.close()
+        if not complete and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return rows
+
+
+def extract_if_requested(query, args, params=None):
+    """Extract mode for runners: stream the result to --extract PATH and exit"""
+    if not args.extract:
+        return
+    print(f"Extract mode: streaming result to {args.extract} in batches of {args.batch_size:,} rows...")
+    rows = extract_to_parquet(query, args.extract, params=params, batch_size=args.batch_size)
+    print(f"✓ Extracted {rows:,} rows to: {args.extract}")
+    sys.exit(0)
@@ -0,0 +1,152 @@
+"""
+Bootstrap Confidence Bands
+
+The charts and the PowerPoint summary show SUCCESS_RATE_PCT and
+PIE_INCOME_COLLECTION_RATE_PCT as point estimates only. With ~900 PIE
+accounts at Stmt 18, cohort differences of a few points can be noise. This
+adds percentile bootstrap bands to every curve point.
+
+Resampling a group's accounts with replacement only changes how many
+accounts fall in each outcome category:
+
+    approved outright | first income in month 0 | ... | month K-1 | PIE, no income
+
+so each replicate is one multinomial draw of the group size over those
+category counts (taken from the curve columns, which are bincounts of the
+per-account arrays) instead of a copy of the rows. Every month offset of a
+replicate comes from the same draw, so the bands are consistent along the
+curve. Replicates are drawn in chunks with independent seeds; 10,000
+replicates of a cohort take well under a second in-process. workers > 1
+spreads the chunks over a process pool (the platform's default start
+method, so the calling script must guard its top level with
+if __name__ == '__main__').
+
+Usage:
+    from bootstrap_ci import add_confidence_bands
+    df = add_confidence_bands(fixed_success_curves(args.params))
+
+    df['SUCCESS_RATE_PCT_LOW'], df['SUCCESS_RATE_PCT_HIGH']
+"""
+
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_REPLICATES = 10000
+DEFAULT_CONFIDENCE = 0.95
+
+# Replicates per worker task
+CHUNK_REPLICATES = 2500
+
+RATES = ['SUCCESS_RATE_PCT', 'PIE_INCOME_COLLECTION_RATE_PCT']
+
+
+def category_counts(curves):
+    """Group keys, group sizes and (groups x categories) counts from curve rows
+
+    Categories: approved outright, new incomes in each month offset, PIE
+    without income by the last offset. curves must hold every offset of each
+    group and use the fixed methodology (approved + pie = total).
+    """
+    keys = [key for key in ['COHORT_MONTH', 'STATEMENT_NUMBER'] if key in curves.columns]
+    curves = curves.sort_values(keys + ['MONTH_OFFSET'])
+    groups = curves.groupby(keys, sort=False)
+    n_offsets = int(curves['MONTH_OFFSET'].max()) + 1
+
+    first = groups.head(1)
+    totals = first['TOTAL_POPULATION'].to_numpy(dtype=np.int64)
+    approved = first['APPROVED_OUTRIGHT_COUNT'].to_numpy(dtype=np.int64)
+    new = curves['NEW_INCOME_COLLECTIONS_THIS_MONTH'].to_numpy(dtype=np.int64).reshape(len(first), n_offsets)
+    pie_total = first['PIE_TOTAL_COUNT'].to_numpy(dtype=np.int64)
+    if (approved + pie_total != totals).any():
+        raise ValueError("Bootstrap bands need fixed-methodology curves (approved + pie = total)")
+    counts = np.column_stack([approved, new, pie_total - new.sum(axis=1)])
+    return first[keys].reset_index(drop=True), totals, counts
+
+
+def _draw_rates(totals, counts, replicates, seed):
+    """Success and collection rates (%) of bootstrap replicates, shaped (replicates, groups, offsets)"""
+    rng = np.random.default_rng(seed)
+    pvals = counts / np.maximum(totals, 1)[:, None]
+    pvals[totals == 0] = 1.0 / counts.shape[1]
+    draws = rng.multinomial(totals, pvals, size=(replicates, len(totals)))
+
+    approved = draws[:, :, :1]
+    collected = np.cumsum(draws[:, :, 1:-1], axis=2)
+    success = 100.0 * (approved + collected) / np.maximum(totals, 1)[None, :, None]
+    pie_total = totals[None, :, None] - approved
+    collection = np.where(pie_total > 0, 100.0 * collected / np.maximum(pie_total, 1), np.nan)
+    return success.astype(np.float32), collection.astype(np.float32)
+
+
+def bootstrap_bands(curves, replicates=DEFAULT_REPLICATES, confidence=DEFAULT_CONFIDENCE, seed=0, workers=1):
+    """Percentile bands for every curve row
+
+    Returns a frame with the group keys, MONTH_OFFSET and <RATE>_LOW /
+    <RATE>_HIGH for SUCCESS_RATE_PCT and PIE_INCOME_COLLECTION_RATE_PCT,
+    rounded to 0.1 like the rates. workers > 1 opts into a process pool.
+    """
+    keys, totals, counts = category_counts(curves)
+    chunks = [min(CHUNK_REPLICATES, replicates - start) for start in range(0, replicates, CHUNK_REPLICATES)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    workers = min(workers or 1, len(chunks))
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_draw_rates, [totals] * len(chunks), [counts] * len(chunks), chunks, seeds))
+    else:
+        results = [_draw_rates(totals, counts, size, chunk_seed) for size, chunk_seed in zip(chunks, seeds)]
+
+    tail = 100.0 * (1 - confidence) / 2
+    n_offsets = counts.shape[1] - 2
+    bands = pd.DataFrame({
+        **{key: np.repeat(keys[key].to_numpy(), n_offsets) for key in keys.columns},
+        'MONTH_OFFSET': np.tile(np.arange(n_offsets, dtype=np.int64), len(keys))
+    })
+    for rate, draws in zip(RATES, zip(*results)):
+        with warnings.catch_warnings():
+            # Groups without PIE accounts have no collection rate
+            warnings.simplefilter('ignore', RuntimeWarning)
+            low, high = np.nanpercentile(np.concatenate(draws), [tail, 100 - tail], axis=0)
+        bands[f'{rate}_LOW'] = np.round(low.ravel().astype(np.float64), 1)
+        bands[f'{rate}_HIGH'] = np.round(high.ravel().astype(np.float64), 1)
+    return bands
+
+
+def add_confidence_bands(curves, replicates=DEFAULT_REPLICATES, confidence=DEFAULT_CONFIDENCE, seed=0, workers=1):
+    """curves with <RATE>_LOW / <RATE>_HIGH columns added, rows in their original order"""
+    bands = bootstrap_bands(curves, replicates, confidence, seed, workers)
+    keys = [key for key in ['COHORT_MONTH', 'STATEMENT_NUMBER', 'MONTH_OFFSET'] if key in curves.columns]
+    return curves.merge(bands, on=keys, how='left')
+
+
+def main():
+    """Print the fixed success curves with bootstrap bands"""
+    import time
+
+    from cohort_curves import fixed_success_curves
+    from pipeline_args import build_parser, query_params_from_args
+    from snowflake_session import set_backend
+
+    parser = build_parser(description='Bootstrap confidence bands for the fixed success curves')
+    parser.add_argument('--replicates', type=int, default=DEFAULT_REPLICATES, help=f'Bootstrap replicates (default: {DEFAULT_REPLICATES})')
+    parser.add_argument('--confidence', type=float, default=DEFAULT_CONFIDENCE, help=f'Band coverage (default: {DEFAULT_CONFIDENCE})')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes (default: 1, in-process)')
+    args = parser.parse_args()
+    if args.backend:
+        set_backend(args.backend)
+
+    curves = fixed_success_curves(query_params_from_args(args), refresh=args.refresh, local_incomes=not args.sql_incomes)
+    start = time.perf_counter()
+    df = add_confidence_bands(curves, args.replicates, args.confidence, workers=args.workers)
+    print(f"✓ {args.replicates:,} replicates for {len(df)} curve points in {time.perf_counter() - start:.2f}s\n")
+    columns = ['STATEMENT_LABEL', 'MONTH_OFFSET']
+    for rate in RATES:
+        columns += [f'{rate}_LOW', rate, f'{rate}_HIGH']
+    print(df[columns].to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,381 @@
+"""
+Cohort Curve Engine
+
+pie_income_collection_over_time_fixed.sql builds its monthly curves by cross
+joining every base account with month_series (one row per bucket) and running
+four count(distinct case ...) per group, so the warehouse does N x buckets
+work, and a new horizon or bucket width means a new query. This engine
+pulls one row per account instead (pie_income_account_offsets_fixed.sql:
+group, had_pie, days and seconds to first income), once, with a long
+follow-up (OFFSETS_HORIZON_DAYS), and computes every curve locally:
+
+- total_population, approved_outright_count, pie_total_count: bincount by group
+- a day-resolution histogram of first incomes: bincount by (group, day), cumsum
+- pie_income_collected_by_month: the cumulative histogram read at the last
+  day of each bucket, for any bucket width (1 = daily, 7 = weekly, 30) and
+  any horizon up to the fetched one
+- success_count: approved_outright_count + pie_income_collected_by_month
+- exposure (when the offsets carry CLIP_AMOUNT): the same bincounts weighted
+  by each account's clip amount, giving dollars at stake, dollars recovered
+  by each month offset and dollars still blocked by PIE next to the counts
+
+By default only the base populations are pulled
+(pie_base_populations_fixed.sql) and each row's first income is looked up
+in an IncomeIndex (income_index.py) instead of joining CLIP_USER_INCOMES in
+the three income CTEs; local_incomes=False (--sql-incomes) runs
+pie_income_account_offsets_fixed.sql with the joins instead.
+
+The result has the same columns, dtypes, ordering and rounding as the SQL
+output (plus the exposure columns at the end), so scripts can switch by
+replacing cached_query(fixed_sql) with fixed_success_curves().
+
+Usage:
+    python cohort_curves.py [--cohort-month 2025-05-01] [--horizon-days 365 --bucket-days 7] [--verify]
+    python cohort_curves.py --sql-incomes --verify
+
+    from cohort_curves import fixed_success_curves
+    df = fixed_success_curves(args.params)
+
+    hist = load_offset_histogram(args.params)
+    weekly = fixed_success_curves({'horizon_days': 365, 'bucket_days': 7}, hist=hist)
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from arrow_fetch import arrow_to_frame
+from income_index import NO_INCOME, datediff_days, datediff_seconds, load_income_index, to_micros
+from query_params import defaults
+
+BASE_POPULATIONS_SQL = '/Users/Alfred.Lee/Documents/github/2026 income collection analysis/sql/pie_base_populations_fixed.sql'
+ACCOUNT_OFFSETS_SQL = '/Users/Alfred.Lee/Documents/github/2026 income collection analysis/sql/pie_income_account_offsets_fixed.sql'
+FIXED_SQL = '/Users/Alfred.Lee/Documents/github/2026 income collection analysis/sql/pie_income_collection_over_time_fixed.sql'
+
+# Group sentinels used by the account-level rows
+OVERALL_GROUP = 999
+STMT_42_PLUS_GROUP = 442
+
+DEFAULT_HORIZON_DAYS = 240
+DEFAULT_BUCKET_DAYS = 30
+
+# Follow-up fetched for the per-account offsets; any horizon up to this is
+# computed locally from the same result
+OFFSETS_HORIZON_DAYS = 730
+
+# Per-group population counts plus, per group and calendar day d (0..max_days):
+# cumulative first incomes by day d, and those on day d later than d * 24h;
+# the exposure_* fields are the same sums weighted by clip amount (or None)
+OffsetHistogram = namedtuple(
+    'OffsetHistogram',
+    ['groups', 'total', 'pie_total', 'cumulative', 'late', 'max_days',
+     'exposure_total', 'pie_exposure', 'exposure_cumulative', 'exposure_late'],
+    defaults=[None, None, None, None]
+)
+
+# Dollar columns added to the curves when the offsets carry CLIP_AMOUNT
+EXPOSURE_COLUMNS = [
+    'TOTAL_EXPOSURE', 'APPROVED_OUTRIGHT_EXPOSURE', 'PIE_EXPOSURE', 'PIE_EXPOSURE_RECOVERED_BY_MONTH',
+    'PIE_EXPOSURE_BLOCKED', 'EXPOSURE_SUCCESS_RATE_PCT', 'PIE_EXPOSURE_RECOVERY_RATE_PCT'
+]
+
+
+def statement_label(statement_number):
+    if statement_number == OVERALL_GROUP:
+        return 'Overall Stmt 18+'
+    if statement_number == STMT_42_PLUS_GROUP:
+        return 'Stmt 42+'
+    return f'Stmt {statement_number}'
+
+
+def round_pct(numerator, denominator):
+    """round(100.0 * n / d, 1) with Snowflake's half-away-from-zero rounding; NaN where d = 0
+
+    Computed in integers so ties (e.g. 12.25%) round the way NUMBER does.
+    """
+    numerator = np.asarray(numerator, dtype=np.int64)
+    denominator = np.asarray(denominator, dtype=np.int64)
+    safe = np.where(denominator > 0, denominator, 1)
+    tenths = (2000 * numerator + safe) // (2 * safe)
+    return np.where(denominator > 0, tenths / 10.0, np.nan)
+
+
+def exposure_pct(numerator, denominator):
+    """round(100.0 * n / d, 1) of dollar amounts; NaN where d = 0"""
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    safe = np.where(denominator > 0, denominator, 1)
+    return np.where(denominator > 0, np.round(100.0 * numerator / safe, 1), np.nan)
+
+
+def n_buckets(horizon_days, bucket_days):
+    """Number of month offsets: ceil(horizon_days / bucket_days)"""
+    return -(-horizon_days // bucket_days)
+
+
+def offset_histogram(groups, had_pie, days_to_collection, seconds_to_collection=None, max_days=DEFAULT_HORIZON_DAYS,
+                     exposure=None):
+    """Per-group population counts and a day-resolution histogram of first incomes
+
+    groups: statement number (or group sentinel) of each row; had_pie: 0/1;
+    days_to_collection / seconds_to_collection: calendar days and seconds from
+    evaluation to first income, NaN if none. max_days is the horizon the
+    offsets were fetched with; curves can be cut at any horizon up to it.
+    Without seconds, every income on day d is taken to be within d days.
+    exposure: each row's clip amount (NaN = 0), for the dollar curves.
+    """
+    groups = np.asarray(groups)
+    had_pie = np.asarray(had_pie).astype(bool)
+    days = np.asarray(days_to_collection, dtype=np.float64)
+    group_values, group_idx = np.unique(groups, return_inverse=True)
+    n_groups = len(group_values)
+
+    total = np.bincount(group_idx, minlength=n_groups)
+    pie_total = np.bincount(group_idx[had_pie], minlength=n_groups)
+
+    collected = had_pie & ~np.isnan(days) & (days >= 0) & (days <= max_days)
+    day = days[collected].astype(np.int64)
+    cells = group_idx[collected] * (max_days + 1) + day
+    size, shape = n_groups * (max_days + 1), (n_groups, max_days + 1)
+    by_day = np.bincount(cells, minlength=size).reshape(shape)
+
+    # Incomes on calendar day d that are more than d * 24h after the evaluation:
+    # DATEADD(day, d, evaluated_timestamp) excludes them when the horizon is d
+    if seconds_to_collection is None:
+        late_rows = np.zeros(len(cells), dtype=bool)
+    else:
+        seconds = np.asarray(seconds_to_collection, dtype=np.float64)[collected]
+        late_rows = seconds > day * 86400
+    late = np.bincount(cells[late_rows], minlength=size).reshape(shape)
+
+    hist = OffsetHistogram(group_values, total, pie_total, np.cumsum(by_day, axis=1), late, max_days)
+    if exposure is None:
+        return hist
+
+    # Dollar versions of the same counts: one weighted bincount each
+    weights = np.nan_to_num(np.asarray(exposure, dtype=np.float64))
+    collected_weights = weights[collected]
+    return hist._replace(
+        exposure_total=np.bincount(group_idx, weights, minlength=n_groups),
+        pie_exposure=np.bincount(group_idx[had_pie], weights[had_pie], minlength=n_groups),
+        exposure_cumulative=np.cumsum(np.bincount(cells, collected_weights, minlength=size).reshape(shape), axis=1),
+        exposure_late=np.bincount(cells[late_rows], collected_weights[late_rows], minlength=size).reshape(shape)
+    )
+
+
+def histogram_from_offsets(accounts, max_days, groups=None):
+    """offset_histogram of per-account offset rows (pie_income_account_offsets_fixed.sql columns)
+
+    groups overrides STATEMENT_NUMBER as the group key; CLIP_AMOUNT, if
+    present, adds the exposure histograms.
+    """
+    return offset_histogram(
+        accounts['STATEMENT_NUMBER'].to_numpy() if groups is None else groups,
+        accounts['HAD_PIE'].to_numpy(),
+        accounts['DAYS_TO_COLLECTION'].to_numpy(dtype=np.float64, na_value=np.nan),
+        accounts['SECONDS_TO_COLLECTION'].to_numpy(dtype=np.float64, na_value=np.nan),
+        max_days=max_days,
+        exposure=accounts['CLIP_AMOUNT'].to_numpy(dtype=np.float64, na_value=np.nan) if 'CLIP_AMOUNT' in accounts.columns else None
+    )
+
+
+def histogram_curves(hist, horizon_days=DEFAULT_HORIZON_DAYS, bucket_days=DEFAULT_BUCKET_DAYS):
+    """Cumulative success curves at any horizon (up to hist.max_days) and bucket width
+
+    Bucket k covers days [k * bucket_days, (k + 1) * bucket_days - 1], as
+    floor(datediff(day, ...) / bucket_days) does. Returns a DataFrame with the
+    columns of pie_income_collection_over_time_fixed.sql, plus EXPOSURE_COLUMNS
+    when hist has exposure.
+    """
+    if horizon_days > hist.max_days:
+        raise ValueError(f"Horizon {horizon_days} days exceeds the {hist.max_days} days the offsets were fetched with")
+    buckets = n_buckets(horizon_days, bucket_days)
+    n_groups = len(hist.groups)
+
+    # Last day counted by each bucket; an income on day horizon_days counts
+    # only if it is within horizon_days * 24h and its bucket is < buckets
+    last_day = np.minimum((np.arange(buckets) + 1) * bucket_days - 1, horizon_days)
+    collected_by = hist.cumulative[:, last_day] - np.where(last_day == horizon_days, hist.late[:, [horizon_days]], 0)
+    new = np.diff(collected_by, axis=1, prepend=0)
+
+    approved = hist.total - hist.pie_total
+    total_rows = np.repeat(hist.total, buckets)
+    pie_total_rows = np.repeat(hist.pie_total, buckets)
+    collected_rows = collected_by.ravel()
+    success_rows = np.repeat(approved, buckets) + collected_rows
+
+    columns = {
+        'STATEMENT_LABEL': [statement_label(int(g)) for g in np.repeat(hist.groups, buckets)],
+        'STATEMENT_NUMBER': np.repeat(hist.groups, buckets).astype(np.int64),
+        'MONTH_OFFSET': np.tile(np.arange(buckets, dtype=np.int64), n_groups),
+        'TOTAL_POPULATION': total_rows,
+        'APPROVED_OUTRIGHT_COUNT': np.repeat(approved, buckets),
+        'PIE_TOTAL_COUNT': pie_total_rows,
+        'PIE_INCOME_COLLECTED_BY_MONTH': collected_rows,
+        'SUCCESS_COUNT': success_rows,
+        'SUCCESS_RATE_PCT': round_pct(success_rows, total_rows),
+        'PIE_INCOME_COLLECTION_RATE_PCT': round_pct(collected_rows, pie_total_rows),
+        'NEW_INCOME_COLLECTIONS_THIS_MONTH': new.ravel()
+    }
+
+    if hist.exposure_total is not None:
+        recovered = hist.exposure_cumulative[:, last_day] - np.where(
+            last_day == horizon_days, hist.exposure_late[:, [horizon_days]], 0
+        )
+        approved_exposure = np.repeat(hist.exposure_total - hist.pie_exposure, buckets)
+        exposure_rows = np.repeat(hist.exposure_total, buckets)
+        pie_exposure_rows = np.repeat(hist.pie_exposure, buckets)
+        recovered_rows = recovered.ravel()
+        columns.update({
+            'TOTAL_EXPOSURE': np.round(exposure_rows, 2),
+            'APPROVED_OUTRIGHT_EXPOSURE': np.round(approved_exposure, 2),
+            'PIE_EXPOSURE': np.round(pie_exposure_rows, 2),
+            'PIE_EXPOSURE_RECOVERED_BY_MONTH': np.round(recovered_rows, 2),
+            'PIE_EXPOSURE_BLOCKED': np.round(pie_exposure_rows - recovered_rows, 2),
+            'EXPOSURE_SUCCESS_RATE_PCT': exposure_pct(approved_exposure + recovered_rows, exposure_rows),
+            'PIE_EXPOSURE_RECOVERY_RATE_PCT': exposure_pct(recovered_rows, pie_exposure_rows)
+        })
+    return arrow_to_frame(pa.table(columns))
+
+
+def cumulative_curves(groups, had_pie, days_to_collection, horizon_days=DEFAULT_HORIZON_DAYS,
+                      bucket_days=DEFAULT_BUCKET_DAYS, seconds_to_collection=None):
+    """Cumulative success curves from per-account arrays (see offset_histogram)"""
+    hist = offset_histogram(groups, had_pie, days_to_collection, seconds_to_collection, max_days=horizon_days)
+    return histogram_curves(hist, horizon_days, bucket_days)
+
+
+def load_base_populations(params=None, refresh=False):
+    """Base rows (STATEMENT_NUMBER, ACCOUNT_ID, PERSON_ID, HAD_PIE, EVALUATED_TIMESTAMP) of every group"""
+    from query_cache import cached_query
+
+    with open(BASE_POPULATIONS_SQL, 'r') as f:
+        query = f.read()
+    return cached_query(query, params, refresh=refresh)
+
+
+def income_window(bases, horizon_days):
+    """(created_from, created_to) covering every income the rows of some base frames can reach"""
+    evaluated = pd.concat([pd.to_datetime(base['EVALUATED_TIMESTAMP']) for base in bases])
+    return evaluated.min(), evaluated.max() + pd.Timedelta(days=horizon_days)
+
+
+def offsets_from_base(base, index, horizon_days):
+    """Per-account offsets from base rows and an IncomeIndex
+
+    Same rows and columns as pie_income_account_offsets_fixed.sql: the first
+    income of each PIE row's person with
+    evaluated_timestamp < CREATED_AT <= DATEADD(day, horizon_days, evaluated_timestamp),
+    reduced to one row per group and account (and COHORT_MONTH, if base has it).
+    """
+    evaluated = to_micros(base['EVALUATED_TIMESTAMP'])
+    had_pie = base['HAD_PIE'].to_numpy().astype(bool)
+    first = np.full(len(base), NO_INCOME, dtype=np.int64)
+    first[had_pie] = index.first_after(base['PERSON_ID'].to_numpy()[had_pie], evaluated[had_pie], horizon_days)
+    found = first != NO_INCOME
+
+    keys = [key for key in ['COHORT_MONTH', 'STATEMENT_NUMBER', 'ACCOUNT_ID'] if key in base.columns]
+    rows = pd.DataFrame({
+        **{key: base[key].to_numpy() for key in keys},
+        'HAD_PIE': had_pie.astype(np.int64),
+        'DAYS_TO_COLLECTION': np.where(found, datediff_days(evaluated, first), np.nan),
+        'SECONDS_TO_COLLECTION': np.where(found, datediff_seconds(evaluated, first), np.nan)
+    })
+    aggregations = {'HAD_PIE': 'max', 'DAYS_TO_COLLECTION': 'min', 'SECONDS_TO_COLLECTION': 'min'}
+    if 'CLIP_AMOUNT' in base.columns:
+        rows['CLIP_AMOUNT'] = base['CLIP_AMOUNT'].to_numpy(dtype=np.float64, na_value=np.nan)
+        aggregations['CLIP_AMOUNT'] = 'max'
+    # Account-level groups have one row per account and person
+    return rows.groupby(keys, as_index=False).agg(aggregations)
+
+
+def load_account_offsets(params=None, refresh=False, local_incomes=True):
+    """Per-account (STATEMENT_NUMBER, ACCOUNT_ID, HAD_PIE, DAYS_TO_COLLECTION, SECONDS_TO_COLLECTION) rows
+
+    local_incomes pulls the base populations and valid incomes separately and
+    joins them through an IncomeIndex; without it the income join runs in
+    pie_income_account_offsets_fixed.sql.
+    """
+    from query_cache import cached_query
+
+    if local_incomes:
+        horizon_days, _ = curve_settings(params)
+        base = load_base_populations(params, refresh=refresh)
+        index = load_income_index(*income_window([base], horizon_days), refresh=refresh)
+        return offsets_from_base(base, index, horizon_days)
+
+    with open(ACCOUNT_OFFSETS_SQL, 'r') as f:
+        query = f.read()
+    return cached_query(query, params, refresh=refresh)
+
+
+def curve_settings(params):
+    """Effective horizon_days / bucket_days: SQL header defaults overridden by params"""
+    with open(FIXED_SQL, 'r') as f:
+        settings = defaults(f.read())
+    settings.update({k: v for k, v in (params or {}).items() if v is not None})
+    return int(settings.get('horizon_days', DEFAULT_HORIZON_DAYS)), int(settings.get('bucket_days', DEFAULT_BUCKET_DAYS))
+
+
+def offsets_params(params=None):
+    """params of the offsets query: horizon pinned to max(OFFSETS_HORIZON_DAYS, requested)"""
+    horizon_days, _ = curve_settings(params)
+    return {**(params or {}), 'horizon_days': max(OFFSETS_HORIZON_DAYS, horizon_days)}
+
+
+def load_offset_histogram(params=None, refresh=False, local_incomes=True):
+    """Fetch per-account offsets once, with at least OFFSETS_HORIZON_DAYS of follow-up
+
+    The offsets query does not depend on the bucket width, and its horizon is
+    pinned to max(OFFSETS_HORIZON_DAYS, requested), so every curve up to that
+    horizon comes from the same cached result with no new warehouse query.
+    """
+    params = offsets_params(params)
+    accounts = load_account_offsets(params, refresh=refresh, local_incomes=local_incomes)
+    return histogram_from_offsets(accounts, params['horizon_days'])
+
+
+def fixed_success_curves(params=None, refresh=False, hist=None, local_incomes=True):
+    """Drop-in replacement for running pie_income_collection_over_time_fixed.sql
+
+    Pass hist (from load_offset_histogram) to cut several views from one fetch.
+    """
+    horizon_days, bucket_days = curve_settings(params)
+    if hist is None:
+        hist = load_offset_histogram(params, refresh=refresh, local_incomes=local_incomes)
+    return histogram_curves(hist, horizon_days, bucket_days)
+
+
+def main():
+    """Print the fixed success curves; --verify compares them with the SQL engine"""
+    from pipeline_args import build_parser, query_params_from_args
+    from snowflake_session import set_backend
+
+    parser = build_parser(description='Compute the fixed success curves from per-account offsets')
+    parser.add_argument('--verify', action='store_true', help='Also run the SQL curves and compare')
+    args = parser.parse_args()
+    args.params = query_params_from_args(args)
+    if args.backend:
+        set_backend(args.backend)
+
+    df = fixed_success_curves(args.params, refresh=args.refresh, local_incomes=not args.sql_incomes)
+    print(f"✓ Computed {len(df)} curve rows from per-account offsets\n")
+    print(df.to_string(index=False))
+
+    if args.verify:
+        from query_cache import cached_query
+
+        with open(FIXED_SQL, 'r') as f:
+            expected = cached_query(f.read(), args.params, refresh=args.refresh)
+        expected = expected.sort_values(['STATEMENT_NUMBER', 'MONTH_OFFSET']).reset_index(drop=True)
+        try:
+            pd.testing.assert_frame_equal(df[list(expected.columns)], expected, check_dtype=False)
+            print("\n✓ VERIFICATION PASSED: engine output matches the SQL")
+        except AssertionError as e:
+            print(f"\n❌ VERIFICATION FAILED: {e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+"""
+All-Cohort Success Matrix
+
+pie_income_collection_over_time_fixed.sql gets the statement-level lines
+(18, 26, 34, 42), the Stmt 42+ line (442) and the Overall Stmt 18+ line (999)
+from three base scans and a UNION ALL, for one cohort month per run. This
+builds every cohort month x statement grouping x month offset in one pass:
+
+- One scan of the raw evaluation rows of all cohort months
+  (pie_account_statement_rows.sql)
+- The three base populations of every cohort derived locally: the
+  PIE-priority dedup (first_by_priority, as in AccountState.dedup) for the
+  statement-level groups, earliest evaluation and PIE flag per account and
+  person for 999 and 442
+- One IncomeIndex lookup for all first incomes (income_index.py)
+- One day-resolution histogram keyed by (cohort month, group), cut into
+  curves by cohort_curves.py
+
+The result comes in two layouts:
+
+- legacy: the columns of the fixed SQL plus COHORT_MONTH, with the 999 / 442
+  sentinels in STATEMENT_NUMBER, so existing charts can filter by cohort
+- tidy: one row per cohort, grouping, month offset and metric, with the
+  grouping spelled out (LEVEL, FIRST_STATEMENT) instead of sentinels
+
+Usage:
+    python cohort_matrix.py --month-start 2024-11-01 --month-end 2026-01-01 --out matrix.parquet
+    python cohort_matrix.py --tidy --out matrix_tidy.parquet
+
+    from cohort_matrix import load_cohort_matrix, tidy_matrix
+    df = load_cohort_matrix('2024-11-01', '2026-01-01')
+"""
+
+import numpy as np
+import pandas as pd
+
+from account_state import ACCOUNT_ROWS_SQL, first_by_priority
+from cohort_curves import (DEFAULT_BUCKET_DAYS, DEFAULT_HORIZON_DAYS, EXPOSURE_COLUMNS, FIXED_SQL, OVERALL_GROUP,
+                           STMT_42_PLUS_GROUP, histogram_curves, histogram_from_offsets, income_window, offsets_from_base)
+from income_index import load_income_index
+from query_params import defaults
+
+# Account-level groups: sentinel -> first statement
+ACCOUNT_GROUPS = {OVERALL_GROUP: 18, STMT_42_PLUS_GROUP: 42}
+
+# (cohort month, group) histogram keys; groups are below this
+GROUP_KEY_BASE = 1000
+
+METRICS = [
+    'TOTAL_POPULATION', 'APPROVED_OUTRIGHT_COUNT', 'PIE_TOTAL_COUNT', 'PIE_INCOME_COLLECTED_BY_MONTH',
+    'SUCCESS_COUNT', 'SUCCESS_RATE_PCT', 'PIE_INCOME_COLLECTION_RATE_PCT', 'NEW_INCOME_COLLECTIONS_THIS_MONTH'
+]
+
+
+def _month_numbers(values):
+    """Months since 1970-01 of dates or timestamps"""
+    return np.asarray(pd.to_datetime(np.asarray(values)), dtype='datetime64[M]').astype(np.int64)
+
+
+def base_populations_from_rows(rows, statement_set):
+    """The rows of pie_base_populations_fixed.sql for every cohort month, plus COHORT_MONTH
+
+    rows has the columns of pie_account_statement_rows.sql (one row per
+    evaluation and person). CLIP_AMOUNT, if present, is carried as in
+    pie_base_populations_fixed.sql.
+    """
+    cohort = _month_numbers(rows['COHORT_MONTH'])
+    account = rows['ACCOUNT_ID'].to_numpy(dtype=np.int64)
+    person = rows['PERSON_ID'].to_numpy(dtype=np.int64)
+    statement = rows['STATEMENT_NUMBER'].to_numpy(dtype=np.int64)
+    pie = (rows['OUTCOME'] == 'PRE_EVAL_APPROVED').to_numpy()
+    evaluated = np.asarray(pd.to_datetime(rows['EVALUATED_TIMESTAMP']), dtype='datetime64[us]')
+    exposure = rows['CLIP_AMOUNT'].to_numpy(dtype=np.float64, na_value=np.nan) if 'CLIP_AMOUNT' in rows.columns else None
+
+    # Statement level: one row per cohort x account x statement, PIE first,
+    # then the lowest PERSON_ID; the kept row is PIE iff the group had PIE
+    selected = np.flatnonzero(np.isin(statement, np.asarray(statement_set, dtype=np.int64)))
+    group, keys = pd.factorize(pd.MultiIndex.from_arrays([cohort[selected], account[selected], statement[selected]]))
+    priority = np.where(pie[selected], 0, 1 << 62) + person[selected]
+    kept = selected[first_by_priority(group, len(keys), priority)]
+    frames = [pd.DataFrame({
+        'COHORT_MONTH': cohort[kept],
+        'STATEMENT_NUMBER': statement[kept],
+        'ACCOUNT_ID': account[kept],
+        'PERSON_ID': person[kept],
+        'HAD_PIE': pie[kept].astype(np.int64),
+        'EVALUATED_TIMESTAMP': evaluated[kept]
+    })]
+    if exposure is not None:
+        frames[0]['CLIP_AMOUNT'] = exposure[kept]
+
+    # Account level: one row per cohort x account x person with the earliest
+    # evaluation and whether any evaluation was PIE
+    for sentinel, first_statement in ACCOUNT_GROUPS.items():
+        selected = statement >= first_statement
+        accounts = pd.DataFrame({
+            'COHORT_MONTH': cohort[selected],
+            'ACCOUNT_ID': account[selected],
+            'PERSON_ID': person[selected],
+            'HAD_PIE': pie[selected].astype(np.int64),
+            'EVALUATED_TIMESTAMP': evaluated[selected]
+        })
+        aggregations = {'HAD_PIE': 'max', 'EVALUATED_TIMESTAMP': 'min'}
+        if exposure is not None:
+            # The largest PIE amount if the account had PIE, else the largest amount
+            accounts['CLIP_AMOUNT'] = exposure[selected]
+            accounts['PIE_AMOUNT'] = np.where(pie[selected], exposure[selected], np.nan)
+            aggregations.update({'CLIP_AMOUNT': 'max', 'PIE_AMOUNT': 'max'})
+        accounts = accounts.groupby(['COHORT_MONTH', 'ACCOUNT_ID', 'PERSON_ID'], sort=False, as_index=False).agg(aggregations)
+        if exposure is not None:
+            accounts['CLIP_AMOUNT'] = accounts.pop('PIE_AMOUNT').fillna(accounts['CLIP_AMOUNT'])
+        accounts.insert(1, 'STATEMENT_NUMBER', sentinel)
+        frames.append(accounts)
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def matrix_curves(offsets, horizon_days=DEFAULT_HORIZON_DAYS, bucket_days=DEFAULT_BUCKET_DAYS):
+    """Legacy-layout curves of every cohort month from per-account offsets with COHORT_MONTH"""
+    keys = offsets['COHORT_MONTH'].to_numpy(dtype=np.int64) * GROUP_KEY_BASE + offsets['STATEMENT_NUMBER'].to_numpy(dtype=np.int64)
+    hist = histogram_from_offsets(offsets, horizon_days, groups=keys)
+    curves = histogram_curves(hist._replace(groups=hist.groups % GROUP_KEY_BASE), horizon_days, bucket_days)
+    cohorts = np.repeat(hist.groups // GROUP_KEY_BASE, len(curves) // max(len(hist.groups), 1))
+    curves.insert(0, 'COHORT_MONTH', pd.to_datetime(cohorts.astype('datetime64[M]')))
+    return curves
+
+
+def tidy_matrix(matrix):
+    """One row per cohort month, grouping, month offset and metric, without sentinels
+
+    LEVEL is 'statement' (one statement) or 'account' (accounts across all
+    statements from FIRST_STATEMENT on).
+    """
+    account_level = matrix['STATEMENT_NUMBER'].isin(list(ACCOUNT_GROUPS))
+    ids = pd.DataFrame({
+        'COHORT_MONTH': matrix['COHORT_MONTH'],
+        'LEVEL': np.where(account_level, 'account', 'statement'),
+        'FIRST_STATEMENT': matrix['STATEMENT_NUMBER'].map(ACCOUNT_GROUPS).fillna(matrix['STATEMENT_NUMBER']).astype(np.int64),
+        'STATEMENT_LABEL': matrix['STATEMENT_LABEL'],
+        'MONTH_OFFSET': matrix['MONTH_OFFSET']
+    })
+    metrics = METRICS + [column for column in EXPOSURE_COLUMNS if column in matrix.columns]
+    tidy = pd.concat([ids, matrix[metrics]], axis=1).melt(id_vars=list(ids.columns), var_name='METRIC', value_name='VALUE')
+    return tidy.sort_values(['COHORT_MONTH', 'LEVEL', 'FIRST_STATEMENT', 'METRIC', 'MONTH_OFFSET']).reset_index(drop=True)
+
+
+def _settings(params):
+    """statement_set, horizon_days and bucket_days: SQL header defaults overridden by params"""
+    with open(FIXED_SQL, 'r') as f:
+        settings = defaults(f.read())
+    settings.update({k: v for k, v in (params or {}).items() if v is not None})
+    return settings['statement_set'], int(settings['horizon_days']), int(settings['bucket_days'])
+
+
+def load_matrix_base(month_start, month_end, params=None, refresh=False):
+    """Base populations of every cohort month in [month_start, month_end), with COHORT_MONTH
+
+    Returns (base, horizon_days, bucket_days); base is empty when there are
+    no evaluation rows.
+    """
+    from query_cache import cached_query
+
+    statement_set, horizon_days, bucket_days = _settings(params)
+    with open(ACCOUNT_ROWS_SQL, 'r') as f:
+        query = f.read()
+    rows = cached_query(query, {'month_start': str(month_start), 'month_end': str(month_end)}, refresh=refresh)
+    if len(rows) == 0:
+        return pd.DataFrame(), horizon_days, bucket_days
+    return base_populations_from_rows(rows, statement_set), horizon_days, bucket_days
+
+
+def load_matrix_offsets(month_start, month_end, params=None, refresh=False):
+    """Per-account offsets of every cohort month in [month_start, month_end), with COHORT_MONTH
+
+    Returns (offsets, horizon_days, bucket_days); offsets is empty when there
+    are no evaluation rows.
+    """
+    base, horizon_days, bucket_days = load_matrix_base(month_start, month_end, params, refresh)
+    if len(base) == 0:
+        return base, horizon_days, bucket_days
+    index = load_income_index(*income_window([base], horizon_days), refresh=refresh)
+    return offsets_from_base(base, index, horizon_days), horizon_days, bucket_days
+
+
+def load_cohort_matrix(month_start, month_end, params=None, refresh=False):
+    """Legacy-layout curves of every cohort month in [month_start, month_end)"""
+    offsets, horizon_days, bucket_days = load_matrix_offsets(month_start, month_end, params, refresh)
+    if len(offsets) == 0:
+        return pd.DataFrame()
+    return matrix_curves(offsets, horizon_days, bucket_days)
+
+
+def main():
+    """Compute the full cohort x grouping x offset matrix"""
+    from pipeline_args import build_parser, query_params_from_args
+    from snowflake_session import set_backend
+
+    parser = build_parser(description='Success curves for every cohort month and statement grouping in one pass')
+    parser.add_argument('--month-start', default='2024-11-01', metavar='YYYY-MM-DD', help='First cohort month (default: 2024-11-01)')
+    parser.add_argument('--month-end', default='2026-01-01', metavar='YYYY-MM-DD', help='Month after the last cohort (default: 2026-01-01)')
+    parser.add_argument('--tidy', action='store_true', help='Write the tidy long layout instead of the legacy sentinel layout')
+    parser.add_argument('--out', metavar='PATH', help='Write the result to a Parquet file')
+    args = parser.parse_args()
+    if args.backend:
+        set_backend(args.backend)
+
+    print(f"Computing cohort matrix for {args.month_start} to {args.month_end}...")
+    df = load_cohort_matrix(args.month_start, args.month_end, query_params_from_args(args), refresh=args.refresh)
+    if len(df) == 0:
+        print("❌ No evaluation rows found")
+        return
+    print(f"✓ {df['COHORT_MONTH'].nunique()} cohorts, {df['STATEMENT_NUMBER'].nunique()} groupings, {len(df):,} curve rows")
+    if args.tidy:
+        df = tidy_matrix(df)
+    if args.out:
+        df.to_parquet(args.out, compression='zstd', index=False)
+        print(f"✓ Saved to: {args.out}")
+    else:
+        print(df.to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
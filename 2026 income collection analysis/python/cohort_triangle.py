@@ -0,0 +1,217 @@
+"""
+Cohort Development Triangle
+
+The cohort comparisons recompute every cohort from scratch on each run, so a
+monthly refresh gets slower as history grows. This keeps a persistent
+cohort x month-offset triangle instead, like an actuarial loss-development
+triangle, with one row per (cohort month, statement group, month offset):
+
+    cohort      offset 0   1     2     3   ...
+    2025-03     29.7      37.4  43.8  48.2
+    2025-04     30.1      38.0  44.2
+    2025-05     28.9      36.6
+    2025-06     29.4                           <- newest cohort row
+
+A cell is stored once it is final: every evaluation of the cohort month has
+had the cell's full bucket of follow-up (EVAL_SLACK_DAYS after the month, as
+in snapshot_extract.py). Cells never change after that, so a refresh only
+queries open cohorts - those still missing cells - and appends their newly
+final cells (the new diagonal) plus the newest cohort row. At most
+ceil((horizon_days + EVAL_SLACK_DAYS) / 28) + 1 cohorts are open at any
+time, so the cost of a refresh stays flat as history grows.
+
+Curves use the fixed methodology: the base populations of the open cohorts
+(pie_base_populations_fixed.sql) are queried concurrently, their first
+incomes are looked up in one IncomeIndex (income_index.py) loaded for all of
+them, and the per-account offsets run through cohort_curves.py, with the
+same columns as pie_income_collection_over_time_fixed.sql plus COHORT_MONTH.
+The triangle lives in PIE_TRIANGLE_DIR (default ~/.cache/pie_analysis/triangle).
+
+Usage:
+    python cohort_triangle.py --start 2025-03      # first build
+    python cohort_triangle.py                      # monthly refresh
+    python cohort_triangle.py --metric SUCCESS_RATE_PCT --group 18
+
+    from cohort_triangle import load_triangle
+    df = load_triangle()
+"""
+
+import datetime
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from async_queries import DEFAULT_MAX_CONCURRENT, run_queries
+from cohort_curves import (BASE_POPULATIONS_SQL, FIXED_SQL, OVERALL_GROUP, histogram_curves, histogram_from_offsets,
+                           income_window, n_buckets, offsets_from_base)
+from income_index import load_income_index
+from query_params import defaults
+from snapshot_extract import EVAL_SLACK_DAYS, month_range
+
+TRIANGLE_DIR = os.environ.get('PIE_TRIANGLE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'pie_analysis', 'triangle'))
+
+TRIANGLE_FILE = 'triangle.parquet'
+MANIFEST = '_triangle.json'
+
+# Settings a triangle is built with; changing any of them needs a rebuild
+TRIANGLE_SETTINGS = ['statement_set', 'horizon_days', 'bucket_days']
+
+
+def _month_end(month):
+    """First day of the month after `month`"""
+    return (month.replace(day=1) + datetime.timedelta(days=32)).replace(day=1)
+
+
+def final_offsets(month, as_of, horizon_days, bucket_days):
+    """Number of leading month offsets of a cohort that are final as of a date
+
+    Returns -1 while the cohort's population is not final yet.
+    """
+    settled = _month_end(month) + datetime.timedelta(days=EVAL_SLACK_DAYS)
+    if as_of < settled:
+        return -1
+    elapsed = (as_of - settled).days
+    last_days = np.minimum((np.arange(n_buckets(horizon_days, bucket_days)) + 1) * bucket_days, horizon_days)
+    return int(np.count_nonzero(last_days <= elapsed))
+
+
+def load_manifest(triangle_dir=TRIANGLE_DIR):
+    path = os.path.join(triangle_dir, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def load_triangle(triangle_dir=TRIANGLE_DIR):
+    """All stored cells, ordered by cohort, statement group and month offset"""
+    path = os.path.join(triangle_dir, TRIANGLE_FILE)
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    return pd.read_parquet(path)
+
+
+def _save(triangle_dir, cells, manifest):
+    """Write the cells and manifest atomically (cells first)"""
+    os.makedirs(triangle_dir, exist_ok=True)
+    path = os.path.join(triangle_dir, TRIANGLE_FILE)
+    cells.to_parquet(path + '.partial', compression='zstd', index=False)
+    os.replace(path + '.partial', path)
+
+    path = os.path.join(triangle_dir, MANIFEST)
+    with open(path + '.partial', 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(path + '.partial', path)
+
+
+def _settings(params):
+    """Effective triangle settings: SQL header defaults overridden by params"""
+    with open(FIXED_SQL, 'r') as f:
+        settings = defaults(f.read())
+    settings.update({k: v for k, v in (params or {}).items() if v is not None})
+    return {name: settings[name] for name in TRIANGLE_SETTINGS}
+
+
+def refresh_triangle(start=None, params=None, as_of=None, triangle_dir=TRIANGLE_DIR, rebuild=False,
+                     max_concurrent=DEFAULT_MAX_CONCURRENT):
+    """Append every newly final cell; returns the cohort months that were queried
+
+    start ('YYYY-MM') is the first cohort and is only needed for a new
+    triangle. Only open cohorts are queried, concurrently, and share one
+    income index.
+    """
+    as_of = as_of or datetime.date.today()
+    settings = _settings(params)
+    manifest = None if rebuild else load_manifest(triangle_dir)
+
+    if manifest is not None and manifest['settings'] != settings:
+        raise ValueError(f"Triangle in {triangle_dir} was built with {manifest['settings']}; "
+                         f"pass --rebuild to rebuild it with {settings}")
+    if manifest is None:
+        if start is None:
+            raise ValueError(f"No triangle in {triangle_dir}; pass --start YYYY-MM to build one")
+        manifest = {'settings': settings, 'start': start, 'cohorts': {}}
+        cells = pd.DataFrame()
+    else:
+        cells = load_triangle(triangle_dir)
+
+    horizon_days, bucket_days = settings['horizon_days'], settings['bucket_days']
+    latest = as_of.replace(day=1).strftime('%Y-%m')
+    wanted = {}
+    for month in month_range(manifest['start'], latest):
+        label = month.strftime('%Y-%m')
+        final = final_offsets(month, as_of, horizon_days, bucket_days)
+        if final > manifest['cohorts'].get(label, 0):
+            wanted[label] = (month, final)
+
+    if not wanted:
+        print(f"  - Triangle up to date as of {as_of.isoformat()}")
+        return []
+
+    with open(BASE_POPULATIONS_SQL, 'r') as f:
+        query = f.read()
+    print(f"  Querying {len(wanted)} open cohort(s): {', '.join(wanted)}")
+    bases = run_queries(
+        [(query, {**(params or {}), **settings, 'cohort_month': month.isoformat()}) for month, _ in wanted.values()],
+        max_concurrent=max_concurrent
+    )
+    index = load_income_index(*income_window(bases, horizon_days))
+    print(f"  ✓ {len(index):,} valid incomes indexed")
+
+    new_cells = []
+    for (label, (month, final)), base in zip(wanted.items(), bases):
+        stored = manifest['cohorts'].get(label, 0)
+        accounts = offsets_from_base(base, index, horizon_days)
+        curves = histogram_curves(histogram_from_offsets(accounts, horizon_days), horizon_days, bucket_days)
+        curves = curves[(curves['MONTH_OFFSET'] >= stored) & (curves['MONTH_OFFSET'] < final)].copy()
+        curves.insert(0, 'COHORT_MONTH', pd.Timestamp(month))
+        new_cells.append(curves)
+        manifest['cohorts'][label] = final
+        print(f"  ✓ {label}: offsets {stored}-{final - 1} added ({len(curves)} cells)")
+
+    cells = pd.concat([cells] + new_cells, ignore_index=True)
+    cells = cells.sort_values(['COHORT_MONTH', 'STATEMENT_NUMBER', 'MONTH_OFFSET']).reset_index(drop=True)
+    manifest['as_of'] = as_of.isoformat()
+    _save(triangle_dir, cells, manifest)
+    return list(wanted)
+
+
+def development_triangle(cells, metric='PIE_INCOME_COLLECTION_RATE_PCT', statement_number=OVERALL_GROUP):
+    """Cohort x month-offset pivot of one metric for one statement group"""
+    group = cells[cells['STATEMENT_NUMBER'] == statement_number]
+    triangle = group.pivot(index='COHORT_MONTH', columns='MONTH_OFFSET', values=metric)
+    triangle.index = triangle.index.strftime('%Y-%m')
+    return triangle
+
+
+def main():
+    """Refresh the triangle and print one metric of it"""
+    from pipeline_args import build_parser, query_params_from_args
+    from snowflake_session import set_backend
+
+    parser = build_parser(description='Refresh the cohort development triangle with newly final cells')
+    parser.add_argument('--start', metavar='YYYY-MM', help='First cohort month (new triangles only)')
+    parser.add_argument('--as-of', metavar='YYYY-MM-DD', help='Refresh as of this date (default: today)')
+    parser.add_argument('--dir', default=TRIANGLE_DIR, metavar='DIR', help=f'Triangle directory (default: {TRIANGLE_DIR})')
+    parser.add_argument('--rebuild', action='store_true', help='Discard the stored triangle and rebuild it')
+    parser.add_argument('--metric', default='PIE_INCOME_COLLECTION_RATE_PCT', help='Column to print')
+    parser.add_argument('--group', type=int, default=OVERALL_GROUP, help='Statement group to print (999 = Overall)')
+    args = parser.parse_args()
+    if args.backend:
+        set_backend(args.backend)
+
+    as_of = datetime.date.fromisoformat(args.as_of) if args.as_of else None
+    print(f"Refreshing cohort triangle in {args.dir}...")
+    queried = refresh_triangle(args.start, query_params_from_args(args), as_of, args.dir, args.rebuild, args.max_concurrent)
+    print(f"✓ {len(queried)} cohort(s) queried\n")
+
+    cells = load_triangle(args.dir)
+    if len(cells):
+        print(f"{args.metric} (statement group {args.group}):")
+        print(development_triangle(cells, args.metric, args.group).to_string())
+
+
+if __name__ == '__main__':
+    main()
@@ -4,17 +4,10 @@ Compare OLD (buggy) vs FIXED PIE Success Rate Analysis
 This script runs both versions and shows the differences caused by the bug.
 """
 
-import snowflake.connector
-import pandas as pd
-
-# Snowflake connection
-conn = snowflake.connector.connect(
-    user='ALFRED_LEE',
-    account='IJ90379-MISSIONLANE',
-    authenticator='externalbrowser',
-    database='EDW_DB',
-    schema='PUBLIC'
-)
+from query_cache import cached_query
+from pipeline_args import parse_pipeline_args
+
+args = parse_pipeline_args()
 
 print("=" * 120)
 print("COMPARING OLD (BUGGY) vs FIXED PIE SUCCESS RATE ANALYSIS")
@@ -27,10 +20,7 @@ print("\n[1/2] Running OLD (buggy) query...")
 with open('/Users/Alfred.Lee/Documents/github/2026 income collection analysis/sql/pie_income_collection_over_time.sql', 'r') as f:
     query_old = f.read()
 
-cursor = conn.cursor()
-cursor.execute(query_old)
-df_old = pd.DataFrame(cursor.fetchall(), columns=[col[0] for col in cursor.description])
-cursor.close()
+df_old = cached_query(query_old, args.params, refresh=args.refresh)
 print(f"✓ Loaded {len(df_old)} rows from OLD query")
 
 # Load FIXED query
@@ -38,11 +28,7 @@ print("\n[2/2] Running FIXED query...")
 with open('/Users/Alfred.Lee/Documents/github/2026 income collection analysis/sql/pie_income_collection_over_time_fixed.sql', 'r') as f:
     query_fixed = f.read()
 
-cursor = conn.cursor()
-cursor.execute(query_fixed)
-df_fixed = pd.DataFrame(cursor.fetchall(), columns=[col[0] for col in cursor.description])
-cursor.close()
-conn.close()
+df_fixed = cached_query(query_fixed, args.params, refresh=args.refresh)
 print(f"✓ Loaded {len(df_fixed)} rows from FIXED query")
 
 # Add month label
@@ -8,11 +8,9 @@ Prerequisites:
     pip install python-pptx pandas openpyxl snowflake-connector-python
 
 Usage:
-    python create_powerpoint_presentation.py
+    python create_powerpoint_presentation.py [--refresh] [--cohort-month 2025-05-01]
 """
 
-import snowflake.connector
-import pandas as pd
 from pptx import Presentation
 from pptx.chart.data import CategoryChartData
 from pptx.enum.chart import XL_CHART_TYPE
@@ -21,15 +19,8 @@ from pptx.enum.text import PP_ALIGN
 from pptx.dml.color import RGBColor
 import sys
 import os
-
-# Snowflake connection configuration
-SNOWFLAKE_CONFIG = {
-    'user': 'ALFRED_LEE',
-    'account': 'IJ90379-MISSIONLANE',
-    'authenticator': 'externalbrowser',
-    'database': 'EDW_DB',
-    'schema': 'PUBLIC'
-}
+from query_cache import cached_query
+from pipeline_args import parse_pipeline_args
 
 # Output file path
 OUTPUT_FILE = '/Users/Alfred.Lee/Documents/github/visualizations/PIE_Success_Rate_Analysis.pptx'
@@ -44,33 +35,18 @@ COLORS = {
 }
 
 
-def connect_to_snowflake():
-    """Connect to Snowflake database"""
+def load_success_rate_data(params=None, refresh=False):
+    """Load PIE success rate data from Snowflake (or the local result cache)"""
     try:
-        print("\n[1/5] Connecting to Snowflake...")
-        conn = snowflake.connector.connect(**SNOWFLAKE_CONFIG)
-        print("✓ Connected to Snowflake")
-        return conn
-    except Exception as e:
-        print(f"❌ Error connecting to Snowflake: {e}")
-        sys.exit(1)
-
-
-def load_success_rate_data(conn):
-    """Load PIE success rate data from Snowflake"""
-    try:
-        print("\n[2/5] Loading PIE success rate data...")
+        print("\n[1/4] Loading PIE success rate data...")
 
         # Read SQL query
         sql_file = '/Users/Alfred.Lee/Documents/github/2026 income collection analysis/sql/pie_income_collection_over_time.sql'
         with open(sql_file, 'r') as f:
             query = f.read()
 
-        # Execute query
-        cursor = conn.cursor()
-        cursor.execute(query)
-        df = pd.DataFrame(cursor.fetchall(), columns=[col[0] for col in cursor.description])
-        cursor.close()
+        # Execute query (served from the local result cache when possible)
+        df = cached_query(query, params, refresh=refresh)
 
         print(f"✓ Loaded {len(df)} rows of data")
         return df
@@ -149,7 +125,7 @@ def create_title_slide(prs):
 
 def create_chart_slide(prs, chart_data):
     """Create slide with success rate line chart"""
-    print("\n[3/5] Creating success rate chart slide...")
+    print("\n[2/4] Creating success rate chart slide...")
 
     slide = prs.slides.add_slide(prs.slide_layouts[6])  # Blank layout
 
@@ -211,7 +187,7 @@ def create_chart_slide(prs, chart_data):
 
 def create_summary_slide(prs, chart_data):
     """Create summary slide with key metrics"""
-    print("\n[4/5] Creating summary slide...")
+    print("\n[3/4] Creating summary slide...")
 
     slide = prs.slides.add_slide(prs.slide_layouts[6])  # Blank layout
 
@@ -264,7 +240,7 @@ Key Insights:
 
 def create_presentation(chart_data):
     """Create complete PowerPoint presentation"""
-    print("\n[5/5] Creating PowerPoint presentation...")
+    print("\n[4/4] Creating PowerPoint presentation...")
 
     # Create presentation object
     prs = Presentation()
@@ -283,16 +259,14 @@ def create_presentation(chart_data):
 
 def main():
     """Main execution function"""
+    args = parse_pipeline_args(description='Create the PIE success rate PowerPoint presentation')
+
     print("\n" + "=" * 80)
     print("POWERPOINT PRESENTATION GENERATOR - PIE SUCCESS RATE ANALYSIS")
     print("=" * 80)
 
-    # Connect to Snowflake
-    conn = connect_to_snowflake()
-
     # Load data
-    df = load_success_rate_data(conn)
-    conn.close()
+    df = load_success_rate_data(args.params, refresh=args.refresh)
 
     # Prepare chart data
     chart_data = prepare_chart_data(df)
@@ -0,0 +1,220 @@
+"""
+Offline DuckDB Backend
+
+Runs the Snowflake SQL under sql/ against local Parquet snapshots, so cohort
+SQL can be iterated on without a warehouse. Select it with --backend duckdb
+(any runner) or PIE_BACKEND=duckdb.
+
+Snapshots live in PIE_SNAPSHOT_DIR (default ~/.cache/pie_analysis/snapshots),
+one directory (hive-partitioned Parquet, any depth) or one <TABLE>.parquet
+file per table:
+
+    snapshots/CLIP_RESULTS_DATA/...
+    snapshots/ACCOUNT_STATEMENTS/...
+    snapshots/ACCOUNTS_CUSTOMERS_BRIDGE/...
+    snapshots/CLIP_USER_INCOMES/...
+    snapshots/ACCOUNT_STATEMENTS_CLIP/...
+
+They are exposed as views named EDW_DB.PUBLIC.<TABLE> (ACCOUNT_STATEMENTS_CLIP
+as DATAMART_DB.DM_CONSOLIDATED.ACCOUNT_STATEMENTS_CLIP), so queries run
+unchanged. Partitioned snapshots written by snapshot_extract.py are read
+without their partition column, and bridge/income rows that several months
+share are deduplicated. Snowflake syntax DuckDB does not share is translated per statement:
+
+- DATEADD / DATEDIFF / DATE_TRUNC with bare date parts (day, month, year)
+- VARIANT path access (DECISION_DATA:field::BOOLEAN) -> json_extract_string()
+- SET VAR = ... / $VAR session variables -> SET VARIABLE / getvariable()
+- table(generator(rowcount => N)) and seq4() -> range(N)
+- ARRAY_CONTAINS(x::variant, PARSE_JSON(...)), TO_CHAR, ADD_MONTHS, IFF,
+  NVL, ZEROIFNULL and LEFT on timestamps, as macros with Snowflake semantics
+- DESC TABLE -> DESCRIBE; USE DATABASE / SCHEMA are no-ops (queries use
+  fully-qualified names)
+
+QUALIFY, GROUP BY ALL and window functions are native in DuckDB.
+"""
+
+import glob
+import os
+import re
+
+import pyarrow as pa
+
+from query_params import segments
+
+# Local Parquet snapshots of the EDW tables
+SNAPSHOT_DIR = os.environ.get('PIE_SNAPSHOT_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'pie_analysis', 'snapshots'))
+
+# Tables exposed as views, in EDW_DB.PUBLIC unless SNAPSHOT_SCHEMAS says otherwise
+SNAPSHOT_TABLES = ['CLIP_RESULTS_DATA', 'ACCOUNT_STATEMENTS', 'ACCOUNTS_CUSTOMERS_BRIDGE', 'CLIP_USER_INCOMES',
+                   'ACCOUNT_STATEMENTS_CLIP']
+DEFAULT_SCHEMA = 'EDW_DB.PUBLIC'
+SNAPSHOT_SCHEMAS = {'ACCOUNT_STATEMENTS_CLIP': 'DATAMART_DB.DM_CONSOLIDATED'}
+
+# Hive partition column of extracted snapshots (see snapshot_extract.py)
+PARTITION_COLUMN = 'PARTITION_MONTH'
+
+# Tables whose rows can repeat across partitions
+DEDUPLICATED_TABLES = {'ACCOUNTS_CUSTOMERS_BRIDGE', 'CLIP_USER_INCOMES'}
+
+# Snowflake functions DuckDB lacks or defines differently
+MACROS = [
+    "CREATE MACRO dateadd(part, n, x) AS x + CAST(n AS BIGINT) * CASE lower(part)"
+    " WHEN 'day' THEN INTERVAL 1 DAY WHEN 'week' THEN INTERVAL 7 DAY WHEN 'month' THEN INTERVAL 1 MONTH"
+    " WHEN 'quarter' THEN INTERVAL 3 MONTH WHEN 'year' THEN INTERVAL 1 YEAR WHEN 'hour' THEN INTERVAL 1 HOUR"
+    " WHEN 'minute' THEN INTERVAL 1 MINUTE WHEN 'second' THEN INTERVAL 1 SECOND END",
+    "CREATE MACRO add_months(x, n) AS x + CAST(n AS BIGINT) * INTERVAL 1 MONTH",
+    "CREATE MACRO parse_json(s) AS json(s)",
+    # Snowflake argument order is (value, array); lists are bound as JSON text
+    "CREATE MACRO array_contains(v, arr) AS list_contains(from_json(arr, '[\"VARCHAR\"]'), CAST(v AS VARCHAR))",
+    "CREATE MACRO to_char(x, fmt) AS strftime(x, replace(replace(replace(replace(replace(replace("
+    "fmt, 'YYYY', '%Y'), 'MM', '%m'), 'DD', '%d'), 'HH24', '%H'), 'MI', '%M'), 'SS', '%S'))",
+    "CREATE MACRO iff(c, a, b) AS CASE WHEN c THEN a ELSE b END",
+    "CREATE MACRO nvl(a, b) AS coalesce(a, b)",
+    "CREATE MACRO zeroifnull(a) AS coalesce(a, 0)",
+    "CREATE MACRO sf_left(s, n) AS left(CAST(s AS VARCHAR), CAST(n AS BIGINT))"
+]
+
+# Expression rewrites, applied to code outside comments and quoted text
+REWRITES = [
+    # Bare date parts become string arguments: DATEADD(day, ...) -> DATEADD('day', ...)
+    (re.compile(r'\b(dateadd|datediff|date_trunc|date_part|datepart)(\s*\(\s*)([A-Za-z_]+)(\s*,)', re.IGNORECASE),
+     r"\1\2'\3'\4"),
+    (re.compile(r'\btable\s*\(\s*generator\s*\(\s*rowcount\s*=>\s*(\d+)\s*\)\s*\)', re.IGNORECASE), r'range(\1)'),
+    (re.compile(r'\bseq[248]\s*\(\s*\)', re.IGNORECASE), 'range'),
+    (re.compile(r'::\s*variant\b', re.IGNORECASE), '::VARCHAR'),
+    (re.compile(r'\bobject_construct\s*\(', re.IGNORECASE), 'json_object('),
+    (re.compile(r'\bleft\s*\(', re.IGNORECASE), 'sf_left('),
+    # VARIANT path access: next_eval.DECISION_DATA:post_pie_evaluation
+    (re.compile(r'(?<![\w.:$])([A-Za-z_]\w*(?:\.[A-Za-z_]\w*)?):([A-Za-z_]\w*(?:\.[A-Za-z_]\w*)*)'),
+     r"json_extract_string(\1, '$.\2')"),
+    # Session variables: $EVAL_START_DATE
+    (re.compile(r'(?<![\w$])\$([A-Za-z_]\w*)'), r"getvariable('\1')")
+]
+
+# Leading comments and whitespace before a statement's first keyword
+LEADING_RE = re.compile(r'(?:\s+|--[^\n]*|/\*.*?\*/)*', re.DOTALL)
+
+# Statement rewrites, applied to the start of a statement
+STATEMENT_REWRITES = [
+    (re.compile(r'^set\s+(?!variable\b)([A-Za-z_]\w*)\s*=', re.IGNORECASE), r'SET VARIABLE \1 ='),
+    (re.compile(r'^unset\s+([A-Za-z_]\w*)', re.IGNORECASE), r'RESET VARIABLE \1'),
+    (re.compile(r'^desc(?:ribe)?\s+(?:table|view)\s+', re.IGNORECASE), 'DESCRIBE '),
+    (re.compile(r'^use\s+(?:database|schema|warehouse|role)?\s*[\w."$]+\s*$', re.IGNORECASE), 'SELECT NULL WHERE FALSE')
+]
+
+
+def translate(sql):
+    """Translate one Snowflake statement to DuckDB SQL"""
+    parts = []
+    for text, is_code in segments(sql):
+        if is_code:
+            for pattern, replacement in REWRITES:
+                text = pattern.sub(replacement, text)
+        parts.append(text)
+    sql = ''.join(parts)
+
+    body = LEADING_RE.match(sql).end()
+    head, rest = sql[:body], sql[body:]
+    for pattern, replacement in STATEMENT_REWRITES:
+        rest = pattern.sub(replacement, rest, count=1)
+    return head + rest
+
+
+def _snapshot_view(table):
+    """SELECT over one snapshot table, or None if it has no files"""
+    directory = os.path.join(SNAPSHOT_DIR, table)
+    pattern = os.path.join(directory, '**', '*.parquet')
+    if os.path.isdir(directory) and glob.glob(pattern, recursive=True):
+        distinct = 'DISTINCT ' if table in DEDUPLICATED_TABLES else ''
+        partitioned = glob.glob(os.path.join(directory, f'{PARTITION_COLUMN}=*'))
+        columns = f'* EXCLUDE ({PARTITION_COLUMN})' if partitioned else '*'
+        return (f"SELECT {distinct}{columns} FROM "
+                f"read_parquet('{pattern}', hive_partitioning = true, union_by_name = true)")
+    single = os.path.join(SNAPSHOT_DIR, table + '.parquet')
+    if os.path.exists(single):
+        return f"SELECT * FROM read_parquet('{single}')"
+    return None
+
+
+def snapshot_files(table):
+    """Parquet files backing one snapshot table"""
+    directory = os.path.join(SNAPSHOT_DIR, table)
+    files = glob.glob(os.path.join(directory, '**', '*.parquet'), recursive=True)
+    single = os.path.join(SNAPSHOT_DIR, table + '.parquet')
+    return files + ([single] if os.path.exists(single) else [])
+
+
+def snapshot_watermark(tables):
+    """Latest modification time of the snapshot files behind the given tables"""
+    mtimes = [os.path.getmtime(path) for _, _, table in tables for path in snapshot_files(table.upper())]
+    return str(max(mtimes)) if mtimes else ''
+
+
+class DuckDBCursor:
+    """DB-API cursor that translates Snowflake SQL before running it on DuckDB"""
+
+    def __init__(self, conn):
+        self._cur = conn.cursor()
+
+    @property
+    def description(self):
+        return self._cur.description
+
+    def execute(self, sql, params=None):
+        self._cur.execute(translate(sql), params)
+        return self
+
+    def fetchall(self):
+        return self._cur.fetchall()
+
+    def fetchmany(self, size):
+        return self._cur.fetchmany(size)
+
+    def fetch_arrow_all(self):
+        # to_arrow_* replaced fetch_arrow_table / fetch_record_batch in DuckDB 1.4
+        if hasattr(self._cur, 'to_arrow_table'):
+            return self._cur.to_arrow_table()
+        return self._cur.fetch_arrow_table()
+
+    def fetch_arrow_batches(self, batch_size=1_000_000):
+        if hasattr(self._cur, 'to_arrow_reader'):
+            reader = self._cur.to_arrow_reader(batch_size)
+        else:
+            reader = self._cur.fetch_record_batch(batch_size)
+        for batch in reader:
+            yield pa.Table.from_batches([batch])
+
+    def close(self):
+        self._cur.close()
+
+
+class DuckDBConnection:
+    """DB-API connection over an in-memory DuckDB with the snapshot views attached"""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self):
+        return DuckDBCursor(self._conn)
+
+    def close(self):
+        self._conn.close()
+
+
+def connect():
+    """Open an in-memory DuckDB session with the snapshots as views in their Snowflake schemas"""
+    import duckdb
+
+    conn = duckdb.connect()
+    schemas = sorted({SNAPSHOT_SCHEMAS.get(table, DEFAULT_SCHEMA) for table in SNAPSHOT_TABLES})
+    for database in sorted({schema.split('.')[0] for schema in schemas}):
+        conn.execute(f"ATTACH ':memory:' AS {database}")
+    for schema in schemas:
+        conn.execute(f'CREATE SCHEMA {schema}')
+    for table in SNAPSHOT_TABLES:
+        view = _snapshot_view(table)
+        if view is not None:
+            conn.execute(f'CREATE VIEW {SNAPSHOT_SCHEMAS.get(table, DEFAULT_SCHEMA)}.{table} AS {view}')
+    for macro in MACROS:
+        conn.execute(macro)
+    return DuckDBConnection(conn)
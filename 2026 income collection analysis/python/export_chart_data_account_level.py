@@ -1,14 +1,8 @@
-import snowflake.connector
-import pandas as pd
-
-# Snowflake connection
-conn = snowflake.connector.connect(
-    user='ALFRED_LEE',
-    account='IJ90379-MISSIONLANE',
-    authenticator='externalbrowser',
-    database='EDW_DB',
-    schema='PUBLIC'
-)
+from snowflake_session import run_query
+from batched_extract import extract_if_requested
+from pipeline_args import parse_pipeline_args
+
+args = parse_pipeline_args()
 
 print("=" * 140)
 print("PIE INCOME COLLECTION ANALYSIS - ACCOUNT-LEVEL DATA (ALL STATEMENTS)")
@@ -19,11 +13,8 @@ print("\nLoading account-level data for all statements...")
 with open('/Users/Alfred.Lee/Documents/github/pie_income_collection_over_time_account_level_all_statements.sql', 'r') as f:
     query = f.read()
 
-cursor = conn.cursor()
-cursor.execute(query)
-df = pd.DataFrame(cursor.fetchall(), columns=[col[0] for col in cursor.description])
-cursor.close()
-conn.close()
+extract_if_requested(query, args, args.params)
+df = run_query(query, args.params)
 
 print("\n" + "=" * 140)
 print("TABLE: ACCOUNT-LEVEL DATA FOR ALL STATEMENTS")
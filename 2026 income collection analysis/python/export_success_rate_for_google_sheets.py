@@ -1,15 +1,9 @@
-import snowflake.connector
-import pandas as pd
 import csv
+from query_cache import cached_query
+from batched_extract import extract_if_requested
+from pipeline_args import parse_pipeline_args
 
-# Snowflake connection
-conn = snowflake.connector.connect(
-    user='ALFRED_LEE',
-    account='IJ90379-MISSIONLANE',
-    authenticator='externalbrowser',
-    database='EDW_DB',
-    schema='PUBLIC'
-)
+args = parse_pipeline_args()
 
 print("Exporting Success Rate Data for Google Sheets...")
 
@@ -17,11 +11,8 @@ print("Exporting Success Rate Data for Google Sheets...")
 with open('/Users/Alfred.Lee/Documents/github/2026 income collection analysis/sql/pie_income_collection_over_time.sql', 'r') as f:
     query = f.read()
 
-cursor = conn.cursor()
-cursor.execute(query)
-df = pd.DataFrame(cursor.fetchall(), columns=[col[0] for col in cursor.description])
-cursor.close()
-conn.close()
+extract_if_requested(query, args, args.params)
+df = cached_query(query, args.params, refresh=args.refresh)
 
 # Add month label (1-8 instead of 0-7)
 df['MONTH_LABEL'] = df['MONTH_OFFSET'] + 1
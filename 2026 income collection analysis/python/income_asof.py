@@ -0,0 +1,119 @@
+"""
+As-Of Income Lookup
+
+INCOME_VALIDATION in pie_income_collection_over_time_account_level.sql finds,
+for every account x statement, the latest non-null income created in the
+year up to the statement end date (PersonLatestValidIncome). In SQL that is
+a join of every statement row to every income record of its persons plus a
+ROW_NUMBER() over the fan-out. Here it is an as-of lookup instead:
+
+- Valid income timestamps are loaded once into an IncomeIndex
+  (income_index.py): sorted per person, searched by binary search
+- Each statement row gets the latest income of its person at or before the
+  statement end, if not earlier than DATEADD(year, -1, end)
+- As in the SQL, the latest income is taken across all persons of the
+  account, and every person row of the account x statement gets it
+
+Memory is a few int64 arrays per row, so tens of millions of statement rows
+fit on one machine. The output has the columns of the INCOME_VALIDATION
+table, with the same INCOME_CREATED_AT and INCOME_STATUS.
+
+Usage:
+    python income_asof.py --out income_validation.parquet
+
+    from income_asof import income_validation
+    df = income_validation(statement_accounts, index)
+"""
+
+import numpy as np
+import pandas as pd
+
+from income_index import NO_INCOME, group_reduce, load_income_index
+
+STATEMENT_ACCOUNTS_SQL = '/Users/Alfred.Lee/Documents/github/2026 income collection analysis/sql/pie_statement_accounts.sql'
+
+VALID_INCOME = 'Valid Income'
+NO_VALID_INCOME = 'No Valid Income Found'
+
+
+def one_year_before(dates):
+    """DATEADD(year, -1, date) per element: Feb 29 maps to Feb 28"""
+    days = np.asarray(dates, dtype='datetime64[D]')
+    month = days.astype('datetime64[M]')
+    day_of_month = (days - month.astype('datetime64[D]')).astype(np.int64)
+    prior = month - 12
+    prior_length = ((prior + 1).astype('datetime64[D]') - prior.astype('datetime64[D]')).astype(np.int64)
+    return prior.astype('datetime64[D]') + np.minimum(day_of_month, prior_length - 1)
+
+
+def income_validation(statement_accounts, index):
+    """INCOME_VALIDATION rows for a frame of StatementAccounts
+
+    statement_accounts has STATEMENT_NUMBER, STATEMENT_END_DATE, PERSON_ID and
+    ACCOUNT_ID, one row per account x statement x person; index is an
+    IncomeIndex covering the year before the first statement end.
+    """
+    end_dates = np.asarray(statement_accounts['STATEMENT_END_DATE'], dtype='datetime64[D]')
+    latest = index.last_at_or_before(
+        statement_accounts['PERSON_ID'].to_numpy(),
+        end_dates,
+        one_year_before(end_dates)
+    )
+    # PersonLatestValidIncome ranks per account x statement, across persons
+    latest = group_reduce(
+        (statement_accounts['STATEMENT_NUMBER'].to_numpy(), statement_accounts['ACCOUNT_ID'].to_numpy()),
+        latest,
+        np.maximum
+    )
+
+    found = latest != NO_INCOME
+    created_at = np.full(len(latest), np.datetime64('NaT'), dtype='datetime64[us]')
+    created_at[found] = latest[found].astype('datetime64[us]')
+    return pd.DataFrame({
+        'STATEMENT_NUMBER': statement_accounts['STATEMENT_NUMBER'].to_numpy(),
+        'STATEMENT_END_DATE': statement_accounts['STATEMENT_END_DATE'].to_numpy(),
+        'PERSON_ID': statement_accounts['PERSON_ID'].to_numpy(),
+        'ACCOUNT_ID': statement_accounts['ACCOUNT_ID'].to_numpy(),
+        'INCOME_CREATED_AT': created_at,
+        'INCOME_STATUS': np.where(found, VALID_INCOME, NO_VALID_INCOME)
+    })
+
+
+def main():
+    """Build INCOME_VALIDATION locally from statement accounts and valid incomes"""
+    from pipeline_args import build_parser
+    from query_cache import cached_query
+    from snowflake_session import set_backend
+
+    parser = build_parser(description='As-of income lookup for INCOME_VALIDATION')
+    parser.add_argument('--eval-start-date', metavar='YYYY-MM-DD', help='First statement end date (default: SQL header)')
+    parser.add_argument('--eval-end-date', metavar='YYYY-MM-DD', help='Last statement end date (default: SQL header)')
+    parser.add_argument('--out', metavar='PATH', help='Write the result to a Parquet file')
+    args = parser.parse_args()
+    if args.backend:
+        set_backend(args.backend)
+
+    params = {'eval_start_date': args.eval_start_date, 'eval_end_date': args.eval_end_date}
+    with open(STATEMENT_ACCOUNTS_SQL, 'r') as f:
+        accounts_query = f.read()
+
+    print("Loading statement accounts...")
+    statement_accounts = cached_query(accounts_query, params, refresh=args.refresh)
+    if len(statement_accounts) == 0:
+        print("❌ No statement accounts found")
+        return
+
+    print("Loading valid incomes...")
+    end_dates = np.asarray(statement_accounts['STATEMENT_END_DATE'], dtype='datetime64[D]')
+    index = load_income_index(one_year_before(end_dates.min()), end_dates.max(), refresh=args.refresh)
+    df = income_validation(statement_accounts, index)
+
+    valid = (df['INCOME_STATUS'] == VALID_INCOME).sum()
+    print(f"✓ {len(df):,} statement rows, {valid:,} with valid income ({100.0 * valid / len(df):.1f}%)")
+    if args.out:
+        df.to_parquet(args.out, compression='zstd', index=False)
+        print(f"✓ Saved to: {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Income Collected Counts
+
+pie_income_multi_statement_analysis.sql, pie_income_update_tracking.sql and
+pie_income_cohort_comparison.sql count, per cohort month and statement, the
+PIE accounts whose person added a valid income within :horizon_days of the
+evaluation. Each joins every PIE row of its base population to
+CLIP_USER_INCOMES in an income_collected CTE and keeps the first match with
+QUALIFY.
+
+Here the statement-level base populations of the requested cohort months
+come from one scan of pie_account_statement_rows.sql (cohort_matrix.py), each
+PIE row's first income from IncomeIndex.first_after (income_index.py), and
+the counts are the fixed curves cut into a single bucket covering the whole
+horizon.
+The result has the columns of all three queries:
+
+    STMT_MONTH, STATEMENT_NUMBER, TOTAL_POPULATION, APPROVED_OUTRIGHT_COUNT,
+    PIE_TOTAL_COUNT, PIE_INCOME_COLLECTED_COUNT, PIE_INCOME_NOT_COLLECTED_COUNT,
+    SUCCESS_COUNT, SUCCESS_RATE_PCT, APPROVED_OUTRIGHT_RATE_PCT,
+    PIE_INCOME_COLLECTION_RATE_PCT, PIE_INCOME_MISS_RATE_PCT
+
+Usage:
+    python income_collected.py ../sql/pie_income_update_tracking.sql --verify
+
+    from income_collected import income_collected_counts
+    df = income_collected_counts(query, args.params)
+"""
+
+import numpy as np
+import pandas as pd
+
+from cohort_curves import OVERALL_GROUP, STMT_42_PLUS_GROUP, round_pct
+from query_params import resolve
+
+MULTI_STATEMENT_SQL = '/Users/Alfred.Lee/Documents/github/2026 income collection analysis/sql/pie_income_multi_statement_analysis.sql'
+
+KEYS = ['STMT_MONTH', 'STATEMENT_NUMBER']
+
+
+def collected_counts(curves):
+    """income_collected columns from matrix curves cut into one bucket covering the horizon"""
+    curves = curves[~curves['STATEMENT_NUMBER'].isin([OVERALL_GROUP, STMT_42_PLUS_GROUP])]
+    total = curves['TOTAL_POPULATION'].to_numpy(dtype=np.int64)
+    approved = curves['APPROVED_OUTRIGHT_COUNT'].to_numpy(dtype=np.int64)
+    pie = curves['PIE_TOTAL_COUNT'].to_numpy(dtype=np.int64)
+    collected = curves['PIE_INCOME_COLLECTED_BY_MONTH'].to_numpy(dtype=np.int64)
+    df = pd.DataFrame({
+        'STMT_MONTH': curves['COHORT_MONTH'].to_numpy(),
+        'STATEMENT_NUMBER': curves['STATEMENT_NUMBER'].to_numpy(),
+        'TOTAL_POPULATION': total,
+        'APPROVED_OUTRIGHT_COUNT': approved,
+        'PIE_TOTAL_COUNT': pie,
+        'PIE_INCOME_COLLECTED_COUNT': collected,
+        'PIE_INCOME_NOT_COLLECTED_COUNT': pie - collected,
+        'SUCCESS_COUNT': approved + collected,
+        'SUCCESS_RATE_PCT': round_pct(approved + collected, total),
+        'APPROVED_OUTRIGHT_RATE_PCT': round_pct(approved, total),
+        'PIE_INCOME_COLLECTION_RATE_PCT': round_pct(collected, pie),
+        'PIE_INCOME_MISS_RATE_PCT': round_pct(pie - collected, pie)
+    })
+    return df.sort_values(KEYS).reset_index(drop=True)
+
+
+def income_collected_counts(query, params=None, refresh=False):
+    """Drop-in replacement for running one of the income_collected queries
+
+    query is the SQL text; its header defaults (cohort_month or cohort_months,
+    statement_set, horizon_days) overridden by params pick the cohorts.
+    """
+    from cohort_matrix import load_matrix_offsets, matrix_curves
+
+    settings = resolve(query, params)
+    months = sorted(pd.Timestamp(month) for month in settings.get('cohort_months') or [settings['cohort_month']])
+    month_end = months[-1] + pd.offsets.MonthBegin(1)
+    offsets, horizon_days, _ = load_matrix_offsets(months[0].date(), month_end.date(), settings, refresh)
+    if len(offsets) == 0:
+        return collected_counts(pd.DataFrame(columns=['COHORT_MONTH', 'STATEMENT_NUMBER', 'TOTAL_POPULATION',
+                                                      'APPROVED_OUTRIGHT_COUNT', 'PIE_TOTAL_COUNT',
+                                                      'PIE_INCOME_COLLECTED_BY_MONTH']))
+    # Incomes up to horizon_days after the evaluation can be horizon_days calendar days out,
+    # which a bucket of exactly horizon_days would put in offset 1
+    curves = matrix_curves(offsets, horizon_days, horizon_days + 1)
+    return collected_counts(curves[curves['COHORT_MONTH'].isin(months)])
+
+
+def main():
+    """Print the income_collected counts of a query; --verify compares them with the SQL"""
+    from pipeline_args import build_parser, query_params_from_args
+    from snowflake_session import set_backend
+
+    parser = build_parser(description='Income collected counts from a local income index')
+    parser.add_argument('sql', nargs='?', default=MULTI_STATEMENT_SQL,
+                        help='pie_income_multi_statement_analysis.sql, pie_income_update_tracking.sql or '
+                             'pie_income_cohort_comparison.sql')
+    parser.add_argument('--verify', action='store_true', help='Also run the SQL and compare')
+    args = parser.parse_args()
+    params = query_params_from_args(args)
+    if args.backend:
+        set_backend(args.backend)
+
+    with open(args.sql, 'r') as f:
+        query = f.read()
+    df = income_collected_counts(query, params, refresh=args.refresh)
+    print(f"✓ {len(df)} cohort x statement rows\n")
+    print(df.to_string(index=False))
+
+    if args.verify:
+        from query_cache import cached_query
+
+        expected = cached_query(query, params, refresh=args.refresh)
+        keys = [key for key in KEYS if key in expected.columns]
+        expected = expected.sort_values(keys).reset_index(drop=True)
+        try:
+            pd.testing.assert_frame_equal(df[list(expected.columns)].sort_values(keys).reset_index(drop=True),
+                                          expected, check_dtype=False)
+            print("\n✓ VERIFICATION PASSED: engine output matches the SQL")
+        except AssertionError as e:
+            print(f"\n❌ VERIFICATION FAILED: {e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Income Index
+
+Every income CTE in sql/ - income_by_month, income_by_month_overall,
+income_by_month_42plus, income_collected, income_updates_after_pie - joins
+CLIP_USER_INCOMES on PERSON_ID with a (eval_ts, eval_ts + N days] range and
+keeps the first row with QUALIFY; INCOME_VALIDATION does the same for the
+latest row before a statement end. Each query re-joins the whole table.
+
+IncomeIndex loads the valid income timestamps of a date window once, in CSR
+layout:
+
+    persons   int64[P]      sorted person ids
+    offsets   int64[P + 1]  incomes of persons[i] are times[offsets[i]:offsets[i + 1]]
+    times     int64[N]      CREATED_AT in microseconds, sorted within each person
+
+and answers millions of (person, t) probes in one vectorized pass: a
+searchsorted for the person's segment, then a segmented binary search over
+all probes at once (log2 of the longest segment iterations).
+
+- first_after(person, t, horizon_days): first income with
+  t < CREATED_AT <= DATEADD(day, horizon_days, t)
+- last_at_or_before(person, t, not_before): latest income with
+  not_before <= CREATED_AT <= t
+
+cohort_curves.py, cohort_triangle.py, income_collected.py (income_collected),
+next_outcome.py (income_updates_after_pie) and income_asof.py share one index
+instead of joining the table per query.
+
+Usage:
+    from income_index import load_income_index
+
+    index = load_income_index('2025-03-01', '2026-01-31')
+    first = index.first_after(person_ids, evaluated_at, 240)
+"""
+
+import numpy as np
+import pandas as pd
+
+VALID_INCOMES_SQL = '/Users/Alfred.Lee/Documents/github/2026 income collection analysis/sql/pie_valid_incomes.sql'
+
+# No income found (int64 microseconds)
+NO_INCOME = np.iinfo(np.int64).min
+
+MICROS_PER_SECOND = 1_000_000
+MICROS_PER_DAY = 86_400 * MICROS_PER_SECOND
+
+
+def to_micros(values):
+    """Timestamps or dates (any datetime64 / pandas input) as int64 microseconds; integers pass through"""
+    values = np.asarray(values)
+    if values.dtype.kind in 'iu':
+        return values.astype(np.int64)
+    return np.asarray(pd.to_datetime(values), dtype='datetime64[us]').astype(np.int64)
+
+
+def group_reduce(keys, values, ufunc=np.minimum):
+    """Reduce values within each group of equal keys (a tuple of arrays), broadcast back to the rows"""
+    values = np.asarray(values)
+    if len(values) == 0:
+        return values
+    order = np.lexsort(keys)
+    starts = np.zeros(len(order), dtype=bool)
+    starts[0] = True
+    for key in keys:
+        sorted_key = np.asarray(key)[order]
+        starts[1:] |= sorted_key[1:] != sorted_key[:-1]
+    reduced = ufunc.reduceat(values[order], np.flatnonzero(starts))
+    result = np.empty_like(values)
+    result[order] = reduced[np.cumsum(starts) - 1]
+    return result
+
+
+class IncomeIndex:
+    """Per-person sorted income creation times in CSR layout"""
+
+    def __init__(self, person_ids, created_at):
+        person_ids = np.asarray(person_ids, dtype=np.int64)
+        micros = to_micros(created_at)
+        order = np.lexsort((micros, person_ids))
+        person_ids = person_ids[order]
+
+        self.times = micros[order]
+        self.persons, counts = np.unique(person_ids, return_counts=True)
+        self.offsets = np.zeros(len(self.persons) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.offsets[1:])
+        self.max_segment = int(counts.max()) if len(counts) else 0
+
+    def __len__(self):
+        return len(self.times)
+
+    def segments(self, person_ids):
+        """[start, end) of each probe person's incomes; empty for unknown persons"""
+        person_ids = np.asarray(person_ids, dtype=np.int64)
+        if len(self.persons) == 0:
+            empty = np.zeros(len(person_ids), dtype=np.int64)
+            return empty, empty
+        rank = np.minimum(np.searchsorted(self.persons, person_ids), len(self.persons) - 1)
+        known = self.persons[rank] == person_ids
+        start = np.where(known, self.offsets[rank], 0)
+        end = np.where(known, self.offsets[rank + 1], 0)
+        return start, end
+
+    def _upper_bound(self, start, end, t):
+        """First position in each segment with times > t (segmented binary search)"""
+        lo, hi = start.copy(), end.copy()
+        active = lo < hi
+        while active.any():
+            mid = (lo + hi) // 2
+            right = self.times[np.where(active, mid, 0)] <= t
+            lo = np.where(active & right, mid + 1, lo)
+            hi = np.where(active & ~right, mid, hi)
+            active = lo < hi
+        return lo
+
+    def first_after(self, person_ids, t, horizon_days=None):
+        """First income with t < CREATED_AT <= t + horizon_days; NO_INCOME if none"""
+        t = to_micros(t)
+        start, end = self.segments(person_ids)
+        position = self._upper_bound(start, end, t)
+        found = position < end
+        result = np.full(len(t), NO_INCOME, dtype=np.int64)
+        result[found] = self.times[position[found]]
+        if horizon_days is not None:
+            late = found & (result > t + np.asarray(horizon_days, dtype=np.int64) * MICROS_PER_DAY)
+            result[late] = NO_INCOME
+        return result
+
+    def last_at_or_before(self, person_ids, t, not_before=None):
+        """Latest income with not_before <= CREATED_AT <= t; NO_INCOME if none"""
+        t = to_micros(t)
+        start, end = self.segments(person_ids)
+        position = self._upper_bound(start, end, t) - 1
+        found = position >= start
+        result = np.full(len(t), NO_INCOME, dtype=np.int64)
+        result[found] = self.times[position[found]]
+        if not_before is not None:
+            early = found & (result < to_micros(not_before))
+            result[early] = NO_INCOME
+        return result
+
+
+def datediff_days(start_micros, end_micros):
+    """datediff(day, start, end): calendar-day boundaries crossed"""
+    return end_micros // MICROS_PER_DAY - start_micros // MICROS_PER_DAY
+
+
+def datediff_seconds(start_micros, end_micros):
+    """datediff(second, start, end): second boundaries crossed"""
+    return end_micros // MICROS_PER_SECOND - start_micros // MICROS_PER_SECOND
+
+
+def load_income_index(created_from, created_to, refresh=False):
+    """Index of valid incomes with created_from <= CREATED_AT <= created_to"""
+    from query_cache import cached_query
+
+    with open(VALID_INCOMES_SQL, 'r') as f:
+        query = f.read()
+    params = {'created_from': str(pd.Timestamp(created_from)), 'created_to': str(pd.Timestamp(created_to))}
+    incomes = cached_query(query, params, refresh=refresh)
+    return IncomeIndex(incomes['PERSON_ID'].to_numpy(), incomes['CREATED_AT'])
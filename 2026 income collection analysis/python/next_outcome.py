@@ -0,0 +1,269 @@
+"""
+Next Outcome Within 8 Statements
+
+result_next_8_stmt and the driver CTEs in
+pie_income_collection_over_time_account_level.sql self-join
+CLIP_RESULTS_DATA on account_id, a.evaluated_timestamp < b.evaluated_timestamp
+and a.statement_number + 8 > b.statement_number, then rank the fan-out. The
+join is quadratic in the evaluations per account and is the slowest part of
+the worksheets.
+
+Here the evaluations of the PIE accounts (pie_account_evaluations.sql) are
+sorted by (account, timestamp) once, and one backward running minimum gives,
+for every position, the next row with a wanted outcome. Each PIE evaluation
+then reads its answer at the first row strictly later in time, so the whole
+lookup is a sort plus a few linear passes:
+
+- NEXT_*: the first later APPROVED, DECLINED or INELIGIBLE evaluation within
+  the window, its statement, STATEMENT_GAP, CLIP_AMOUNT and
+  ASSIGNED_LINE_INCREASE
+- APPROVED_*: the first later APPROVED evaluation within the window (the
+  driver CTEs), whatever came before it
+- FIRST_INCOME_UPDATE_AT / INCOME_UPDATED: the first valid income of any of
+  the account's persons (pie_account_persons.sql) within 240 days after the
+  PIE evaluation (income_updates_after_pie), from IncomeIndex.first_after
+
+An account's statement numbers increase with evaluation time, so the first
+wanted row after a PIE evaluation is in the window whenever any is.
+
+Usage:
+    python next_outcome.py --month-start 2025-04-01 --month-end 2025-05-01
+
+    from next_outcome import load_next_outcomes, post_pie_summary
+    df = load_next_outcomes('2025-04-01', '2025-05-01')
+    post_pie_summary(df)
+"""
+
+import numpy as np
+import pandas as pd
+
+from income_index import NO_INCOME, IncomeIndex, load_income_index, to_micros
+
+ACCOUNT_EVALUATIONS_SQL = '/Users/Alfred.Lee/Documents/github/2026 income collection analysis/sql/pie_account_evaluations.sql'
+ACCOUNT_PERSONS_SQL = '/Users/Alfred.Lee/Documents/github/2026 income collection analysis/sql/pie_account_persons.sql'
+
+PIE_OUTCOME = 'PRE_EVAL_APPROVED'
+NEXT_OUTCOMES = ['APPROVED', 'DECLINED', 'INELIGIBLE']
+
+# b.statement_number < a.statement_number + WINDOW_STATEMENTS
+WINDOW_STATEMENTS = 8
+
+# Income updates count within DATEADD(day, INCOME_HORIZON_DAYS, evaluated_timestamp)
+INCOME_HORIZON_DAYS = 240
+
+# Columns copied from the next evaluation, as <PREFIX>_<COLUMN>
+CARRIED = ['OUTCOME', 'STATEMENT_NUMBER', 'EVALUATED_TIMESTAMP', 'CLIP_AMOUNT', 'ASSIGNED_LINE_INCREASE']
+
+
+def next_wanted_index(account_ids, evaluated, statement_numbers, wanted, window_statements=WINDOW_STATEMENTS):
+    """Row index of each row's first later wanted row of the same account within the window; -1 if none
+
+    evaluated: timestamps (or int64 microseconds); wanted: boolean mask of
+    candidate rows. Later means a strictly greater timestamp.
+    """
+    account_ids = np.asarray(account_ids, dtype=np.int64)
+    statement_numbers = np.asarray(statement_numbers, dtype=np.int64)
+    micros = to_micros(evaluated)
+    n = len(account_ids)
+    order = np.lexsort((micros, account_ids))
+    account, micros, statement = account_ids[order], micros[order], statement_numbers[order]
+
+    # First position of each (account, timestamp) tie group, plus n
+    starts = np.ones(n, dtype=bool)
+    starts[1:] = (account[1:] != account[:-1]) | (micros[1:] != micros[:-1])
+    group_starts = np.append(np.flatnonzero(starts), n)
+    later = group_starts[np.searchsorted(group_starts, np.arange(n), side='right')]
+
+    # Next wanted position at or after each position (n if none)
+    positions = np.where(np.asarray(wanted, dtype=bool)[order], np.arange(n), n)
+    next_wanted = np.append(np.minimum.accumulate(positions[::-1])[::-1], n)
+
+    candidate = next_wanted[later]
+    found = candidate < n
+    hit = np.flatnonzero(found)
+    found[hit] = (account[candidate[hit]] == account[hit]) & (statement[candidate[hit]] < statement[hit] + window_statements)
+
+    result = np.full(n, -1, dtype=np.int64)
+    result[order[found]] = order[candidate[found]]
+    return result
+
+
+def next_outcomes(evaluations, outcomes=NEXT_OUTCOMES, window_statements=WINDOW_STATEMENTS):
+    """One row per PIE evaluation with its NEXT_* and APPROVED_* evaluations
+
+    evaluations has the columns of pie_account_evaluations.sql. Both lookups
+    are the same scan with a different wanted mask.
+    """
+    outcome = evaluations['OUTCOME'].to_numpy()
+    statement = evaluations['STATEMENT_NUMBER'].to_numpy(dtype=np.int64)
+    pie = np.flatnonzero(outcome == PIE_OUTCOME)
+    result = evaluations.iloc[pie].reset_index(drop=True)
+
+    lookups = [('NEXT', np.isin(outcome, outcomes), CARRIED), ('APPROVED', outcome == 'APPROVED', CARRIED[1:])]
+    for prefix, wanted, columns in lookups:
+        index = next_wanted_index(evaluations['ACCOUNT_ID'], evaluations['EVALUATED_TIMESTAMP'], statement, wanted,
+                                  window_statements)[pie]
+        found = index >= 0
+        picked = evaluations[columns].iloc[np.where(found, index, 0)].reset_index(drop=True)
+        picked = picked.where(np.repeat(found[:, None], len(columns), axis=1))
+        for column in columns:
+            result[f'{prefix}_{column}'] = picked[column]
+        result[f'{prefix}_STATEMENT_GAP'] = pd.Series(statement[index] - statement[pie], dtype='Int64').where(found)
+    return result
+
+
+def income_updates(next_df, persons, index, horizon_days=INCOME_HORIZON_DAYS):
+    """next_df with FIRST_INCOME_UPDATE_AT and INCOME_UPDATED (income_updates_after_pie)
+
+    persons has one row per ACCOUNT_ID x PERSON_ID; each PIE evaluation takes
+    the earliest first_after over its account's persons.
+    """
+    probes = pd.DataFrame({'ROW': np.arange(len(next_df)), 'ACCOUNT_ID': next_df['ACCOUNT_ID'].to_numpy()})
+    probes = probes.merge(persons[['ACCOUNT_ID', 'PERSON_ID']], on='ACCOUNT_ID')
+    rows = probes['ROW'].to_numpy()
+    evaluated = to_micros(next_df['EVALUATED_TIMESTAMP'])
+    first = index.first_after(probes['PERSON_ID'].to_numpy(), evaluated[rows], horizon_days)
+
+    never = np.iinfo(np.int64).max
+    earliest = np.full(len(next_df), never, dtype=np.int64)
+    np.minimum.at(earliest, rows, np.where(first == NO_INCOME, never, first))
+    found = earliest != never
+    result = next_df.copy()
+    result['FIRST_INCOME_UPDATE_AT'] = pd.Series(np.where(found, earliest, 0).astype('datetime64[us]')).where(found)
+    result['INCOME_UPDATED'] = found
+    return result
+
+
+def post_pie_summary(next_df):
+    """Post-PIE outcomes per cohort month and statement, each PIE account counted once
+
+    An account with several PIE evaluations on a statement counts once, as
+    approved / evaluated again if any of them was, with its largest amounts.
+    The worksheet's total_approved_post_pie sums every later approval row of
+    the self-join instead, so APPROVED_COUNT and the amounts here are lower
+    than the worksheet's by design. With income_updates columns, the income
+    update counts of the worksheet are added.
+    """
+    incomes = 'INCOME_UPDATED' in next_df.columns
+    per_account = {
+        'EVALUATED_AGAIN': 'max', 'APPROVED': 'max', 'DECLINED': 'max',
+        'CLIP_AMOUNT': 'max', 'APPROVED_CLIP_AMOUNT': 'max', 'APPROVED_ASSIGNED_LINE_INCREASE': 'max'
+    }
+    if incomes:
+        per_account['INCOME_UPDATED'] = 'max'
+    accounts = next_df.assign(
+        EVALUATED_AGAIN=next_df['NEXT_OUTCOME'].notna(),
+        APPROVED=next_df['APPROVED_STATEMENT_NUMBER'].notna(),
+        DECLINED=next_df['NEXT_OUTCOME'].isin(['DECLINED', 'INELIGIBLE'])
+    ).groupby(['STMT_MONTH', 'STATEMENT_NUMBER', 'ACCOUNT_ID'], as_index=False).agg(per_account)
+    accounts['DECLINED'] &= ~accounts['APPROVED']
+    if incomes:
+        accounts['INCOME_UPDATED_AND_APPROVED'] = accounts['INCOME_UPDATED'] & accounts['APPROVED']
+        accounts['INCOME_UPDATED_BUT_NOT_APPROVED'] = accounts['INCOME_UPDATED'] & ~accounts['APPROVED']
+        accounts['APPROVED_WITHOUT_INCOME_UPDATE'] = ~accounts['INCOME_UPDATED'] & accounts['APPROVED']
+
+    counts = {
+        'PRE_APPROVED_COUNT': ('ACCOUNT_ID', 'size'),
+        'EVALUATED_AGAIN_COUNT': ('EVALUATED_AGAIN', 'sum'),
+        'APPROVED_COUNT': ('APPROVED', 'sum'),
+        'DECLINED_FIRST_COUNT': ('DECLINED', 'sum'),
+        'PIE_CLIP_AMOUNT': ('CLIP_AMOUNT', 'sum'),
+        'APPROVED_CLIP_AMOUNT': ('APPROVED_CLIP_AMOUNT', 'sum'),
+        'APPROVED_ASSIGNED_LINE_INCREASE': ('APPROVED_ASSIGNED_LINE_INCREASE', 'sum')
+    }
+    if incomes:
+        counts['INCOME_UPDATED_COUNT'] = ('INCOME_UPDATED', 'sum')
+        for column in ['INCOME_UPDATED_AND_APPROVED', 'INCOME_UPDATED_BUT_NOT_APPROVED', 'APPROVED_WITHOUT_INCOME_UPDATE']:
+            counts[column] = (column, 'sum')
+    summary = accounts.groupby(['STMT_MONTH', 'STATEMENT_NUMBER'], as_index=False).agg(**counts)
+    summary['MISSED_OPPORTUNITY'] = summary['PRE_APPROVED_COUNT'] - summary['APPROVED_COUNT']
+    return summary
+
+
+def approvals_by_gap(next_df):
+    """Cumulative accounts approved by statement gap per cohort month and statement (the cal CTE)"""
+    approved = next_df.dropna(subset=['APPROVED_STATEMENT_GAP'])
+    approved = approved.groupby(['STMT_MONTH', 'STATEMENT_NUMBER', 'ACCOUNT_ID'], as_index=False)['APPROVED_STATEMENT_GAP'].min()
+    counts = approved.groupby(['STMT_MONTH', 'STATEMENT_NUMBER', 'APPROVED_STATEMENT_GAP']).size().rename('APPROVAL_COUNT')
+    counts = counts.reset_index()
+    counts['RUNNING_APPROVAL_COUNT'] = counts.groupby(['STMT_MONTH', 'STATEMENT_NUMBER'])['APPROVAL_COUNT'].cumsum()
+    return counts
+
+
+def load_evaluations(month_start, month_end, refresh=False):
+    """pie_account_evaluations.sql rows for PIE statements ending in [month_start, month_end)"""
+    from query_cache import cached_query
+
+    with open(ACCOUNT_EVALUATIONS_SQL, 'r') as f:
+        query = f.read()
+    return cached_query(query, {'month_start': str(month_start), 'month_end': str(month_end)}, refresh=refresh)
+
+
+def load_account_persons(month_start, month_end, refresh=False):
+    """pie_account_persons.sql rows for PIE statements ending in [month_start, month_end)"""
+    from query_cache import cached_query
+
+    with open(ACCOUNT_PERSONS_SQL, 'r') as f:
+        query = f.read()
+    return cached_query(query, {'month_start': str(month_start), 'month_end': str(month_end)}, refresh=refresh)
+
+
+def load_income_updates(next_df, month_start, month_end, horizon_days=INCOME_HORIZON_DAYS, refresh=False):
+    """income_updates of next_df from the persons and an income index covering its evaluations"""
+    persons = load_account_persons(month_start, month_end, refresh=refresh)
+    evaluated = pd.to_datetime(next_df['EVALUATED_TIMESTAMP'])
+    if len(evaluated) == 0:
+        return income_updates(next_df, persons, IncomeIndex([], []), horizon_days)
+    index = load_income_index(evaluated.min(), evaluated.max() + pd.Timedelta(days=horizon_days), refresh=refresh)
+    return income_updates(next_df, persons, index, horizon_days)
+
+
+def in_cohorts(next_df, month_start, month_end):
+    """Rows of PIE evaluations on statements ending in [month_start, month_end)"""
+    cohort = pd.to_datetime(next_df['STMT_MONTH'])
+    keep = (cohort >= pd.Timestamp(month_start)) & (cohort < pd.Timestamp(month_end))
+    return next_df[keep.to_numpy()].reset_index(drop=True)
+
+
+def load_next_outcomes(month_start, month_end, outcomes=NEXT_OUTCOMES, window_statements=WINDOW_STATEMENTS,
+                       refresh=False):
+    """next_outcomes and income_updates of the PIE evaluations on statements ending in [month_start, month_end)"""
+    evaluations = load_evaluations(month_start, month_end, refresh=refresh)
+    next_df = in_cohorts(next_outcomes(evaluations, outcomes, window_statements), month_start, month_end)
+    return load_income_updates(next_df, month_start, month_end, refresh=refresh)
+
+
+def main():
+    """Print the post-PIE outcome summary and approvals by statement gap"""
+    import time
+
+    from pipeline_args import build_parser
+    from snowflake_session import set_backend
+
+    parser = build_parser(description='Next CLIP outcome within N statements of each PIE evaluation')
+    parser.add_argument('--month-start', default='2025-04-01', metavar='YYYY-MM-DD', help='First PIE statement month (default: 2025-04-01)')
+    parser.add_argument('--month-end', default='2025-05-01', metavar='YYYY-MM-DD', help='Month after the last one (default: 2025-05-01)')
+    parser.add_argument('--window', type=int, default=WINDOW_STATEMENTS, help=f'Statements after the PIE one (default: {WINDOW_STATEMENTS})')
+    parser.add_argument('--out', metavar='PATH', help='Write the per-evaluation rows to a Parquet file')
+    args = parser.parse_args()
+    if args.backend:
+        set_backend(args.backend)
+
+    evaluations = load_evaluations(args.month_start, args.month_end, refresh=args.refresh)
+    start = time.perf_counter()
+    df = in_cohorts(next_outcomes(evaluations, window_statements=args.window), args.month_start, args.month_end)
+    print(f"✓ Next outcomes of {len(df):,} PIE evaluations from {len(evaluations):,} evaluations "
+          f"in {time.perf_counter() - start:.2f}s")
+    df = load_income_updates(df, args.month_start, args.month_end, refresh=args.refresh)
+    print(f"✓ {int(df['INCOME_UPDATED'].sum()):,} with an income update within {INCOME_HORIZON_DAYS} days\n")
+
+    print(post_pie_summary(df).to_string(index=False))
+    print("\nApprovals by statement gap:")
+    print(approvals_by_gap(df).to_string(index=False))
+    if args.out:
+        df.to_parquet(args.out, compression='zstd', index=False)
+        print(f"\n✓ Saved to: {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Shared Command-Line Options for Runners
+
+Every runner and export script accepts the same pipeline options, so a
+pipeline can pass one set of flags to each stage:
+
+    --extract PATH      Stream the raw query result to a Parquet file and exit
+    --batch-size N      Rows per batch in extract mode
+    --refresh           Ignore the local query result cache and re-run queries
+    --cohort-month DATE Cohort month bound to :cohort_month (e.g. 2025-05-01)
+    --statements LIST   Statement numbers bound to :statement_set (e.g. 18,26,34,42)
+    --horizon-days N    Follow-up window after PIE bound to :horizon_days
+    --bucket-days N     Bucket width in days bound to :bucket_days
+    --max-concurrent N  Independent queries submitted at once (1 = one after another)
+    --sql-incomes       Join CLIP_USER_INCOMES in SQL instead of looking up first
+                        incomes in a local income index (income_index.py)
+    --backend NAME      Where queries run: snowflake (default), duckdb (local
+                        Parquet snapshots) or local (sqlite3 stand-in)
+
+Parameters that are not given fall back to the defaults declared in each SQL
+file's header; the collected overrides are available as args.params.
+
+Unknown arguments are an error, so a typo such as --cohort_month does not
+quietly run the default cohort.
+"""
+
+import argparse
+
+from async_queries import DEFAULT_MAX_CONCURRENT
+from batched_extract import DEFAULT_BATCH_SIZE
+from snowflake_session import BACKENDS, set_backend
+
+# Command-line option -> SQL placeholder it binds
+QUERY_PARAM_OPTIONS = {
+    'cohort_month': 'cohort_month',
+    'statements': 'statement_set',
+    'horizon_days': 'horizon_days',
+    'bucket_days': 'bucket_days'
+}
+
+
+def _statement_list(text):
+    """Parse '18,26,34,42' into [18, 26, 34, 42]"""
+    try:
+        return [int(part) for part in text.split(',') if part.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected comma-separated statement numbers, got '{text}'")
+
+
+def build_parser(description=None):
+    """Return an ArgumentParser with the shared pipeline options"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--extract', metavar='PATH',
+                        help='Stream the raw query result to a Parquet file in fixed-size batches and exit')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f'Rows per batch in extract mode (default: {DEFAULT_BATCH_SIZE:,})')
+    parser.add_argument('--refresh', action='store_true',
+                        help='Bypass the local query result cache and overwrite cached results')
+    parser.add_argument('--cohort-month', metavar='YYYY-MM-DD',
+                        help='Cohort month (first day of the statement month)')
+    parser.add_argument('--statements', type=_statement_list, metavar='LIST',
+                        help='Comma-separated statement numbers, e.g. 18,26,34,42')
+    parser.add_argument('--horizon-days', type=int, metavar='N',
+                        help='Days after PIE evaluation in which income collection counts')
+    parser.add_argument('--bucket-days', type=int, metavar='N',
+                        help='Width of each month bucket in days')
+    parser.add_argument('--max-concurrent', type=int, default=DEFAULT_MAX_CONCURRENT, metavar='N',
+                        help=f'Independent queries submitted at once; 1 runs them serially (default: {DEFAULT_MAX_CONCURRENT})')
+    parser.add_argument('--sql-incomes', action='store_true',
+                        help='Join CLIP_USER_INCOMES in SQL instead of looking up first incomes in a local income index')
+    parser.add_argument('--backend', choices=sorted(BACKENDS),
+                        help='Query backend (default: PIE_BACKEND or snowflake)')
+    return parser
+
+
+def query_params_from_args(args):
+    """SQL parameter overrides given on the command line"""
+    return {param: getattr(args, option) for option, param in QUERY_PARAM_OPTIONS.items()
+            if getattr(args, option) is not None}
+
+
+def parse_pipeline_args(description=None):
+    """Parse the shared pipeline options from sys.argv"""
+    args = build_parser(description).parse_args()
+    args.params = query_params_from_args(args)
+    if args.backend:
+        set_backend(args.backend)
+    return args
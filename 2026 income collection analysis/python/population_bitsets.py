@@ -0,0 +1,234 @@
+"""
+Population Bitsets
+
+compare_old_vs_fixed.py exists because accounts that were PIE at one
+statement and APPROVED at another were counted as approved outright. Every
+question of that kind ("PIE at 18 but APPROVED at 26", "collected by month 3
+at 18 but not at 26") used to be a new SQL query.
+
+PopulationBitsets keeps one bitmap over dense account ids per cohort month,
+statement group (18, 26, 34, 42, 442, 999) and set:
+
+    total          accounts in the group's base population
+    pie            had PIE in the group
+    approved       approved outright (in the group, never PIE in it)
+    collected[k]   PIE with a first income by the end of month offset k
+
+Bitmaps are packed uint64 words (1M accounts = 125 KB), so overlaps,
+exclusions and the mutual-exclusivity check (approved + pie = total,
+approved & pie empty) are a few vectorized word operations plus a popcount,
+milliseconds for millions of accounts. The per-account offsets come from
+cohort_matrix.py (one pass over every cohort month).
+
+Usage:
+    python population_bitsets.py --month-start 2025-04-01 --month-end 2025-05-01
+
+    from population_bitsets import load_population_bitsets
+    bits = load_population_bitsets('2024-11-01', '2026-01-01')
+    (bits.pie('2025-04', 18) & bits.approved('2025-04', 26)).count()
+"""
+
+import numpy as np
+import pandas as pd
+
+from cohort_curves import n_buckets, statement_label
+
+# Popcount of every byte value
+BYTE_COUNTS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+
+
+class Bitmap:
+    """Fixed-size set of dense account ids as packed uint64 words"""
+
+    def __init__(self, words, size):
+        self.words = words
+        self.size = size
+
+    @classmethod
+    def from_mask(cls, mask):
+        mask = np.asarray(mask, dtype=bool)
+        packed = np.packbits(mask, bitorder='little')
+        padded = np.zeros(-(-len(packed) // 8) * 8, dtype=np.uint8)
+        padded[:len(packed)] = packed
+        return cls(padded.view(np.uint64), len(mask))
+
+    @classmethod
+    def from_ids(cls, dense_ids, size):
+        mask = np.zeros(size, dtype=bool)
+        mask[dense_ids] = True
+        return cls.from_mask(mask)
+
+    def _check(self, other):
+        if self.size != other.size:
+            raise ValueError(f"Bitmaps over different account sets ({self.size} vs {other.size} ids)")
+
+    def __and__(self, other):
+        self._check(other)
+        return Bitmap(self.words & other.words, self.size)
+
+    def __or__(self, other):
+        self._check(other)
+        return Bitmap(self.words | other.words, self.size)
+
+    def __xor__(self, other):
+        self._check(other)
+        return Bitmap(self.words ^ other.words, self.size)
+
+    def __sub__(self, other):
+        """In self but not in other"""
+        self._check(other)
+        return Bitmap(self.words & ~other.words, self.size)
+
+    def __invert__(self):
+        # Padding bits past size stay clear
+        return Bitmap.from_mask(~self.to_mask())
+
+    def __eq__(self, other):
+        return isinstance(other, Bitmap) and self.size == other.size and np.array_equal(self.words, other.words)
+
+    def count(self):
+        return int(BYTE_COUNTS[self.words.view(np.uint8)].sum())
+
+    def any(self):
+        return bool(self.words.any())
+
+    def to_mask(self):
+        return np.unpackbits(self.words.view(np.uint8), count=self.size, bitorder='little').astype(bool)
+
+    def ids(self):
+        """Dense account ids in the set"""
+        return np.flatnonzero(self.to_mask())
+
+
+class PopulationBitsets:
+    """Bitmaps per (cohort month, statement group, set) over one dense account id space"""
+
+    def __init__(self, account_ids, bitmaps, collected, horizon_days, bucket_days):
+        self.account_ids = account_ids
+        self.bitmaps = bitmaps
+        self.collected_by = collected
+        self.horizon_days = horizon_days
+        self.bucket_days = bucket_days
+
+    @classmethod
+    def from_offsets(cls, offsets, horizon_days, bucket_days):
+        """Build from per-account offsets with COHORT_MONTH (months since 1970-01), as cohort_matrix.py makes them"""
+        account_ids, account = np.unique(offsets['ACCOUNT_ID'].to_numpy(dtype=np.int64), return_inverse=True)
+        size = len(account_ids)
+        cohort = offsets['COHORT_MONTH'].to_numpy(dtype=np.int64)
+        statement = offsets['STATEMENT_NUMBER'].to_numpy(dtype=np.int64)
+        pie = offsets['HAD_PIE'].to_numpy().astype(bool)
+        days = offsets['DAYS_TO_COLLECTION'].to_numpy(dtype=np.float64, na_value=np.nan)
+
+        # Last day counted by each month offset, as in histogram_curves
+        last_day = np.minimum((np.arange(n_buckets(horizon_days, bucket_days)) + 1) * bucket_days - 1, horizon_days)
+
+        bitmaps, collected = {}, {}
+        for (month, group), rows in pd.DataFrame({'cohort': cohort, 'group': statement}).groupby(['cohort', 'group']).indices.items():
+            key = (_cohort_label(month), int(group))
+            group_pie = pie[rows]
+            bitmaps[key + ('total',)] = Bitmap.from_ids(account[rows], size)
+            bitmaps[key + ('pie',)] = Bitmap.from_ids(account[rows[group_pie]], size)
+            bitmaps[key + ('approved',)] = Bitmap.from_ids(account[rows[~group_pie]], size)
+            group_days = days[rows]
+            collected[key] = [
+                Bitmap.from_ids(account[rows[group_pie & (group_days <= day)]], size) for day in last_day
+            ]
+        return cls(account_ids, bitmaps, collected, horizon_days, bucket_days)
+
+    def get(self, cohort, statement_number, name):
+        key = (_cohort_label(cohort), statement_number, name)
+        if key not in self.bitmaps:
+            raise KeyError(f"No {name} bitmap for cohort {key[0]}, {statement_label(statement_number)}")
+        return self.bitmaps[key]
+
+    def total(self, cohort, statement_number):
+        return self.get(cohort, statement_number, 'total')
+
+    def pie(self, cohort, statement_number):
+        return self.get(cohort, statement_number, 'pie')
+
+    def approved(self, cohort, statement_number):
+        return self.get(cohort, statement_number, 'approved')
+
+    def collected(self, cohort, statement_number, month_offset):
+        """PIE accounts with a first income by the end of a month offset"""
+        return self.collected_by[(_cohort_label(cohort), statement_number)][month_offset]
+
+    def groups(self):
+        """(cohort, statement_number) pairs with bitmaps, in order"""
+        return sorted({key[:2] for key in self.bitmaps})
+
+    def any_cohort(self, statement_number, name):
+        """Union of one set over every cohort month (an account's statements fall in different months)"""
+        result = Bitmap.from_mask(np.zeros(len(self.account_ids), dtype=bool))
+        for cohort, group in self.groups():
+            if group == statement_number:
+                result = result | self.get(cohort, group, name)
+        return result
+
+    def check_exclusive(self, cohort, statement_number):
+        """approved & pie is empty and approved | pie is the whole population"""
+        pie = self.pie(cohort, statement_number)
+        approved = self.approved(cohort, statement_number)
+        return not (pie & approved).any() and (pie | approved) == self.total(cohort, statement_number)
+
+    def to_account_ids(self, bitmap):
+        """Original ACCOUNT_IDs of a bitmap"""
+        return self.account_ids[bitmap.ids()]
+
+
+def _cohort_label(cohort):
+    """'YYYY-MM' of a months-since-1970 number, a date or a 'YYYY-MM[-DD]' string"""
+    if isinstance(cohort, (int, np.integer)):
+        return str(np.datetime64(int(cohort), 'M'))
+    return str(np.datetime64(pd.Timestamp(cohort), 'M'))
+
+
+def load_population_bitsets(month_start, month_end, params=None, refresh=False):
+    """Bitsets of every cohort month in [month_start, month_end)"""
+    from cohort_matrix import load_matrix_offsets
+
+    offsets, horizon_days, bucket_days = load_matrix_offsets(month_start, month_end, params, refresh)
+    return PopulationBitsets.from_offsets(offsets, horizon_days, bucket_days)
+
+
+def main():
+    """Check mutual exclusivity per cohort and print cross-statement PIE / APPROVED overlaps"""
+    import time
+
+    from pipeline_args import build_parser, query_params_from_args
+    from snowflake_session import set_backend
+
+    parser = build_parser(description='Bitset population index for cross-statement set algebra')
+    parser.add_argument('--month-start', default='2024-11-01', metavar='YYYY-MM-DD', help='First cohort month (default: 2024-11-01)')
+    parser.add_argument('--month-end', default='2026-01-01', metavar='YYYY-MM-DD', help='Month after the last cohort (default: 2026-01-01)')
+    args = parser.parse_args()
+    if args.backend:
+        set_backend(args.backend)
+
+    bits = load_population_bitsets(args.month_start, args.month_end, query_params_from_args(args), refresh=args.refresh)
+    print(f"✓ {len(bits.bitmaps) + sum(len(v) for v in bits.collected_by.values()):,} bitmaps over "
+          f"{len(bits.account_ids):,} accounts\n")
+
+    start = time.perf_counter()
+    cohorts = sorted({cohort for cohort, _ in bits.groups()})
+    for cohort in cohorts:
+        print(f"Cohort {cohort}")
+        for c, group in bits.groups():
+            if c == cohort:
+                marker = "✓" if bits.check_exclusive(cohort, group) else "❌"
+                print(f"  {marker} {statement_label(group):<18} approved + pie = total ({bits.total(cohort, group).count():,})")
+
+    statements = sorted({group for _, group in bits.groups() if group < 100})
+    pie = {s: bits.any_cohort(s, 'pie') for s in statements}
+    approved = {s: bits.any_cohort(s, 'approved') for s in statements}
+    print(f"\nAccounts PIE at the row statement and APPROVED at the column statement ({cohorts[0]} to {cohorts[-1]}):")
+    print(" " * 10 + "".join(f"{statement_label(s):>12}" for s in statements))
+    for row in statements:
+        print(f"{statement_label(row):<10}" + "".join(f"{(pie[row] & approved[column]).count():>12,}" for column in statements))
+    print(f"\n✓ Set algebra for {len(cohorts)} cohort(s) in {1000 * (time.perf_counter() - start):.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+"""
+Local Query Result Cache
+
+pie_income_collection_over_time.sql is run independently by the Google Sheets
+export, the PowerPoint generator, the success-rate visualizers and the
+old-vs-fixed comparison, and every run paid full warehouse time for the same
+result. cached_query() stores results on local disk instead:
+
+- Key: SHA-256 of the normalized SQL text (comments stripped, whitespace
+  collapsed, case folded outside quotes) + effective bind parameters
+  (header defaults included) + backend + a
+  source-table watermark (latest LAST_ALTERED of every EDW table the query
+  reads), so a reload of any source table invalidates the entry
+- Entries are zstd-compressed Parquet files
+- Entries expire after PIE_CACHE_TTL_HOURS (default 24)
+- Least-recently-used entries are evicted once the cache exceeds
+  PIE_CACHE_MAX_MB (default 2048)
+- --refresh bypasses the lookup and overwrites the entry
+- Hits and misses are reported when the script exits
+- cached_queries() looks up several queries and runs the misses concurrently
+
+Usage:
+    from query_cache import cached_query
+
+    df = cached_query(query, args.params, refresh=args.refresh)
+    frames = cached_queries([(query, params_mar), (query, params_apr)], refresh=args.refresh)
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import re
+import time
+
+import pandas as pd
+
+from async_queries import DEFAULT_MAX_CONCURRENT, normalize_queries, run_queries
+from duckdb_backend import snapshot_watermark
+from query_params import SQL_TOKEN_RE, resolve
+from snowflake_session import get_pool, run_query
+
+# Cache location and limits
+CACHE_DIR = os.environ.get('PIE_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'pie_analysis', 'query_results'))
+CACHE_TTL_SECONDS = float(os.environ.get('PIE_CACHE_TTL_HOURS', '24')) * 3600
+CACHE_MAX_BYTES = int(float(os.environ.get('PIE_CACHE_MAX_MB', '2048')) * 1024 * 1024)
+
+# Fully-qualified tables a query reads from, e.g. EDW_DB.PUBLIC.CLIP_RESULTS_DATA
+SOURCE_TABLE_RE = re.compile(r'\b(?:from|join)\s+([a-z_][\w$]*)\.([a-z_][\w$]*)\.([a-z_][\w$]*)', re.IGNORECASE)
+
+stats = {'hits': 0, 'misses': 0}
+_report_registered = False
+
+
+def normalize_sql(query):
+    """Canonical form of a query: no comments, single spaces, lower case outside quotes"""
+    def squash(text):
+        return re.sub(r'\s+', ' ', text.lower())
+
+    # Comments become spaces within the surrounding code, so they cannot
+    # leave a run of whitespace behind
+    parts = []
+    code = []
+    pos = 0
+    for match in SQL_TOKEN_RE.finditer(query):
+        code.append(query[pos:match.start()])
+        token = match.group(0)
+        if token.startswith(('--', '/*')):
+            code.append(' ')
+        else:
+            parts.append(squash(''.join(code)))
+            parts.append(token)
+            code = []
+        pos = match.end()
+    code.append(query[pos:])
+    parts.append(squash(''.join(code)))
+    return ''.join(parts).strip().rstrip(';').strip()
+
+
+def source_tables(query):
+    """Sorted (database, schema, table) triples referenced by a query"""
+    return sorted({tuple(part.upper() for part in m.groups()) for m in SOURCE_TABLE_RE.finditer(normalize_sql(query))})
+
+
+def _snowflake_watermark(tables):
+    """Latest LAST_ALTERED across the given tables, from INFORMATION_SCHEMA"""
+    marks = []
+    for database in sorted({db for db, _, _ in tables}):
+        names = [(schema, table) for db, schema, table in tables if db == database]
+        predicate = ' or '.join(f'(table_schema = :schema_{i} and table_name = :table_{i})' for i in range(len(names)))
+        params = {}
+        for i, (schema, table) in enumerate(names):
+            params[f'schema_{i}'] = schema
+            params[f'table_{i}'] = table
+        df = run_query(
+            f'select max(last_altered) as watermark from {database}.information_schema.tables where {predicate}',
+            params
+        )
+        if len(df) and pd.notna(df['WATERMARK'].iloc[0]):
+            marks.append(str(df['WATERMARK'].iloc[0]))
+    return max(marks) if marks else ''
+
+
+# Backend name -> function(tables) returning a watermark string.
+# Backends without an entry rely on the TTL alone.
+WATERMARKS = {
+    'snowflake': _snowflake_watermark,
+    'duckdb': snapshot_watermark
+}
+
+
+def register_watermark(backend, watermark):
+    """Register the watermark function for a backend"""
+    WATERMARKS[backend] = watermark
+
+
+def cache_key(query, params=None):
+    """Content address of a query result"""
+    backend = get_pool().backend
+    tables = source_tables(query)
+    watermark_fn = WATERMARKS.get(backend)
+    watermark = watermark_fn(tables) if watermark_fn and tables else ''
+    payload = json.dumps({
+        'sql': normalize_sql(query),
+        'params': resolve(query, params),
+        'backend': backend,
+        'watermark': watermark
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _entry_path(key):
+    return os.path.join(CACHE_DIR, key[:2], key + '.parquet')
+
+
+def _is_fresh(path):
+    try:
+        return time.time() - os.stat(path).st_mtime < CACHE_TTL_SECONDS
+    except FileNotFoundError:
+        return False
+
+
+def _touch(path):
+    """Mark an entry as recently used (atime) without changing its age (mtime)"""
+    st = os.stat(path)
+    os.utime(path, (time.time(), st.st_mtime))
+
+
+def _store(path, df):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.partial'
+    df.to_parquet(tmp_path, compression='zstd', index=False)
+    os.replace(tmp_path, path)
+
+
+def evict(max_bytes=CACHE_MAX_BYTES):
+    """Drop expired entries, then least-recently-used ones until under budget"""
+    entries = []
+    now = time.time()
+    for root, _, files in os.walk(CACHE_DIR):
+        for name in files:
+            if not name.endswith('.parquet'):
+                continue
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+                if now - st.st_mtime >= CACHE_TTL_SECONDS:
+                    os.remove(path)
+                else:
+                    entries.append((st.st_atime, st.st_size, path))
+            except FileNotFoundError:
+                # Evicted concurrently by another pipeline process
+                continue
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def report():
+    """Print the cache hit/miss summary for this run"""
+    lookups = stats['hits'] + stats['misses']
+    if lookups:
+        print(f"\nQuery cache: {stats['hits']} hit(s), {stats['misses']} miss(es) ({CACHE_DIR})")
+
+
+def _register_report():
+    global _report_registered
+    if not _report_registered:
+        atexit.register(report)
+        _report_registered = True
+
+
+def _lookup(path, refresh):
+    """Cached frame for an entry path, or None on a miss"""
+    if not refresh and _is_fresh(path):
+        stats['hits'] += 1
+        _touch(path)
+        return pd.read_parquet(path)
+    stats['misses'] += 1
+    return None
+
+
+def cached_query(query, params=None, refresh=False):
+    """run_query() backed by the local result cache"""
+    _register_report()
+    path = _entry_path(cache_key(query, params))
+    df = _lookup(path, refresh)
+    if df is not None:
+        return df
+
+    df = run_query(query, params)
+    _store(path, df)
+    evict()
+    return df
+
+
+def cached_queries(queries, refresh=False, max_concurrent=DEFAULT_MAX_CONCURRENT):
+    """run_queries() backed by the local result cache; misses run concurrently"""
+    _register_report()
+    queries = normalize_queries(queries)
+    paths = [_entry_path(cache_key(query, params)) for query, params in queries]
+    frames = [_lookup(path, refresh) for path in paths]
+
+    misses = [i for i, df in enumerate(frames) if df is None]
+    if misses:
+        results = run_queries([queries[i] for i in misses], max_concurrent)
+        for i, df in zip(misses, results):
+            _store(paths[i], df)
+            frames[i] = df
+        evict()
+    return frames
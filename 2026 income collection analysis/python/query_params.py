@@ -0,0 +1,186 @@
+"""
+Query Parameters
+
+Cohort queries used to be re-targeted by editing the SQL file, or by
+string-replacing '2025-04-01' in the query text, so every cohort sent a
+different statement and neither Snowflake's result cache nor ours could reuse
+anything. SQL files now use named placeholders instead:
+
+    where date_trunc(month, stmt.statement_end_dt) = :cohort_month
+      and array_contains(clip.statement_number::variant, parse_json(:statement_set))
+
+and declare their defaults in the header comment:
+
+    -- PARAMETERS:
+    --   :cohort_month  = '2025-04-01'
+    --   :statement_set = [18, 26, 34, 42]
+
+bind() rewrites the placeholders into the backend's bind markers (:1, :2, ...
+for Snowflake server-side binding, ? for qmark drivers) and returns the values
+separately, so the statement text is byte-identical for every cohort. Lists
+are bound as JSON text. inline() renders literal values instead, for pasting
+a query into a Snowflake worksheet:
+
+    python query_params.py ../sql/pie_income_collection_over_time.sql --cohort-month 2025-05-01
+
+Usage:
+    from query_params import bind
+
+    sql, values = bind(query, {'cohort_month': '2025-05-01'}, paramstyle='numeric')
+"""
+
+import ast
+import datetime
+import json
+import re
+import sys
+
+# Comments and quoted text, in the order they must be recognized
+SQL_TOKEN_RE = re.compile(r"--[^\n]*|/\*.*?\*/|'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"", re.DOTALL)
+
+# :name placeholders. The lookbehind skips VARIANT paths (DECISION_DATA:field)
+# and :: casts.
+PLACEHOLDER_RE = re.compile(r'(?<![\w:$]):([A-Za-z_]\w*)')
+
+# Default declarations in the header comment, e.g. "--   :cohort_month = '2025-04-01'"
+DEFAULT_RE = re.compile(r'^[ \t]*--[ \t]*:([A-Za-z_]\w*)[ \t]*=[ \t]*(.+?)[ \t]*$', re.MULTILINE)
+
+# Rows of the month_series generator in the curve SQL: grids with more
+# buckets than this would be truncated silently
+MAX_MONTH_OFFSETS = 366
+
+
+def segments(query):
+    """Split a query into (text, is_code) pieces; comments and quoted text are not code"""
+    pos = 0
+    for match in SQL_TOKEN_RE.finditer(query):
+        yield query[pos:match.start()], True
+        yield match.group(0), False
+        pos = match.end()
+    yield query[pos:], True
+
+
+def placeholders(query):
+    """Placeholder names in order of appearance (repeats included)"""
+    names = []
+    for text, is_code in segments(query):
+        if is_code:
+            names.extend(PLACEHOLDER_RE.findall(text))
+    return names
+
+
+def defaults(query):
+    """Default parameter values declared in the query's header comment"""
+    values = {}
+    for name, literal in DEFAULT_RE.findall(query):
+        try:
+            values[name] = ast.literal_eval(literal)
+        except (ValueError, SyntaxError):
+            raise ValueError(f"Invalid default for :{name}: {literal}")
+    return values
+
+
+def resolve(query, params=None):
+    """Effective parameter values for a query: header defaults overridden by params
+
+    Only parameters the query actually uses are returned. A query without
+    placeholders returns params unchanged, unless they are a dict of overrides
+    (which then do not apply), so callers can still pass driver-native values.
+    """
+    names = placeholders(query)
+    if not names:
+        return None if isinstance(params, dict) else params
+
+    values = defaults(query)
+    values.update({name: value for name, value in (params or {}).items() if value is not None})
+    missing = sorted(set(names) - set(values))
+    if missing:
+        raise ValueError(f"No value for query parameter(s): {', '.join(':' + name for name in missing)}")
+    if 'horizon_days' in names and 'bucket_days' in names:
+        offsets = -(-int(values['horizon_days']) // int(values['bucket_days']))
+        if offsets > MAX_MONTH_OFFSETS:
+            raise ValueError(f"{values['horizon_days']}-day horizon in {values['bucket_days']}-day buckets is {offsets} "
+                             f"month offsets; the SQL generates at most {MAX_MONTH_OFFSETS}")
+    return {name: values[name] for name in sorted(set(names))}
+
+
+def _db_value(value):
+    """Convert a parameter value to something every DB-API driver can bind"""
+    if isinstance(value, (list, tuple)):
+        return json.dumps(list(value))
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+def _substitute(query, marker, escape_percent=False):
+    """Replace each placeholder with marker(name), leaving comments and quotes alone"""
+    parts = []
+    for text, is_code in segments(query):
+        if escape_percent:
+            text = text.replace('%', '%%')
+        if is_code:
+            text = PLACEHOLDER_RE.sub(lambda m: marker(m.group(1)), text)
+        parts.append(text)
+    return ''.join(parts)
+
+
+def bind(query, params=None, paramstyle='qmark'):
+    """Rewrite :name placeholders for a driver's paramstyle
+
+    Returns (sql, values) ready for cursor.execute(sql, values); values is None
+    when there is nothing to bind.
+    """
+    values = resolve(query, params)
+    names = placeholders(query)
+    if not names:
+        return query, values
+
+    values = {name: _db_value(value) for name, value in values.items()}
+
+    if paramstyle == 'numeric':
+        order = list(dict.fromkeys(names))
+        sql = _substitute(query, lambda name: f':{order.index(name) + 1}')
+        return sql, [values[name] for name in order]
+    if paramstyle == 'qmark':
+        return _substitute(query, lambda name: '?'), [values[name] for name in names]
+    if paramstyle in ('format', 'pyformat'):
+        return _substitute(query, lambda name: '%s', escape_percent=True), [values[name] for name in names]
+    if paramstyle == 'named':
+        return query, values
+    raise ValueError(f"Unsupported paramstyle '{paramstyle}'")
+
+
+def _literal(value):
+    """SQL literal for a parameter value"""
+    if value is None:
+        return 'NULL'
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, (int, float)):
+        return repr(value)
+    value = _db_value(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def inline(query, params=None):
+    """Render a query with literal values in place of its placeholders"""
+    values = resolve(query, params) or {}
+    return _substitute(query, lambda name: _literal(values[name]))
+
+
+def main():
+    """Print a SQL file with its parameters inlined, for use in a worksheet"""
+    from pipeline_args import build_parser, query_params_from_args
+
+    parser = build_parser(description='Render a parameterized SQL file with literal values')
+    parser.add_argument('sql_file', help='Path to a .sql file with :name placeholders')
+    args = parser.parse_args()
+
+    with open(args.sql_file, 'r') as f:
+        query = f.read()
+    sys.stdout.write(inline(query, query_params_from_args(args)))
+
+
+if __name__ == '__main__':
+    main()
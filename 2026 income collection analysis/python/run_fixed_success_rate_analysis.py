@@ -10,17 +10,12 @@ Key Fix:
 This ensures mutually exclusive categories and prevents double-counting.
 """
 
-import snowflake.connector
-import pandas as pd
-
-# Snowflake connection
-conn = snowflake.connector.connect(
-    user='ALFRED_LEE',
-    account='IJ90379-MISSIONLANE',
-    authenticator='externalbrowser',
-    database='EDW_DB',
-    schema='PUBLIC'
-)
+from batched_extract import extract_if_requested
+from cohort_curves import ACCOUNT_OFFSETS_SQL, curve_settings, fixed_success_curves, offsets_params
+from pipeline_args import parse_pipeline_args
+
+args = parse_pipeline_args()
+horizon_days, bucket_days = curve_settings(args.params)
 
 print("=" * 120)
 print("RUNNING FIXED PIE SUCCESS RATE ANALYSIS")
@@ -29,16 +24,15 @@ print("\nKey Fix: 'Approved Outright' now means accounts that were NEVER PIE")
 print("(Previously incorrectly counted accounts as 'approved outright' even if they had PIE at other statements)")
 print("\n")
 
-# Load fixed query
-with open('/Users/Alfred.Lee/Documents/github/2026 income collection analysis/sql/pie_income_collection_over_time_fixed.sql', 'r') as f:
+# Per-account offsets; the monthly curves are computed locally (cohort_curves.py),
+# with first incomes from a local income index unless --sql-incomes
+with open(ACCOUNT_OFFSETS_SQL, 'r') as f:
     query = f.read()
 
 print("Executing query...")
-cursor = conn.cursor()
-cursor.execute(query)
-df = pd.DataFrame(cursor.fetchall(), columns=[col[0] for col in cursor.description])
-cursor.close()
-conn.close()
+# --extract dumps the same offsets, with the income join run in SQL
+extract_if_requested(query, args, offsets_params(args.params))
+df = fixed_success_curves(args.params, refresh=args.refresh, local_incomes=not args.sql_incomes)
 
 print(f"✓ Loaded {len(df)} rows\n")
 
@@ -86,8 +80,8 @@ for stmt_num, stmt_name in statements:
 
     for _, row in stmt_data.iterrows():
         month_label = int(row['MONTH_LABEL'])
-        days_start = int(row['MONTH_OFFSET']) * 30
-        days_end = (int(row['MONTH_OFFSET']) + 1) * 30
+        days_start = int(row['MONTH_OFFSET']) * bucket_days
+        days_end = min((int(row['MONTH_OFFSET']) + 1) * bucket_days, horizon_days)
         days = f"{days_start}-{days_end}"
         success_rate = f"{row['SUCCESS_RATE_PCT']:.1f}%"
         approved = f"{int(row['APPROVED_OUTRIGHT_COUNT']):,}"
@@ -96,19 +90,22 @@ for stmt_num, stmt_name in statements:
 
         print(f"Month {month_label:<3} {days:<15} {success_rate:>15} {approved:>15} {pie_collected:>18} {success:>18}")
 
-    # Month 8 summary
+    # Final month summary
     final_row = stmt_data.iloc[-1]
-    print(f"\n  ✓ Month 8 (240 days) Results:")
+    print(f"\n  ✓ Month {int(final_row['MONTH_LABEL'])} ({horizon_days} days) Results:")
     print(f"    - Success Rate: {final_row['SUCCESS_RATE_PCT']:.1f}%")
     print(f"    - Approved Outright: {int(final_row['APPROVED_OUTRIGHT_COUNT']):,}")
     print(f"    - PIE Collected: {int(final_row['PIE_INCOME_COLLECTED_BY_MONTH']):,}")
     print(f"    - Total Success: {int(final_row['SUCCESS_COUNT']):,} of {total_pop:,}")
+    print(f"    - Exposure Success Rate: {final_row['EXPOSURE_SUCCESS_RATE_PCT']:.1f}% of ${final_row['TOTAL_EXPOSURE']:,.0f}")
+    print(f"    - PIE Exposure Recovered: ${final_row['PIE_EXPOSURE_RECOVERED_BY_MONTH']:,.0f} "
+          f"(still blocked by PIE: ${final_row['PIE_EXPOSURE_BLOCKED']:,.0f})")
 
 # Summary comparison
 print("\n" + "=" * 120)
-print("MONTH 8 SUMMARY - ALL STATEMENTS")
+print(f"MONTH {int(df['MONTH_LABEL'].max())} ({horizon_days} DAYS) SUMMARY - ALL STATEMENTS")
 print("=" * 120)
-print(f"\n{'Statement':<25} {'Population':>15} {'Approved':>15} {'PIE Total':>15} {'PIE Collected':>18} {'Success Rate':>15}")
+print(f"\n{'Statement':<25} {'Population':>15} {'Approved':>15} {'PIE Total':>15} {'PIE Collected':>18} {'Success Rate':>15} {'$ Success Rate':>15}")
 print("-" * 120)
 
 for stmt_num, stmt_name in statements:
@@ -122,15 +119,17 @@ for stmt_num, stmt_name in statements:
     pie_total = f"{int(final_row['PIE_TOTAL_COUNT']):,}"
     pie_collected = f"{int(final_row['PIE_INCOME_COLLECTED_BY_MONTH']):,}"
     success_rate = f"{final_row['SUCCESS_RATE_PCT']:.1f}%"
+    exposure_rate = f"{final_row['EXPOSURE_SUCCESS_RATE_PCT']:.1f}%"
 
-    print(f"{stmt_name:<25} {pop:>15} {approved:>15} {pie_total:>15} {pie_collected:>18} {success_rate:>15}")
+    print(f"{stmt_name:<25} {pop:>15} {approved:>15} {pie_total:>15} {pie_collected:>18} {success_rate:>15} {exposure_rate:>15}")
 
 print("\n" + "=" * 120)
 print("KEY INSIGHTS")
 print("=" * 120)
 print("\n✓ Success Rate = (Approved Outright + PIE with Income) / Total Population")
 print("✓ Approved Outright = Accounts that were NEVER PIE at any statement")
-print("✓ PIE with Income = PIE accounts that collected income within 240 days")
+print(f"✓ PIE with Income = PIE accounts that collected income within {horizon_days} days")
+print("✓ $ Success Rate = the same ratio weighted by clip amount (line increase at stake)")
 print("✓ Categories are mutually exclusive: Approved + PIE Total = Population")
 print("✓ Statement-level (18, 26, 34): Count each account once per statement")
 print("✓ Account-level (42+, Overall): Count each unique account once across all statements")
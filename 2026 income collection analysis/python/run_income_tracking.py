@@ -1,14 +1,9 @@
-import snowflake.connector
-import pandas as pd
-
-# Snowflake connection
-conn = snowflake.connector.connect(
-    user='ALFRED_LEE',
-    account='IJ90379-MISSIONLANE',
-    authenticator='externalbrowser',
-    database='EDW_DB',
-    schema='PUBLIC'
-)
+from snowflake_session import run_query
+from income_collected import income_collected_counts
+from batched_extract import extract_if_requested
+from pipeline_args import parse_pipeline_args
+
+args = parse_pipeline_args()
 
 # Read the query from file
 with open('/Users/Alfred.Lee/Documents/github/pie_income_update_tracking.sql', 'r') as f:
@@ -17,11 +12,12 @@ with open('/Users/Alfred.Lee/Documents/github/pie_income_update_tracking.sql', '
 print("Running Combined Success Rate Analysis...\n")
 print("=" * 120)
 
-cursor = conn.cursor()
-cursor.execute(query)
-df = pd.DataFrame(cursor.fetchall(), columns=[col[0] for col in cursor.description])
-cursor.close()
-conn.close()
+extract_if_requested(query, args, args.params)
+# income_collected from the local income index; --sql-incomes runs the query as written
+if args.sql_incomes:
+    df = run_query(query, args.params)
+else:
+    df = income_collected_counts(query, args.params, refresh=args.refresh)
 
 # Display results
 print("RESULTS:")
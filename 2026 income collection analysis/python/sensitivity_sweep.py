@@ -0,0 +1,194 @@
+"""
+Horizon x Bucket Sensitivity Sweep
+
+Every SQL file bakes in the 240-day horizon and 30-day buckets, and each
+other choice used to be another run. Here the per-account offsets of every
+cohort month are fetched once (cohort_matrix.py) with follow-up to the
+longest horizon, turned into one cumulative day histogram per (cohort month,
+statement group), and every scenario is read from it:
+
+- a scenario (horizon, bucket width) is just the list of days its month
+  offsets end on (as in histogram_curves)
+- the days of all scenarios are concatenated, so the whole grid is one
+  fancy-index of the cumulative histogram and one vectorized rounding,
+  whatever the number of scenarios
+
+The result is a tidy table (one row per cohort, group, horizon, bucket
+width and month offset, with SUCCESS_RATE_PCT, PIE_INCOME_COLLECTION_RATE_PCT,
+EXPOSURE_SUCCESS_RATE_PCT and FOLLOW_UP_COMPLETE) and a heatmap of the
+success rate at each horizon by cohort month.
+
+Usage:
+    python sensitivity_sweep.py --horizons 90,180,240,365 --buckets 7,30 --out sweep.parquet
+
+    from sensitivity_sweep import load_sensitivity_sweep
+    df = load_sensitivity_sweep('2024-11-01', '2026-01-01', [90, 180, 240, 365], [7, 30])
+"""
+
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from cohort_curves import OVERALL_GROUP, exposure_pct, histogram_from_offsets, n_buckets, round_pct, statement_label
+from cohort_matrix import GROUP_KEY_BASE
+
+DEFAULT_HORIZONS = [30, 60, 90, 120, 180, 240, 365]
+DEFAULT_BUCKETS = [1, 7, 14, 30]
+
+OUTPUT_FILE = '/Users/Alfred.Lee/Documents/github/visualizations/success_rate_horizon_sensitivity.png'
+
+
+def sweep_curves(hist, horizons=DEFAULT_HORIZONS, bucket_widths=DEFAULT_BUCKETS):
+    """Tidy rates of every (horizon, bucket width) scenario from one histogram keyed by cohort x group"""
+    if max(horizons) > hist.max_days:
+        raise ValueError(f"Horizon {max(horizons)} days exceeds the {hist.max_days} days the offsets were fetched with")
+
+    scenarios = [(horizon, bucket) for horizon in horizons for bucket in bucket_widths]
+    lengths = [n_buckets(horizon, bucket) for horizon, bucket in scenarios]
+    horizon = np.repeat([h for h, _ in scenarios], lengths)
+    bucket = np.repeat([b for _, b in scenarios], lengths)
+    offset = np.concatenate([np.arange(length) for length in lengths])
+    last_day = np.minimum((offset + 1) * bucket - 1, horizon)
+
+    # One gather for the whole grid; incomes on the horizon day past
+    # horizon * 24h drop out, as in histogram_curves
+    at_horizon = last_day == horizon
+    collected = hist.cumulative[:, last_day] - np.where(at_horizon, hist.late[:, last_day], 0)
+
+    n_groups, n_points = len(hist.groups), len(last_day)
+    approved = np.repeat(hist.total - hist.pie_total, n_points)
+    total = np.repeat(hist.total, n_points)
+    pie_total = np.repeat(hist.pie_total, n_points)
+    groups = hist.groups % GROUP_KEY_BASE
+    sweep = pd.DataFrame({
+        'COHORT_MONTH': pd.to_datetime(np.repeat(hist.groups // GROUP_KEY_BASE, n_points).astype('datetime64[M]')),
+        'STATEMENT_NUMBER': np.repeat(groups, n_points).astype(np.int64),
+        'HORIZON_DAYS': np.tile(horizon, n_groups),
+        'BUCKET_DAYS': np.tile(bucket, n_groups),
+        'MONTH_OFFSET': np.tile(offset, n_groups),
+        'SUCCESS_RATE_PCT': round_pct(approved + collected.ravel(), total),
+        'PIE_INCOME_COLLECTION_RATE_PCT': round_pct(collected.ravel(), pie_total)
+    })
+    if hist.exposure_total is not None:
+        recovered = hist.exposure_cumulative[:, last_day] - np.where(at_horizon, hist.exposure_late[:, last_day], 0)
+        approved_exposure = np.repeat(hist.exposure_total - hist.pie_exposure, n_points)
+        sweep['EXPOSURE_SUCCESS_RATE_PCT'] = exposure_pct(approved_exposure + recovered.ravel(),
+                                                          np.repeat(hist.exposure_total, n_points))
+    sweep.insert(2, 'STATEMENT_LABEL', sweep['STATEMENT_NUMBER'].map({int(g): statement_label(int(g)) for g in np.unique(groups)}))
+    return sweep
+
+
+def mark_follow_up(sweep, as_of=None):
+    """FOLLOW_UP_COMPLETE: the month offset is final as of a date (cohort_triangle.final_offsets)"""
+    from cohort_triangle import final_offsets
+
+    as_of = as_of or datetime.date.today()
+    keys = sweep[['COHORT_MONTH', 'HORIZON_DAYS', 'BUCKET_DAYS']].drop_duplicates()
+    keys['FINAL_OFFSETS'] = [
+        final_offsets(month.date(), as_of, int(horizon), int(bucket))
+        for month, horizon, bucket in keys.itertuples(index=False)
+    ]
+    final = sweep.merge(keys, on=['COHORT_MONTH', 'HORIZON_DAYS', 'BUCKET_DAYS'], how='left')['FINAL_OFFSETS']
+    sweep['FOLLOW_UP_COMPLETE'] = sweep['MONTH_OFFSET'].to_numpy() < final.to_numpy()
+    return sweep
+
+
+def load_sensitivity_sweep(month_start, month_end, horizons=DEFAULT_HORIZONS, bucket_widths=DEFAULT_BUCKETS,
+                           params=None, as_of=None, refresh=False):
+    """Sweep of every cohort month in [month_start, month_end); offsets fetched once at the longest horizon"""
+    from cohort_matrix import load_matrix_offsets
+
+    max_days = max(horizons)
+    offsets, _, _ = load_matrix_offsets(month_start, month_end, {**(params or {}), 'horizon_days': max_days}, refresh)
+    if len(offsets) == 0:
+        return pd.DataFrame()
+    keys = offsets['COHORT_MONTH'].to_numpy(dtype=np.int64) * GROUP_KEY_BASE + offsets['STATEMENT_NUMBER'].to_numpy(dtype=np.int64)
+    hist = histogram_from_offsets(offsets, max_days, groups=keys)
+    return mark_follow_up(sweep_curves(hist, horizons, bucket_widths), as_of)
+
+
+def horizon_table(sweep, statement_number=OVERALL_GROUP, bucket_days=30, metric='SUCCESS_RATE_PCT'):
+    """Cohort x horizon pivot of a metric at each scenario's last month offset (NaN while not final)"""
+    rows = sweep[(sweep['STATEMENT_NUMBER'] == statement_number) & (sweep['BUCKET_DAYS'] == bucket_days)]
+    last = rows.groupby(['COHORT_MONTH', 'HORIZON_DAYS'])['MONTH_OFFSET'].transform('max')
+    rows = rows[rows['MONTH_OFFSET'] == last]
+    values = rows[metric].where(rows['FOLLOW_UP_COMPLETE'])
+    table = rows.assign(VALUE=values).pivot(index='COHORT_MONTH', columns='HORIZON_DAYS', values='VALUE')
+    table.index = table.index.strftime('%Y-%m')
+    return table
+
+
+def plot_heatmap(table, title, output_file=OUTPUT_FILE):
+    """Heatmap of a cohort x horizon table, annotated with the rates"""
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(2 + 1.4 * len(table.columns), 1.5 + 0.5 * len(table)))
+    image = ax.imshow(table.to_numpy(dtype=np.float64), cmap='RdYlGn', aspect='auto')
+    ax.set_xticks(range(len(table.columns)))
+    ax.set_xticklabels([f'{h} days' for h in table.columns], fontsize=11)
+    ax.set_yticks(range(len(table.index)))
+    ax.set_yticklabels(table.index, fontsize=11)
+    for i, row in enumerate(table.to_numpy(dtype=np.float64)):
+        for j, value in enumerate(row):
+            if not np.isnan(value):
+                ax.text(j, i, f'{value:.1f}', ha='center', va='center', fontsize=10)
+    ax.set_xlabel('Horizon', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Cohort Month', fontsize=12, fontweight='bold')
+    ax.set_title(title, fontsize=14, fontweight='bold', pad=15)
+    fig.colorbar(image, ax=ax, label='%')
+    plt.tight_layout()
+    plt.savefig(output_file, dpi=300, bbox_inches='tight')
+    print(f"\nVisualization saved to: {output_file}")
+
+
+def _int_list(text):
+    return [int(value) for value in text.split(',') if value.strip()]
+
+
+def main():
+    """Run the sweep, write the tidy table and draw the horizon heatmap"""
+    import time
+
+    from pipeline_args import build_parser, query_params_from_args
+    from snowflake_session import set_backend
+
+    parser = build_parser(description='Success rates for a grid of horizons and bucket widths from one pass')
+    parser.add_argument('--month-start', default='2024-11-01', metavar='YYYY-MM-DD', help='First cohort month (default: 2024-11-01)')
+    parser.add_argument('--month-end', default='2026-01-01', metavar='YYYY-MM-DD', help='Month after the last cohort (default: 2026-01-01)')
+    parser.add_argument('--horizons', type=_int_list, default=DEFAULT_HORIZONS, metavar='DAYS,...',
+                        help=f"Horizons in days (default: {','.join(map(str, DEFAULT_HORIZONS))})")
+    parser.add_argument('--buckets', type=_int_list, default=DEFAULT_BUCKETS, metavar='DAYS,...',
+                        help=f"Bucket widths in days (default: {','.join(map(str, DEFAULT_BUCKETS))})")
+    parser.add_argument('--as-of', metavar='YYYY-MM-DD', help='Follow-up cutoff (default: today)')
+    parser.add_argument('--group', type=int, default=OVERALL_GROUP, help='Statement group of the heatmap (999 = Overall)')
+    parser.add_argument('--heatmap-bucket', type=int, default=30, help='Bucket width of the heatmap (default: 30)')
+    parser.add_argument('--out', metavar='PATH', help='Write the tidy table to a Parquet file')
+    parser.add_argument('--no-plot', action='store_true', help='Skip the heatmap')
+    args = parser.parse_args()
+    if args.backend:
+        set_backend(args.backend)
+
+    as_of = datetime.date.fromisoformat(args.as_of) if args.as_of else None
+    start = time.perf_counter()
+    df = load_sensitivity_sweep(args.month_start, args.month_end, args.horizons, args.buckets,
+                                query_params_from_args(args), as_of, refresh=args.refresh)
+    if len(df) == 0:
+        print("❌ No evaluation rows found")
+        return
+    scenarios = len(args.horizons) * len(args.buckets)
+    print(f"✓ {scenarios} scenarios x {df['COHORT_MONTH'].nunique()} cohorts x {df['STATEMENT_NUMBER'].nunique()} groups: "
+          f"{len(df):,} rows in {time.perf_counter() - start:.2f}s\n")
+
+    table = horizon_table(df, args.group, args.heatmap_bucket)
+    print(f"SUCCESS_RATE_PCT at the horizon ({statement_label(args.group)}, {args.heatmap_bucket}-day buckets; blank = not final):")
+    print(table.to_string(na_rep=''))
+    if args.out:
+        df.to_parquet(args.out, compression='zstd', index=False)
+        print(f"\n✓ Saved to: {args.out}")
+    if not args.no_plot:
+        plot_heatmap(table, f'Success Rate by Horizon - {statement_label(args.group)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+"""
+Cohort Snapshot Extractor
+
+Pulls only the rows a cohort window needs from the four EDW source tables into
+month-partitioned Parquet, the layout duckdb_backend.py reads:
+
+    <out>/ACCOUNT_STATEMENTS/PARTITION_MONTH=2025-04/part-0.parquet
+    <out>/CLIP_RESULTS_DATA/PARTITION_MONTH=2025-04/part-0.parquet
+    <out>/ACCOUNTS_CUSTOMERS_BRIDGE/PARTITION_MONTH=2025-04/part-0.parquet
+    <out>/CLIP_USER_INCOMES/PARTITION_MONTH=2025-04/part-0.parquet
+
+For each statement month:
+- account_statements: statements ending in the month (Stmt 18+)
+- CLIP_RESULTS_DATA: APPROVED / PRE_EVAL_APPROVED / DECLINED / INELIGIBLE
+  evaluations of those statements, pruned by evaluated_timestamp;
+  DECISION_DATA is cut down to the fields the analysis reads. The cohort
+  SQL keeps APPROVED / PRE_EVAL_APPROVED itself; next_outcome.py also
+  needs the declines (extract the months after a cohort too, so its later
+  evaluations are present)
+- ACCOUNTS_CUSTOMERS_BRIDGE: bridge rows of the APPROVED /
+  PRE_EVAL_APPROVED accounts
+- CLIP_USER_INCOMES: valid incomes of the bridged persons from the earliest
+  evaluation (month start - EVAL_SLACK_DAYS - lookback) through the horizon
+
+Only needed columns are extracted. Bridge and income rows shared by several
+months are stored once per month and deduplicated when read.
+
+Re-running only extracts months that are missing, plus months whose horizon
+had not yet elapsed when they were extracted (their incomes were incomplete).
+_partitions.json records what each partition holds.
+
+Usage:
+    python snapshot_extract.py --start 2025-03 --end 2025-05 [--horizon-days 240] [--force]
+"""
+
+import datetime
+import json
+import os
+import shutil
+
+from batched_extract import DEFAULT_BATCH_SIZE, extract_to_parquet
+from duckdb_backend import PARTITION_COLUMN, SNAPSHOT_DIR
+from snowflake_session import set_backend
+
+# Only statements from here on are analyzed
+MIN_STATEMENT = 18
+
+# Default income follow-up window after the evaluation
+DEFAULT_HORIZON_DAYS = 240
+
+# Evaluations can land a few weeks either side of the statement month;
+# the evaluated_timestamp window is widened by this much for pruning
+EVAL_SLACK_DAYS = 31
+
+# Outcomes kept in the snapshot (next_outcome.NEXT_OUTCOMES + PIE); only
+# the cohort outcomes pull bridge and income rows
+EXTRACTED_OUTCOMES = ['APPROVED', 'PRE_EVAL_APPROVED', 'DECLINED', 'INELIGIBLE']
+COHORT_OUTCOMES = ['APPROVED', 'PRE_EVAL_APPROVED']
+
+# DECISION_DATA fields kept in the snapshot
+DECISION_FIELDS = ['fico_08', 'assigned_line_increase', 'post_pie_evaluation']
+
+MANIFEST = '_partitions.json'
+
+# Bumped whenever the extracted columns or rows change; partitions written
+# with an older layout are re-extracted
+SNAPSHOT_VERSION = 4
+
+_extracted_outcomes = ', '.join(f"'{outcome}'" for outcome in EXTRACTED_OUTCOMES)
+_cohort_outcomes = ', '.join(f"'{outcome}'" for outcome in COHORT_OUTCOMES)
+
+COHORT_CLIP_CTE = f"""
+with cohort_statements as (
+    select stmt.account_id, stmt.statement_num, stmt.statement_end_dt
+    from EDW_DB.PUBLIC.account_statements stmt
+    where stmt.statement_end_dt >= :month_start::date
+      and stmt.statement_end_dt < :month_end::date
+      and stmt.statement_num >= :min_statement
+),
+
+cohort_clip as (
+    select clip.*
+    from EDW_DB.PUBLIC.CLIP_RESULTS_DATA clip
+    join cohort_statements stmt
+        on stmt.account_id = clip.account_id
+        and stmt.statement_num = clip.statement_number
+    where clip.evaluated_timestamp >= dateadd(day, -:eval_slack_days, :month_start::date)
+      and clip.evaluated_timestamp < dateadd(day, :eval_slack_days, :month_end::date)
+      and clip.outcome in ({_extracted_outcomes})
+),
+
+cohort_persons as (
+    select distinct acb.ACCOUNT_ID, acb.PERSON_ID
+    from EDW_DB.PUBLIC.ACCOUNTS_CUSTOMERS_BRIDGE acb
+    where acb.ACCOUNT_ID in (
+        select account_id from cohort_clip
+        where outcome in ({_cohort_outcomes})
+    )
+)
+"""
+
+_decision_pairs = ', '.join(f"'{field}', clip.DECISION_DATA:{field}" for field in DECISION_FIELDS)
+
+# Table -> query extracting one statement month of it
+QUERIES = {
+    'ACCOUNT_STATEMENTS': COHORT_CLIP_CTE + """
+select account_id, statement_num, statement_end_dt
+from cohort_statements
+""",
+    'CLIP_RESULTS_DATA': COHORT_CLIP_CTE + f"""
+select
+    clip.account_id,
+    clip.statement_number,
+    clip.outcome,
+    clip.evaluated_timestamp,
+    clip.clip_amount,
+    object_construct({_decision_pairs})::varchar as DECISION_DATA
+from cohort_clip clip
+""",
+    'ACCOUNTS_CUSTOMERS_BRIDGE': COHORT_CLIP_CTE + """
+select ACCOUNT_ID, PERSON_ID
+from cohort_persons
+""",
+    'CLIP_USER_INCOMES': COHORT_CLIP_CTE + """
+select inc.PERSON_ID, inc.CREATED_AT, inc.annual_income
+from EDW_DB.PUBLIC.CLIP_USER_INCOMES inc
+where inc.PERSON_ID in (select PERSON_ID from cohort_persons)
+  and inc.CREATED_AT >= dateadd(day, -(:eval_slack_days + :lookback_days), :month_start::date)
+  and inc.CREATED_AT < dateadd(day, :horizon_days + :eval_slack_days, :month_end::date)
+  and inc.annual_income is not null
+"""
+}
+
+
+def month_range(start, end):
+    """First days of every month from start to end inclusive ('YYYY-MM' strings)"""
+    year, month = map(int, start.split('-')[:2])
+    last = tuple(map(int, end.split('-')[:2]))
+    months = []
+    while (year, month) <= last:
+        months.append(datetime.date(year, month, 1))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def _next_month(day):
+    return datetime.date(day.year + 1, 1, 1) if day.month == 12 else datetime.date(day.year, day.month + 1, 1)
+
+
+def load_manifest(out_dir):
+    path = os.path.join(out_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _save_manifest(out_dir, manifest):
+    path = os.path.join(out_dir, MANIFEST)
+    with open(path + '.partial', 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(path + '.partial', path)
+
+
+def is_complete(entry, horizon_days, lookback_days):
+    """True if a manifest entry covers the horizon and needs no re-extract"""
+    return (entry.get('snapshot_version') == SNAPSHOT_VERSION
+            and entry.get('horizon_days') == horizon_days
+            and entry.get('lookback_days') == lookback_days
+            and entry['extracted_at'] >= entry['complete_after'])
+
+
+def extract_month(month, out_dir, horizon_days=DEFAULT_HORIZON_DAYS, lookback_days=0, batch_size=DEFAULT_BATCH_SIZE):
+    """Extract one statement month into its partitions; returns rows per table"""
+    month_end = _next_month(month)
+    label = month.strftime('%Y-%m')
+    params = {
+        'month_start': month.isoformat(),
+        'month_end': month_end.isoformat(),
+        'min_statement': MIN_STATEMENT,
+        'eval_slack_days': EVAL_SLACK_DAYS,
+        'horizon_days': horizon_days,
+        'lookback_days': lookback_days
+    }
+
+    # Stage all four tables first so a failed month leaves no partial partition
+    staging = os.path.join(out_dir, '.staging', label)
+    shutil.rmtree(staging, ignore_errors=True)
+    rows = {}
+    for table, query in QUERIES.items():
+        os.makedirs(os.path.join(staging, table), exist_ok=True)
+        path = os.path.join(staging, table, 'part-0.parquet')
+        rows[table] = extract_to_parquet(query, path, params=params, batch_size=batch_size)
+
+    for table in QUERIES:
+        final = os.path.join(out_dir, table, f'{PARTITION_COLUMN}={label}')
+        shutil.rmtree(final, ignore_errors=True)
+        os.makedirs(os.path.dirname(final), exist_ok=True)
+        os.replace(os.path.join(staging, table), final)
+    shutil.rmtree(os.path.join(out_dir, '.staging'), ignore_errors=True)
+
+    complete_after = month_end + datetime.timedelta(days=EVAL_SLACK_DAYS + horizon_days)
+    return {
+        'rows': rows,
+        'snapshot_version': SNAPSHOT_VERSION,
+        'horizon_days': horizon_days,
+        'lookback_days': lookback_days,
+        'extracted_at': datetime.date.today().isoformat(),
+        'complete_after': complete_after.isoformat()
+    }
+
+
+def extract_snapshots(months, out_dir=SNAPSHOT_DIR, horizon_days=DEFAULT_HORIZON_DAYS, lookback_days=0,
+                      force=False, batch_size=DEFAULT_BATCH_SIZE):
+    """Extract every month that is missing or incomplete; returns the months extracted"""
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = load_manifest(out_dir)
+    extracted = []
+    for month in months:
+        label = month.strftime('%Y-%m')
+        entry = manifest.get(label)
+        if not force and entry and is_complete(entry, horizon_days, lookback_days):
+            print(f"  - {label}: up to date")
+            continue
+        print(f"  Extracting {label}...")
+        manifest[label] = extract_month(month, out_dir, horizon_days, lookback_days, batch_size)
+        _save_manifest(out_dir, manifest)
+        counts = ', '.join(f"{table} {n:,}" for table, n in manifest[label]['rows'].items())
+        print(f"  ✓ {label}: {counts}")
+        extracted.append(label)
+    return extracted
+
+
+def main():
+    """Extract snapshots for a range of statement months"""
+    from pipeline_args import build_parser
+
+    parser = build_parser(description='Extract cohort snapshots into month-partitioned Parquet')
+    parser.add_argument('--start', required=True, metavar='YYYY-MM', help='First statement month')
+    parser.add_argument('--end', metavar='YYYY-MM', help='Last statement month (default: --start)')
+    parser.add_argument('--out', default=SNAPSHOT_DIR, metavar='DIR', help=f'Snapshot directory (default: {SNAPSHOT_DIR})')
+    parser.add_argument('--lookback-days', type=int, default=0, metavar='N',
+                        help='Also extract incomes created up to N days before the month')
+    parser.add_argument('--force', action='store_true', help='Re-extract months that are already complete')
+    args = parser.parse_args()
+    if args.backend:
+        set_backend(args.backend)
+
+    months = month_range(args.start, args.end or args.start)
+    horizon_days = args.horizon_days or DEFAULT_HORIZON_DAYS
+    print(f"Extracting {len(months)} month(s) to {args.out} (horizon {horizon_days} days)...")
+    extracted = extract_snapshots(months, args.out, horizon_days, args.lookback_days, args.force, args.batch_size)
+    print(f"\n✓ {len(extracted)} month(s) extracted, {len(months) - len(extracted)} already up to date")
+
+
+if __name__ == '__main__':
+    main()
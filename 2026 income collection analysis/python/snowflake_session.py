@@ -0,0 +1,279 @@
+"""
+Shared Snowflake Session Layer
+
+Every analysis script used to open its own externalbrowser connection at import
+time and close it after a single query, so a full refresh meant one browser SSO
+round trip per script. This module gives all scripts one shared session layer:
+
+- Connections are opened lazily on the first query, never at import time
+- Idle connections are kept in a small pool and health-checked before reuse
+- The SSO id token is cached by the connector (client_store_temporary_credential),
+  so every later process in the same pipeline run skips the browser login
+- The backend is pluggable: 'snowflake' (default), 'duckdb' (offline runs
+  against local Parquet snapshots, see duckdb_backend.py) or 'local', a sqlite3
+  stand-in for tests. Select it with the PIE_BACKEND environment variable,
+  set_backend(), or add your own with register_backend().
+  PIE_LOCAL_LATENCY_MS adds a fixed delay to every local query, to simulate
+  warehouse latency.
+- Queries may use :name placeholders (see query_params.py); they are bound
+  in the backend's paramstyle, server-side for Snowflake
+
+Usage:
+    from snowflake_session import run_query
+
+    df = run_query(query)
+    df = run_query(query, {'cohort_month': '2025-05-01'})
+"""
+
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from arrow_fetch import fetch_frame
+from query_params import bind
+
+# Snowflake connection configuration
+SNOWFLAKE_CONFIG = {
+    'user': 'ALFRED_LEE',
+    'account': 'IJ90379-MISSIONLANE',
+    'authenticator': 'externalbrowser',
+    'database': 'EDW_DB',
+    'schema': 'PUBLIC',
+    # Token cache: keep the SSO id token in the OS keychain so other processes
+    # in the same pipeline run connect without opening the browser again
+    'client_store_temporary_credential': True,
+    'client_session_keep_alive': True,
+    # Server-side binding (:1, :2, ...) keeps the statement text identical
+    # across parameter values, so Snowflake can reuse cached results
+    'paramstyle': 'numeric'
+}
+
+# Maximum number of open connections per backend
+POOL_SIZE = int(os.environ.get('PIE_POOL_SIZE', '4'))
+
+# Pooled connections idle for longer than this are pinged before reuse
+HEALTH_CHECK_AFTER_SECONDS = 60
+
+# Local stand-in database (sqlite3 path, ':memory:' by default)
+LOCAL_DATABASE = os.environ.get('PIE_LOCAL_DB', ':memory:')
+
+# Simulated per-query latency of the local stand-in
+LOCAL_LATENCY_SECONDS = float(os.environ.get('PIE_LOCAL_LATENCY_MS', '0')) / 1000
+
+
+def _connect_snowflake():
+    """Open a Snowflake connection (driver imported lazily)"""
+    import snowflake.connector
+    return snowflake.connector.connect(**SNOWFLAKE_CONFIG)
+
+
+class _LatencyCursor(sqlite3.Cursor):
+    """sqlite3 cursor that sleeps before each query, like a remote warehouse"""
+
+    def execute(self, *args):
+        time.sleep(LOCAL_LATENCY_SECONDS)
+        return super().execute(*args)
+
+
+class _LatencyConnection(sqlite3.Connection):
+    def cursor(self, factory=_LatencyCursor):
+        return super().cursor(factory)
+
+
+def _connect_local():
+    """Open a connection to the local sqlite3 stand-in"""
+    factory = _LatencyConnection if LOCAL_LATENCY_SECONDS > 0 else sqlite3.Connection
+    return sqlite3.connect(LOCAL_DATABASE, check_same_thread=False, factory=factory)
+
+
+def _connect_duckdb():
+    """Open a DuckDB session over the local Parquet snapshots (imported lazily)"""
+    from duckdb_backend import connect
+    return connect()
+
+
+# Backend name -> zero-argument function returning a DB-API connection
+BACKENDS = {
+    'snowflake': _connect_snowflake,
+    'duckdb': _connect_duckdb,
+    'local': _connect_local
+}
+
+# Backend name -> DB-API paramstyle its connections expect
+PARAMSTYLES = {
+    'snowflake': 'numeric',
+    'duckdb': 'qmark',
+    'local': 'qmark'
+}
+
+
+def register_backend(name, connect, paramstyle='qmark'):
+    """Register a backend; connect() must return a DB-API 2.0 connection"""
+    BACKENDS[name] = connect
+    PARAMSTYLES[name] = paramstyle
+
+
+def _is_healthy(conn):
+    """Return True if the connection is open and answers a trivial query"""
+    try:
+        is_closed = getattr(conn, 'is_closed', None)
+        if is_closed is not None and is_closed():
+            return False
+        cur = conn.cursor()
+        try:
+            cur.execute('select 1')
+            cur.fetchall()
+        finally:
+            cur.close()
+        return True
+    except Exception:
+        return False
+
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+class SessionPool:
+    """Lazily-opened, health-checked pool of connections for one backend"""
+
+    def __init__(self, backend, size=POOL_SIZE):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}' (known: {', '.join(sorted(BACKENDS))})")
+        self.backend = backend
+        self.paramstyle = PARAMSTYLES.get(backend, 'qmark')
+        self.size = size
+        self._idle = []  # (connection, monotonic time it was released)
+        self._open = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Take a connection from the pool, connecting on first use"""
+        while True:
+            with self._cond:
+                while not self._idle and self._open >= self.size:
+                    self._cond.wait()
+                if self._idle:
+                    conn, released_at = self._idle.pop()
+                else:
+                    self._open += 1
+                    conn, released_at = None, None
+
+            if conn is None:
+                try:
+                    return BACKENDS[self.backend]()
+                except Exception:
+                    self._forget()
+                    raise
+
+            idle_for = time.monotonic() - released_at
+            if idle_for < HEALTH_CHECK_AFTER_SECONDS or _is_healthy(conn):
+                return conn
+            self.discard(conn)
+
+    def release(self, conn):
+        """Return a connection to the pool"""
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def discard(self, conn):
+        """Close a broken connection and free its pool slot"""
+        _close_quietly(conn)
+        self._forget()
+
+    def _forget(self):
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+
+    def close(self):
+        """Close every idle connection"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for conn, _ in idle:
+            _close_quietly(conn)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide pool for the selected backend"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SessionPool(os.environ.get('PIE_BACKEND', 'snowflake'))
+        return _pool
+
+
+def set_backend(name):
+    """Switch the process-wide pool to another backend"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool = SessionPool(name)
+
+
+def close_all():
+    """Close every pooled connection (registered with atexit)"""
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+
+
+atexit.register(close_all)
+
+
+@contextmanager
+def connection():
+    """Borrow a pooled connection for the duration of a with-block"""
+    pool = get_pool()
+    conn = pool.acquire()
+    try:
+        yield conn
+    except Exception:
+        # A failed query may have been caused by a dropped session
+        if _is_healthy(conn):
+            pool.release(conn)
+        else:
+            pool.discard(conn)
+        raise
+    else:
+        pool.release(conn)
+
+
+@contextmanager
+def cursor():
+    """Borrow a cursor on a pooled connection"""
+    with connection() as conn:
+        cur = conn.cursor()
+        try:
+            yield cur
+        finally:
+            cur.close()
+
+
+def execute(cur, query, params=None):
+    """Execute a query, binding :name placeholders in the backend's paramstyle"""
+    sql, values = bind(query, params, get_pool().paramstyle)
+    if values is None:
+        cur.execute(sql)
+    else:
+        cur.execute(sql, values)
+
+
+def run_query(query, params=None):
+    """Execute a query on the shared session and return a compact DataFrame"""
+    with cursor() as cur:
+        execute(cur, query, params)
+        return fetch_frame(cur)
@@ -0,0 +1,158 @@
+"""
+Multi-Statement SQL Script Runner
+
+cursor.execute() takes one statement, but worksheets like
+pie_income_collection_over_time_account_level.sql mix `use database`,
+`SET EVAL_START_DATE = ...`, `CREATE OR REPLACE TEMPORARY TABLE ...` and many
+standalone selects. run_script() runs a whole worksheet headless:
+
+- Statements are split on ';' outside comments, quoted text and $$ blocks
+- All statements run in order on one dedicated connection, so session
+  variables ($EVAL_START_DATE), `use` and temporary tables carry over; the
+  connection is closed afterwards instead of going back to the pool
+- :name placeholders are bound per statement (defaults from the file header)
+- Every statement is timed; every result set is returned as a named frame
+
+A statement is named by a "-- name: <name>" comment directly above it,
+otherwise stmt_<n> (its 1-based position in the script).
+
+Usage:
+    python sql_script.py ../sql/pie_income_collection_over_time_account_level.sql --out results/
+
+    from sql_script import run_script
+    frames, timings = run_script(script)
+"""
+
+import os
+import re
+import time
+from collections import namedtuple
+
+from arrow_fetch import fetch_frame
+from query_params import defaults
+from snowflake_session import execute, get_pool, set_backend
+
+# Comments, quoted text and $$ blocks: ';' inside them does not end a statement
+SCRIPT_TOKEN_RE = re.compile(r"--[^\n]*|/\*.*?\*/|'(?:[^'\\]|''|\\.)*'|\"(?:[^\"]|\"\")*\"|\$\$.*?\$\$|;", re.DOTALL)
+
+# "-- name: income_validation" directive naming the statement below it
+NAME_RE = re.compile(r'^[ \t]*--[ \t]*name:[ \t]*(\w+)[ \t]*$', re.MULTILINE | re.IGNORECASE)
+
+# Leading comments and whitespace before a statement's first keyword
+LEADING_RE = re.compile(r'(?:\s+|--[^\n]*|/\*.*?\*/)*', re.DOTALL)
+
+# Statement kinds whose result rows are returned as frames
+RESULT_KINDS = {'select', 'with', 'desc', 'describe', 'show', 'values', 'table', 'list'}
+
+Statement = namedtuple('Statement', ['name', 'line', 'kind', 'sql'])
+
+
+def split_statements(script):
+    """Split a SQL script into Statements, skipping comment-only fragments"""
+    pieces = []
+    start = 0
+    for match in SCRIPT_TOKEN_RE.finditer(script):
+        if match.group(0) == ';':
+            pieces.append((start, script[start:match.start()]))
+            start = match.end()
+    pieces.append((start, script[start:]))
+
+    statements = []
+    for offset, text in pieces:
+        body_start = LEADING_RE.match(text).end()
+        if body_start == len(text):
+            continue
+        leading = text[:body_start]
+        names = NAME_RE.findall(leading)
+        kind = re.match(r'\w*', text[body_start:]).group(0).lower()
+        statements.append(Statement(
+            name=names[-1] if names else f'stmt_{len(statements) + 1:03d}',
+            line=script.count('\n', 0, offset + body_start) + 1,
+            kind=kind,
+            sql=text[body_start:].rstrip()
+        ))
+    return statements
+
+
+def run_script(script, params=None, verbose=True):
+    """Run every statement of a SQL script on one session
+
+    Returns (frames, timings): frames maps statement name -> DataFrame for
+    every statement that returns rows; timings is a list of dicts with the
+    name, line, kind, seconds and rows of each statement, in script order.
+    """
+    params = {**defaults(script), **(params or {})}
+    frames = {}
+    timings = []
+
+    pool = get_pool()
+    conn = pool.acquire()
+    try:
+        cur = conn.cursor()
+        try:
+            for stmt in split_statements(script):
+                started = time.perf_counter()
+                try:
+                    execute(cur, stmt.sql, params)
+                    df = fetch_frame(cur) if stmt.kind in RESULT_KINDS and cur.description else None
+                except Exception as e:
+                    raise RuntimeError(f"Statement {stmt.name} (line {stmt.line}) failed: {e}") from e
+                seconds = time.perf_counter() - started
+
+                if df is not None:
+                    frames[stmt.name] = df
+                timings.append({
+                    'name': stmt.name,
+                    'line': stmt.line,
+                    'kind': stmt.kind,
+                    'seconds': seconds,
+                    'rows': len(df) if df is not None else None
+                })
+                if verbose:
+                    rows = f"{len(df):,} rows" if df is not None else ''
+                    print(f"  ✓ {stmt.name:<28} line {stmt.line:<5} {stmt.kind:<8} {seconds:8.2f}s  {rows}")
+        finally:
+            cur.close()
+    finally:
+        # `use`, SET and temp tables would leak into other users of a pooled connection
+        pool.discard(conn)
+
+    return frames, timings
+
+
+def print_profile(timings, top=10):
+    """Print the slowest statements of a script run"""
+    total = sum(t['seconds'] for t in timings)
+    print(f"\nTotal: {total:.2f}s over {len(timings)} statements. Slowest:")
+    for t in sorted(timings, key=lambda t: t['seconds'], reverse=True)[:top]:
+        share = 100.0 * t['seconds'] / total if total else 0.0
+        print(f"  {t['name']:<28} line {t['line']:<5} {t['seconds']:8.2f}s  {share:5.1f}%")
+
+
+def main():
+    """Run a SQL script headless, print its statement profile, optionally save results"""
+    from pipeline_args import build_parser, query_params_from_args
+
+    parser = build_parser(description='Run a multi-statement SQL script and profile each statement')
+    parser.add_argument('sql_file', help='Path to a .sql script')
+    parser.add_argument('--out', metavar='DIR', help='Write each result set to DIR/<name>.parquet')
+    args = parser.parse_args()
+    if args.backend:
+        set_backend(args.backend)
+
+    with open(args.sql_file, 'r') as f:
+        script = f.read()
+
+    print(f"Running {args.sql_file}...")
+    frames, timings = run_script(script, query_params_from_args(args))
+    print_profile(timings)
+
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+        for name, df in frames.items():
+            df.to_parquet(os.path.join(args.out, f'{name}.parquet'), compression='zstd', index=False)
+        print(f"\n✓ Saved {len(frames)} result sets to: {args.out}")
+
+
+if __name__ == '__main__':
+    main()
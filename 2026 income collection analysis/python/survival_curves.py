@@ -0,0 +1,245 @@
+"""
+Kaplan-Meier Time-to-Income Curves
+
+The over-time charts only use cohorts with the full 8 months (240 days) of
+follow-up, which is why the comparisons stop at Mar-May 2025, while EFX
+income records expire after a year. Counting collected incomes in a younger
+cohort would understate collection: accounts evaluated late in the month
+have simply not been watched as long.
+
+This engine treats time to first income as a survival problem with right
+censoring at the data cutoff (as_of):
+
+- event: first valid income after the evaluation, on calendar day d
+  (datediff(day, ...), as in the fixed SQL), by the end of the as_of day
+- censored: no income by the end of the as_of day, observed through
+  datediff(day, evaluation, as_of); accounts followed for the whole horizon
+  are never censored
+
+For every (cohort month, statement group) the PIE accounts' events and
+censorings are binned by day with one bincount, and the survival curve is
+the cumulative product of (1 - events / at risk), events counted before
+censorings on the same day. With no censoring (a mature cohort) 1 - S(t) is
+exactly the collected share, so the curves equal the fixed SQL there and
+extend it to young cohorts. Month offsets past the longest follow-up (nobody
+left at risk) have no estimate (NaN).
+
+The output has the columns of pie_income_collection_over_time_fixed.sql
+(collected counts become estimates: PIE total x (1 - S)), plus COHORT_MONTH,
+Greenwood 95% bands (<RATE>_LOW / <RATE>_HIGH, as in bootstrap_ci.py),
+PIE_AT_RISK and FOLLOW_UP_COMPLETE, so the over-time charts draw it
+unchanged.
+
+Usage:
+    python survival_curves.py --month-start 2025-06-01 --month-end 2026-01-01 --as-of 2026-01-05
+
+    from survival_curves import load_survival_curves
+    df = load_survival_curves('2025-06-01', '2026-01-01', as_of='2026-01-05')
+"""
+
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from cohort_curves import DEFAULT_BUCKET_DAYS, DEFAULT_HORIZON_DAYS, FIXED_SQL, income_window, n_buckets, statement_label
+from cohort_matrix import GROUP_KEY_BASE, load_matrix_base
+from income_index import MICROS_PER_DAY, NO_INCOME, datediff_days, load_income_index, to_micros
+from query_params import defaults
+
+# Two-sided 95% normal quantile for the Greenwood bands
+Z_95 = 1.959964
+
+
+def survival_inputs(base, index, as_of, horizon_days=DEFAULT_HORIZON_DAYS):
+    """Per-account event and censoring days from base rows and an IncomeIndex
+
+    base has the columns of pie_base_populations_fixed.sql plus COHORT_MONTH
+    (cohort_matrix.base_populations_from_rows). Returns one row per cohort,
+    group and account with HAD_PIE, EVENT (income observed by as_of),
+    EVENT_DAY and CENSOR_DAY (NaN when not censored).
+    """
+    evaluated = to_micros(base['EVALUATED_TIMESTAMP'])
+    # The as_of day is observed in full: incomes up to its end count, and
+    # censored accounts stay at risk through it
+    as_of_day = to_micros([pd.Timestamp(as_of).normalize()])[0]
+    cutoff = as_of_day + MICROS_PER_DAY
+    had_pie = base['HAD_PIE'].to_numpy().astype(bool)
+    first = np.full(len(base), NO_INCOME, dtype=np.int64)
+    first[had_pie] = index.first_after(base['PERSON_ID'].to_numpy()[had_pie], evaluated[had_pie], horizon_days)
+
+    observed = (first != NO_INCOME) & (first < cutoff)
+    censored = ~observed & (evaluated + horizon_days * MICROS_PER_DAY >= cutoff)
+    # Evaluated after the as_of day: not at risk on any day
+    censor_day = np.maximum(datediff_days(evaluated, as_of_day), -1)
+
+    keys = ['COHORT_MONTH', 'STATEMENT_NUMBER', 'ACCOUNT_ID']
+    rows = pd.DataFrame({
+        **{key: base[key].to_numpy() for key in keys},
+        'HAD_PIE': had_pie.astype(np.int64),
+        'EVENT': observed.astype(np.int64),
+        'EVENT_DAY': np.where(observed, datediff_days(evaluated, first), np.nan),
+        'CENSOR_DAY': np.where(censored, censor_day, np.nan)
+    })
+    # Account-level groups have one row per account and person
+    return rows.groupby(keys, as_index=False).agg(
+        {'HAD_PIE': 'max', 'EVENT': 'max', 'EVENT_DAY': 'min', 'CENSOR_DAY': 'min'}
+    )
+
+
+def _round_pct(numerator, denominator):
+    """round(100.0 * n / d, 1), half away from zero, for non-negative float numerators; NaN where d = 0"""
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    safe = np.where(denominator > 0, denominator, 1)
+    return np.where(denominator > 0, np.floor((2000 * numerator + safe) / (2 * safe)) / 10.0, np.nan)
+
+
+def survival_curves(inputs, horizon_days=DEFAULT_HORIZON_DAYS, bucket_days=DEFAULT_BUCKET_DAYS):
+    """Kaplan-Meier curves of every cohort month and group, in the fixed SQL layout"""
+    keys = inputs['COHORT_MONTH'].to_numpy(dtype=np.int64) * GROUP_KEY_BASE + inputs['STATEMENT_NUMBER'].to_numpy(dtype=np.int64)
+    group_values, group_idx = np.unique(keys, return_inverse=True)
+    n_groups = len(group_values)
+    had_pie = inputs['HAD_PIE'].to_numpy().astype(bool)
+    event = inputs['EVENT'].to_numpy().astype(bool) & had_pie
+    event_day = inputs['EVENT_DAY'].to_numpy(dtype=np.float64)
+    censor_day = inputs['CENSOR_DAY'].to_numpy(dtype=np.float64)
+    censored = had_pie & ~event & ~np.isnan(censor_day)
+
+    total = np.bincount(group_idx, minlength=n_groups)
+    pie_total = np.bincount(group_idx[had_pie], minlength=n_groups)
+    width = horizon_days + 2
+
+    def by_day(mask, days):
+        # Column day + 1, so column 0 holds censorings before day 0
+        cells = group_idx[mask] * width + np.minimum(days[mask].astype(np.int64), horizon_days) + 1
+        return np.bincount(cells, minlength=n_groups * width).reshape(n_groups, width)
+
+    events = by_day(event, event_day)[:, 1:]
+    censors = by_day(censored, censor_day)
+    # At risk on day t: PIE accounts without an event or censoring before t
+    leaving = np.cumsum(events, axis=1) + np.cumsum(censors, axis=1)[:, 1:]
+    at_risk = pie_total[:, None] - np.hstack([np.cumsum(censors[:, :1], axis=1), leaving[:, :-1]])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        hazard = np.where(at_risk > 0, events / np.maximum(at_risk, 1), 0.0)
+        survival = np.cumprod(1 - hazard, axis=1)
+        greenwood = np.cumsum(np.where(at_risk > events, events / (at_risk * (at_risk - events)), 0.0), axis=1)
+    spread = Z_95 * survival * np.sqrt(greenwood)
+
+    buckets = n_buckets(horizon_days, bucket_days)
+    last_day = np.minimum((np.arange(buckets) + 1) * bucket_days - 1, horizon_days)
+    collected_share = 1 - survival[:, last_day]
+    low_share = np.clip(collected_share - spread[:, last_day], 0, 1)
+    high_share = np.clip(collected_share + spread[:, last_day], 0, 1)
+    censored_by = np.cumsum(censors, axis=1)[:, last_day + 1]
+    # Past the longest follow-up nobody is at risk and S(t) is undefined
+    undefined = (censored_by > 0) & (at_risk[:, last_day] == 0)
+    collected_share[undefined] = np.nan
+    low_share[undefined] = np.nan
+    high_share[undefined] = np.nan
+
+    approved = total - pie_total
+    pie_rows = np.repeat(pie_total, buckets)
+    total_rows = np.repeat(total, buckets)
+    approved_rows = np.repeat(approved, buckets)
+    collected = np.round(pie_total[:, None] * collected_share, 6)
+    collected_rows = collected.ravel()
+
+    groups = group_values % GROUP_KEY_BASE
+    curves = pd.DataFrame({
+        'COHORT_MONTH': pd.to_datetime(np.repeat(group_values // GROUP_KEY_BASE, buckets).astype('datetime64[M]')),
+        'STATEMENT_LABEL': [statement_label(int(g)) for g in np.repeat(groups, buckets)],
+        'STATEMENT_NUMBER': np.repeat(groups, buckets).astype(np.int64),
+        'MONTH_OFFSET': np.tile(np.arange(buckets, dtype=np.int64), n_groups),
+        'TOTAL_POPULATION': total_rows,
+        'APPROVED_OUTRIGHT_COUNT': approved_rows,
+        'PIE_TOTAL_COUNT': pie_rows,
+        'PIE_INCOME_COLLECTED_BY_MONTH': collected_rows,
+        'SUCCESS_COUNT': approved_rows + collected_rows,
+        'SUCCESS_RATE_PCT': _round_pct(approved_rows + collected_rows, total_rows),
+        'PIE_INCOME_COLLECTION_RATE_PCT': _round_pct(collected_rows, pie_rows),
+        'NEW_INCOME_COLLECTIONS_THIS_MONTH': np.diff(collected, axis=1, prepend=0).ravel(),
+        'SUCCESS_RATE_PCT_LOW': _round_pct(approved_rows + (pie_total[:, None] * low_share).ravel(), total_rows),
+        'SUCCESS_RATE_PCT_HIGH': _round_pct(approved_rows + (pie_total[:, None] * high_share).ravel(), total_rows),
+        'PIE_INCOME_COLLECTION_RATE_PCT_LOW': _round_pct((pie_total[:, None] * low_share).ravel(), pie_rows),
+        'PIE_INCOME_COLLECTION_RATE_PCT_HIGH': _round_pct((pie_total[:, None] * high_share).ravel(), pie_rows),
+        'PIE_AT_RISK': at_risk[:, last_day].ravel(),
+        'FOLLOW_UP_COMPLETE': (censored_by == 0).ravel()
+    })
+    return curves
+
+
+def load_survival_curves(month_start, month_end, as_of=None, params=None, refresh=False):
+    """Kaplan-Meier curves of every cohort month in [month_start, month_end), censored at as_of (default: today)"""
+    as_of = pd.Timestamp(as_of or datetime.date.today())
+    base, horizon_days, bucket_days = load_matrix_base(month_start, month_end, params, refresh)
+    if len(base) == 0:
+        return pd.DataFrame()
+
+    created_from, created_to = income_window([base], horizon_days)
+    # Through the end of the as_of day, which survival_inputs observes in full
+    index = load_income_index(created_from, min(created_to, as_of.normalize() + pd.Timedelta(days=1)), refresh=refresh)
+    return survival_curves(survival_inputs(base, index, as_of, horizon_days), horizon_days, bucket_days)
+
+
+def _cohort_settings(params):
+    """cohort_month, horizon_days and bucket_days: SQL header defaults overridden by params"""
+    with open(FIXED_SQL, 'r') as f:
+        settings = defaults(f.read())
+    settings.update({k: v for k, v in (params or {}).items() if v is not None})
+    return datetime.date.fromisoformat(str(settings['cohort_month'])), int(settings['horizon_days']), int(settings['bucket_days'])
+
+
+def cohort_is_mature(params=None, as_of=None):
+    """True once every month offset of the cohort has its full follow-up (see cohort_triangle.final_offsets)"""
+    from cohort_triangle import final_offsets
+
+    cohort_month, horizon_days, bucket_days = _cohort_settings(params)
+    as_of = as_of or datetime.date.today()
+    return final_offsets(cohort_month, as_of, horizon_days, bucket_days) == n_buckets(horizon_days, bucket_days)
+
+
+def km_success_curves(params=None, as_of=None, refresh=False):
+    """Kaplan-Meier curves of one cohort (params' cohort_month), in the fixed SQL layout"""
+    cohort_month, _, _ = _cohort_settings(params)
+    next_month = (cohort_month + datetime.timedelta(days=32)).replace(day=1)
+    curves = load_survival_curves(cohort_month, next_month, as_of, params, refresh)
+    return curves.drop(columns='COHORT_MONTH')
+
+
+def main():
+    """Print Kaplan-Meier collection rates of every cohort month at each month offset"""
+    from pipeline_args import build_parser, query_params_from_args
+    from snowflake_session import set_backend
+
+    parser = build_parser(description='Kaplan-Meier time-to-income curves censored at the data cutoff')
+    parser.add_argument('--month-start', default='2024-11-01', metavar='YYYY-MM-DD', help='First cohort month (default: 2024-11-01)')
+    parser.add_argument('--month-end', default='2026-01-01', metavar='YYYY-MM-DD', help='Month after the last cohort (default: 2026-01-01)')
+    parser.add_argument('--as-of', metavar='YYYY-MM-DD', help='Data cutoff (default: today)')
+    parser.add_argument('--group', type=int, default=999, help='Statement group to print (999 = Overall)')
+    parser.add_argument('--out', metavar='PATH', help='Write all curves to a Parquet file')
+    args = parser.parse_args()
+    if args.backend:
+        set_backend(args.backend)
+
+    df = load_survival_curves(args.month_start, args.month_end, args.as_of, query_params_from_args(args), refresh=args.refresh)
+    if len(df) == 0:
+        print("❌ No evaluation rows found")
+        return
+    print(f"✓ Kaplan-Meier curves for {df['COHORT_MONTH'].nunique()} cohorts as of {args.as_of or datetime.date.today()}\n")
+
+    group = df[df['STATEMENT_NUMBER'] == args.group].copy()
+    group['CELL'] = ['' if np.isnan(rate) else f"{rate:.1f}{'' if complete else '*'}"
+                     for rate, complete in zip(group['PIE_INCOME_COLLECTION_RATE_PCT'], group['FOLLOW_UP_COMPLETE'])]
+    table = group.pivot(index='COHORT_MONTH', columns='MONTH_OFFSET', values='CELL')
+    table.index = table.index.strftime('%Y-%m')
+    print(f"PIE_INCOME_COLLECTION_RATE_PCT ({statement_label(args.group)}; * = estimated with censoring):")
+    print(table.to_string())
+    if args.out:
+        df.to_parquet(args.out, compression='zstd', index=False)
+        print(f"\n✓ Saved to: {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+"""
+Synthetic CLIP / PIE Data Generator
+
+Generates realistic CLIP_RESULTS_DATA, account_statements,
+ACCOUNTS_CUSTOMERS_BRIDGE, CLIP_USER_INCOMES and the datamart's
+account_statements_clip at any size, in the snapshot layout duckdb_backend.py
+reads, so the pipeline can be load-tested offline:
+
+    python synthetic_data.py --evaluations 10000000 --seed 7 --out /tmp/pie_synthetic
+    PIE_SNAPSHOT_DIR=/tmp/pie_synthetic python run_multi_statement_analysis.py --backend duckdb
+
+Shapes reproduced:
+- Accounts opened over five years, one statement a month since opening;
+  CLIP evaluations every 4th statement (2, 6, ..., 18, 22, 26, ...)
+- account_statements_clip: the same statements with OPEN_IN_STATEMENT,
+  0 from the closing statement on for the accounts that closed
+- Outcome mix by statement: PIE is rare before Stmt 18 and common from
+  Stmt 18 on (income older than 12 months); PIE accounts that update income
+  quickly get a second, APPROVED evaluation for the same statement
+- Many-to-many bridge: persons can hold several accounts, some accounts have
+  a second person
+- Income arrival after PIE: a mix of fast responders (days) and a long tail
+  (months, past the 240-day horizon), plus routine income updates
+- CLIP_AMOUNT: the line increase at stake (eligible amount on PIE
+  evaluations, granted amount on APPROVED ones, 0 on declines)
+- DECISION_DATA JSON with fico_08, assigned_line_increase and
+  post_pie_evaluation
+
+Generation is vectorized per chunk of accounts and deterministic: the same
+seed and chunk size always produce the same files. Sizes are approximate
+(about EVALS_PER_ACCOUNT evaluations per account).
+"""
+
+import os
+import time
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+# Data ends here; accounts are opened over the MAX_AGE_MONTHS before it
+DATA_END_MONTH = np.datetime64('2026-01', 'M')
+MAX_AGE_MONTHS = 60
+
+# CLIP evaluates statements 2, 6, 10, ...
+EVAL_FIRST_STATEMENT = 2
+EVAL_EVERY_STATEMENTS = 4
+
+# Expected evaluations per account for account ages uniform in 1..MAX_AGE_MONTHS
+_ages = np.arange(1, MAX_AGE_MONTHS + 1)
+EVALS_PER_ACCOUNT = float(np.mean(np.maximum(0, (_ages - EVAL_FIRST_STATEMENT) // EVAL_EVERY_STATEMENTS + 1)))
+
+# Outcome probabilities (APPROVED, PRE_EVAL_APPROVED, DECLINED) before / from Stmt 18
+OUTCOMES = np.array(['APPROVED', 'PRE_EVAL_APPROVED', 'DECLINED'])
+OUTCOME_P_EARLY = [0.55, 0.05, 0.40]
+OUTCOME_P_STMT18 = [0.45, 0.30, 0.25]
+
+# Share of PIE evaluations followed by an income update, and the delay mix
+PIE_COLLECT_RATE = 0.40
+FAST_RESPONDER_SHARE = 0.55
+FAST_MEAN_DAYS = 4.0
+SLOW_MEDIAN_DAYS = 75.0
+SLOW_SIGMA = 0.9
+
+# PIE accounts re-evaluated as APPROVED when income arrives within this many days
+SAME_CYCLE_DAYS = 20
+SAME_CYCLE_REEVAL_RATE = 0.7
+
+# Persons per account and share of accounts with a second person
+PERSONS_PER_ACCOUNT = 0.92
+JOINT_ACCOUNT_RATE = 0.06
+
+# Routine (non-PIE) income updates per person over the data window
+ROUTINE_INCOMES_PER_PERSON = 2.0
+NULL_INCOME_RATE = 0.04
+CHANNELS = ['app', 'web', 'agent']
+
+LINE_INCREASES = np.array([100, 200, 300, 500, 1000])
+
+# Share of accounts closed at some statement (OPEN_IN_STATEMENT = 0 from then on)
+CLOSED_ACCOUNT_RATE = 0.08
+
+DEFAULT_CHUNK_ACCOUNTS = 250_000
+
+
+def _seconds(rng, n, high):
+    return rng.integers(0, high, n).astype('timedelta64[s]')
+
+
+def _decision_data(fico, line_increase, post_pie):
+    """DECISION_DATA JSON strings, built column-wise"""
+    line_text = pc.if_else(pa.array(line_increase > 0), pa.array(line_increase).cast(pa.string()), 'null')
+    post_text = pc.if_else(pa.array(post_pie), 'true', 'false')
+    return pc.binary_join_element_wise(
+        '{"fico_08": ', pa.array(fico).cast(pa.string()),
+        ', "assigned_line_increase": ', line_text,
+        ', "post_pie_evaluation": ', post_text, '}',
+        ''
+    )
+
+
+def generate_chunk(seed, chunk, n_accounts, first_account):
+    """Generate the five tables for one chunk of accounts as Arrow tables"""
+    rng = np.random.default_rng([seed, chunk])
+    n = n_accounts
+
+    # Accounts: opening month, statement day and age (= statements so far)
+    age = rng.integers(1, MAX_AGE_MONTHS + 1, n)
+    open_month = DATA_END_MONTH - age
+    cycle_day = rng.integers(0, 28, n).astype('timedelta64[D]')
+    account_id = first_account + np.arange(n, dtype=np.int64)
+    fico_base = np.clip(rng.normal(700, 55, n), 300, 850)
+
+    # Statements: one per month since opening
+    acc = np.repeat(np.arange(n), age)
+    stmt_num = (np.arange(len(acc)) - np.repeat(np.cumsum(age) - age, age) + 1).astype(np.int32)
+    stmt_end = (open_month[acc] + stmt_num).astype('datetime64[D]') + cycle_day[acc]
+    statements = pa.table({
+        'ACCOUNT_ID': account_id[acc],
+        'STATEMENT_NUM': stmt_num,
+        'STATEMENT_END_DT': stmt_end
+    })
+
+    # Evaluations on every EVAL_EVERY_STATEMENTS-th statement
+    is_eval = (stmt_num >= EVAL_FIRST_STATEMENT) & ((stmt_num - EVAL_FIRST_STATEMENT) % EVAL_EVERY_STATEMENTS == 0)
+    e_acc, e_stmt, e_end = acc[is_eval], stmt_num[is_eval], stmt_end[is_eval]
+    m = len(e_acc)
+    evaluated_at = e_end.astype('datetime64[s]') + np.timedelta64(1, 'D') + _seconds(rng, m, 2 * 86400)
+
+    u = rng.random(m)
+    late = e_stmt >= 18
+    p_approved = np.where(late, OUTCOME_P_STMT18[0], OUTCOME_P_EARLY[0])
+    p_pie = np.where(late, OUTCOME_P_STMT18[1], OUTCOME_P_EARLY[1])
+    outcome_idx = np.where(u < p_approved, 0, np.where(u < p_approved + p_pie, 1, 2))
+
+    # Persons: a primary person per account (drawn with repeats -> shared persons),
+    # plus a second person on joint accounts
+    n_persons = max(1, int(n * PERSONS_PER_ACCOUNT))
+    first_person = 10 * first_account + 1_000_000_000
+    primary = first_person + rng.integers(0, n_persons, n)
+    joint = np.flatnonzero(rng.random(n) < JOINT_ACCOUNT_RATE)
+    bridge = pa.table({
+        'ACCOUNT_ID': np.concatenate([account_id, account_id[joint]]),
+        'PERSON_ID': np.concatenate([primary, first_person + rng.integers(0, n_persons, len(joint))])
+    })
+
+    # Income updates after PIE: fast responders and a lognormal long tail
+    pie = np.flatnonzero(outcome_idx == 1)
+    collected = pie[rng.random(len(pie)) < PIE_COLLECT_RATE]
+    k = len(collected)
+    fast = rng.random(k) < FAST_RESPONDER_SHARE
+    delay_days = np.where(fast, rng.exponential(FAST_MEAN_DAYS, k),
+                          rng.lognormal(np.log(SLOW_MEDIAN_DAYS), SLOW_SIGMA, k))
+    income_at = evaluated_at[collected] + (delay_days * 86400).astype('timedelta64[s]') + np.timedelta64(60, 's')
+
+    # Quick responders are re-evaluated as APPROVED in the same cycle
+    same_cycle = (delay_days < SAME_CYCLE_DAYS) & (rng.random(k) < SAME_CYCLE_REEVAL_RATE)
+    reeval = collected[same_cycle]
+    reeval_at = income_at[same_cycle] + np.timedelta64(1, 'D')
+
+    rows = np.concatenate([np.arange(m), reeval])
+    r_outcome = np.concatenate([outcome_idx, np.zeros(len(reeval), dtype=outcome_idx.dtype)])
+    r_at = np.concatenate([evaluated_at, reeval_at])
+    r_post_pie = np.concatenate([np.zeros(m, dtype=bool), np.ones(len(reeval), dtype=bool)])
+    fico = np.clip(np.round(fico_base[e_acc[rows]] + rng.normal(0, 8, len(rows))), 300, 850).astype(np.int32)
+    clip_amount = np.where(r_outcome == 2, 0, LINE_INCREASES[rng.integers(0, len(LINE_INCREASES), len(rows))])
+    line_increase = np.where(r_outcome == 0, clip_amount, 0)
+
+    order = np.lexsort((r_at, e_stmt[rows], e_acc[rows]))
+    clip = pa.table({
+        'ACCOUNT_ID': account_id[e_acc[rows]][order],
+        'STATEMENT_NUMBER': e_stmt[rows][order],
+        'OUTCOME': pa.DictionaryArray.from_arrays(r_outcome[order].astype(np.int8), pa.array(OUTCOMES.tolist())),
+        'EVALUATED_TIMESTAMP': r_at[order],
+        'CLIP_AMOUNT': clip_amount[order].astype(np.float64),
+        'DECISION_DATA': _decision_data(fico, line_increase, r_post_pie).take(pa.array(order))
+    })
+
+    # Routine income updates spread over each person's window
+    data_start = (DATA_END_MONTH - MAX_AGE_MONTHS).astype('datetime64[s]')
+    window = int((DATA_END_MONTH.astype('datetime64[s]') - data_start) / np.timedelta64(1, 's'))
+    routine_persons = first_person + np.repeat(np.arange(n_persons), rng.poisson(ROUTINE_INCOMES_PER_PERSON, n_persons))
+    routine_at = data_start + _seconds(rng, len(routine_persons), window)
+
+    inc_person = np.concatenate([primary[e_acc[collected]], routine_persons])
+    inc_at = np.concatenate([income_at, routine_at])
+    keep = inc_at < DATA_END_MONTH.astype('datetime64[s]')
+    inc_person, inc_at = inc_person[keep], inc_at[keep]
+    q = len(inc_person)
+    annual_income = np.round(rng.lognormal(np.log(55_000), 0.5, q), -2)
+    annual_income[rng.random(q) < NULL_INCOME_RATE] = np.nan
+    incomes = pa.table({
+        'PERSON_ID': inc_person,
+        'CREATED_AT': inc_at,
+        'ANNUAL_INCOME': annual_income,
+        'CHANNEL': pa.DictionaryArray.from_arrays(rng.integers(0, len(CHANNELS), q).astype(np.int8), pa.array(CHANNELS))
+    })
+
+    # Datamart statements: drawn last so the tables above do not depend on it
+    closed = rng.random(n) < CLOSED_ACCOUNT_RATE
+    closed_at = np.where(closed, rng.integers(1, age + 1), age + 1)
+    statements_clip = pa.table({
+        'ACCOUNT_ID': account_id[acc],
+        'STATEMENT_NUMBER': stmt_num,
+        'STATEMENT_END_DT': stmt_end,
+        'OPEN_IN_STATEMENT': (stmt_num < closed_at[acc]).astype(np.int8)
+    })
+
+    return {
+        'ACCOUNT_STATEMENTS': statements,
+        'CLIP_RESULTS_DATA': clip,
+        'ACCOUNTS_CUSTOMERS_BRIDGE': bridge,
+        'CLIP_USER_INCOMES': incomes,
+        'ACCOUNT_STATEMENTS_CLIP': statements_clip
+    }
+
+
+def generate(out_dir, evaluations, seed=0, chunk_accounts=DEFAULT_CHUNK_ACCOUNTS):
+    """Write about `evaluations` CLIP evaluations (and matching tables) to out_dir"""
+    n_accounts = max(1, int(round(evaluations / EVALS_PER_ACCOUNT)))
+    n_chunks = (n_accounts + chunk_accounts - 1) // chunk_accounts
+    totals = {}
+    for chunk in range(n_chunks):
+        first_account = chunk * chunk_accounts
+        size = min(chunk_accounts, n_accounts - first_account)
+        started = time.perf_counter()
+        tables = generate_chunk(seed, chunk, size, first_account)
+        for name, table in tables.items():
+            os.makedirs(os.path.join(out_dir, name), exist_ok=True)
+            pq.write_table(table, os.path.join(out_dir, name, f'part-{chunk:05d}.parquet'), compression='zstd')
+            totals[name] = totals.get(name, 0) + table.num_rows
+        print(f"  ✓ chunk {chunk + 1}/{n_chunks}: {size:,} accounts, "
+              f"{tables['CLIP_RESULTS_DATA'].num_rows:,} evaluations ({time.perf_counter() - started:.1f}s)")
+    return totals
+
+
+def main():
+    """Generate a synthetic snapshot directory"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Generate synthetic CLIP/PIE tables for load testing')
+    parser.add_argument('--evaluations', type=int, default=1_000_000, help='Approximate CLIP evaluations to generate')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (same seed -> same data)')
+    parser.add_argument('--out', required=True, metavar='DIR', help='Output snapshot directory')
+    parser.add_argument('--chunk-accounts', type=int, default=DEFAULT_CHUNK_ACCOUNTS, metavar='N',
+                        help='Accounts generated per chunk (bounds memory; part of the seed)')
+    args = parser.parse_args()
+
+    print(f"Generating ~{args.evaluations:,} evaluations (seed {args.seed}) to {args.out}...")
+    totals = generate(args.out, args.evaluations, args.seed, args.chunk_accounts)
+    for name, rows in totals.items():
+        print(f"  {name}: {rows:,} rows")
+
+
+if __name__ == '__main__':
+    main()
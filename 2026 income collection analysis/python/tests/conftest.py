@@ -0,0 +1,61 @@
+"""
+Shared test setup
+
+Tests import the flat modules in python/ directly. Tests that run SQL ask for
+the synthetic_backend fixture: the sql/ files run unchanged on DuckDB over a
+small synthetic_data.py snapshot, with the query cache in a temporary
+directory.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Small enough to generate in about a second, large enough for every statement group
+EVALUATIONS = 100_000
+SEED = 0
+
+
+def use_snapshots(snapshot_dir):
+    """Point the DuckDB backend at a snapshot directory and reopen its sessions"""
+    import duckdb_backend
+    from snowflake_session import set_backend
+
+    duckdb_backend.SNAPSHOT_DIR = snapshot_dir
+    set_backend('duckdb')
+
+
+@pytest.fixture(scope='session')
+def synthetic_dir(tmp_path_factory):
+    """Synthetic snapshot directory, generated once per session"""
+    from synthetic_data import generate
+
+    out_dir = str(tmp_path_factory.mktemp('synthetic'))
+    generate(out_dir, EVALUATIONS, seed=SEED)
+    return out_dir
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """Empty query cache for one test"""
+    import query_cache
+
+    path = str(tmp_path / 'cache')
+    monkeypatch.setattr(query_cache, 'CACHE_DIR', path)
+    return path
+
+
+@pytest.fixture
+def synthetic_backend(synthetic_dir, cache_dir, monkeypatch):
+    """DuckDB over the synthetic snapshot, with an empty query cache"""
+    pytest.importorskip('duckdb')
+    import duckdb_backend
+    import snowflake_session
+
+    monkeypatch.setattr(duckdb_backend, 'SNAPSHOT_DIR', duckdb_backend.SNAPSHOT_DIR)
+    use_snapshots(synthetic_dir)
+    yield synthetic_dir
+    snowflake_session.close_all()
@@ -0,0 +1,119 @@
+"""
+account_state.py: compact arrays, gathers, curves and the PIE-priority dedup against the SQL
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from account_state import AccountState, load_account_state
+from cohort_curves import FIXED_SQL
+from query_cache import cached_query
+
+COHORT_MONTH = '2025-04-01'
+STATEMENTS = [18, 26, 34, 42]
+
+
+def small_state():
+    """Three accounts, two persons: rows of (account id, person id, outcome, statement, days to income)"""
+    rows = [(301, 7, 1, 18, 5), (301, 7, 0, 26, -1), (205, 9, 1, 18, -1), (410, 9, 1, 26, 40)]
+    account_ids, account = np.unique([r[0] for r in rows], return_inverse=True)
+    person_ids, person = np.unique([r[1] for r in rows], return_inverse=True)
+    return AccountState(
+        account.astype(np.int32), person.astype(np.int32),
+        np.array([r[2] for r in rows], dtype=np.int8), np.array([r[3] for r in rows], dtype=np.int16),
+        np.full(len(rows), 663, dtype=np.int16), np.array([20180, 20190, 20185, 20200], dtype=np.int32),
+        np.array([r[4] for r in rows], dtype=np.int16), account_ids, person_ids
+    )
+
+
+def test_filters_and_per_account_reductions():
+    state = small_state()
+    assert state.nbytes == 19 * len(state)
+    assert state.pie.tolist() == [True, False, True, True]
+    assert state.collected.tolist() == [True, False, False, True]
+
+    stmt_26 = state.statements([26])
+    assert stmt_26.account_ids is state.account_ids and len(stmt_26) == 2
+    assert state.account_index([410, 999, 205]).tolist() == [2, -1, 0]
+    assert state.account_had_pie().tolist() == [True, True, True]
+    assert stmt_26.account_had_pie().tolist() == [False, False, True]
+    assert state.earliest_eval_day().tolist() == [20185, 20180, 20200]
+    assert state.per_account(state.days_to_income, reduce='max', empty=-1).tolist() == [-1, 5, 40]
+
+
+def test_joins_gather_onto_rows():
+    state = small_state()
+    assert state.join_accounts(np.array([10, 20, 30])).tolist() == [20, 20, 10, 30]
+    # Persons keyed by original id; person 9 has no value
+    assert state.join_persons([3, 7], np.array([1.5, 2.5]), missing=np.nan).tolist()[:2] == [2.5, 2.5]
+    assert np.isnan(state.join_persons([3, 7], np.array([1.5, 2.5]), missing=np.nan)[2:]).all()
+    assert state.join_persons([], np.array([], dtype=np.int64)).tolist() == [0, 0, 0, 0]
+
+
+def test_save_load_and_frame(tmp_path):
+    state = small_state()
+    path = str(tmp_path / 'state.npz')
+    state.save(path)
+    loaded = AccountState.load(path)
+    pd.testing.assert_frame_equal(loaded.to_frame(), state.to_frame())
+
+    df = state.to_frame()
+    assert df['ACCOUNT_ID'].tolist() == [301, 301, 205, 410]
+    assert df['OUTCOME'].astype(str).tolist() == ['PRE_EVAL_APPROVED', 'APPROVED', 'PRE_EVAL_APPROVED', 'PRE_EVAL_APPROVED']
+    assert str(df['COHORT_MONTH'].iloc[0])[:7] == '2025-04'
+    assert df['DAYS_TO_COLLECTION'].isna().tolist() == [False, True, True, False]
+
+
+@pytest.mark.usefixtures('synthetic_backend')
+def test_state_curves_match_fixed_sql():
+    params = {'cohort_month': COHORT_MONTH}
+    state = load_account_state(params, batch_size=500)
+    assert len(state) > 0 and state.nbytes == 19 * len(state)
+    assert (state.statement >= 18).all() and (state.cohort == np.datetime64('2025-04', 'M').astype(np.int16)).all()
+
+    with open(FIXED_SQL, 'r') as f:
+        expected = cached_query(f.read(), params)
+    expected = expected[expected['STATEMENT_NUMBER'].isin(STATEMENTS)]
+    expected = expected.sort_values(['STATEMENT_NUMBER', 'MONTH_OFFSET']).reset_index(drop=True)
+    curves = state.statements(STATEMENTS).curves().sort_values(['STATEMENT_NUMBER', 'MONTH_OFFSET'])
+    pd.testing.assert_frame_equal(curves.reset_index(drop=True)[list(expected.columns)], expected, check_dtype=False)
+
+
+def test_dedup_prefers_pie_then_lowest_person():
+    # (account, person, outcome, statement, cohort); outcome 1 = PIE
+    rows = np.array([
+        (1, 5, 0, 18, 663), (1, 6, 1, 18, 663), (1, 4, 0, 18, 663),   # PIE wins over a lower person
+        (2, 8, 0, 18, 663), (2, 3, 0, 18, 663),                       # lowest person
+        (2, 3, 0, 22, 663), (2, 3, 0, 22, 663),                       # exact tie keeps the first row
+        (2, 8, 1, 18, 664)                                            # another cohort month is its own group
+    ])
+    n = len(rows)
+    state = AccountState(
+        rows[:, 0].astype(np.int32), rows[:, 1].astype(np.int32), rows[:, 2].astype(np.int8),
+        rows[:, 3].astype(np.int16), rows[:, 4].astype(np.int16), np.arange(n, dtype=np.int32),
+        np.full(n, -1, dtype=np.int16), np.arange(3), np.arange(10)
+    )
+    kept = state.dedup()
+    assert kept.eval_day.tolist() == [1, 4, 5, 7]
+    assert kept.pie.tolist() == [True, False, False, True]
+    assert len(state.where(np.zeros(n, dtype=bool)).dedup()) == 0
+
+
+@pytest.mark.usefixtures('synthetic_backend')
+def test_dedup_matches_base_population():
+    from account_state import load_account_rows
+
+    rows = load_account_rows('2025-04-01', '2025-06-01', batch_size=500)
+    deduped = rows.dedup()
+    assert len(deduped) < len(rows)
+
+    key = ['COHORT_MONTH', 'ACCOUNT_ID', 'STATEMENT_NUMBER']
+    for month in ['2025-04-01', '2025-05-01']:
+        expected = load_account_state({'cohort_month': month}).to_frame()
+        df = deduped.cohorts([month]).to_frame()
+        # Rows tied on outcome and person may differ in evaluation time only
+        columns = key + ['PERSON_ID', 'OUTCOME']
+        df = df[columns].sort_values(key).reset_index(drop=True)
+        expected = expected[columns].sort_values(key).reset_index(drop=True)
+        pd.testing.assert_frame_equal(df, expected, check_dtype=False)
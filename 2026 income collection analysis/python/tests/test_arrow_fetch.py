@@ -0,0 +1,67 @@
+"""
+arrow_fetch.py: compact dtypes from Arrow results and the fetchall() fallback
+"""
+
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from arrow_fetch import arrow_to_frame, compact_dtypes, fetch_frame
+
+
+class ArrowCursor:
+    """Cursor stub with a Snowflake-like Arrow path"""
+
+    def __init__(self, table, names):
+        self.table = table
+        self.description = [(name,) for name in names]
+
+    def fetch_arrow_all(self):
+        return self.table
+
+
+def test_numbers_are_compacted():
+    table = pa.table({
+        'month_offset': pa.array([Decimal(0), Decimal(7)], pa.decimal128(38, 0)),
+        'account_id': pa.array([Decimal(1), Decimal(2**40)], pa.decimal128(38, 0)),
+        'rate_pct': pa.array([Decimal('12.5'), Decimal('99.9')], pa.decimal128(38, 1)),
+        'with_null': pa.array([Decimal(1), None], pa.decimal128(38, 0)),
+        'evaluated_at': pa.array([0, 86_400_000_000], pa.timestamp('us'))
+    })
+    df = arrow_to_frame(table)
+
+    assert list(df.columns) == ['MONTH_OFFSET', 'ACCOUNT_ID', 'RATE_PCT', 'WITH_NULL', 'EVALUATED_AT']
+    assert df['MONTH_OFFSET'].dtype == np.int32
+    assert df['ACCOUNT_ID'].dtype == np.int64 and df['ACCOUNT_ID'].iloc[1] == 2**40
+    assert df['RATE_PCT'].dtype == np.float64 and df['RATE_PCT'].tolist() == [12.5, 99.9]
+    assert df['WITH_NULL'].dtype == np.float64 and np.isnan(df['WITH_NULL'].iloc[1])
+    assert pd.api.types.is_datetime64_any_dtype(df['EVALUATED_AT'])
+
+
+def test_fetchall_fallback_compacts_decimals():
+    df = compact_dtypes(pd.DataFrame({
+        'N': [Decimal(1), Decimal(2)],
+        'PCT': [Decimal('1.5'), Decimal(2)],
+        'LABEL': ['Stmt 18', 'Stmt 26'],
+        'BIG': np.array([1, 2], dtype=np.int64)
+    }))
+    assert df['N'].dtype == np.int32
+    assert df['PCT'].dtype == np.float64
+    assert df['LABEL'].tolist() == ['Stmt 18', 'Stmt 26']
+    assert df['BIG'].dtype == np.int32
+
+
+def test_empty_snowflake_result_keeps_columns():
+    df = fetch_frame(ArrowCursor(None, ['statement_number', 'month_offset']))
+    assert list(df.columns) == ['STATEMENT_NUMBER', 'MONTH_OFFSET'] and len(df) == 0
+
+
+def test_run_query_without_arrow_path():
+    from snowflake_session import run_query, set_backend
+
+    set_backend('local')
+    df = run_query('select 18 as statement_number, 12.5 as rate_pct, :label as label', {'label': 'Stmt 18'})
+    assert df.to_dict('records') == [{'STATEMENT_NUMBER': 18, 'RATE_PCT': 12.5, 'LABEL': 'Stmt 18'}]
+    assert df['STATEMENT_NUMBER'].dtype == np.int32
@@ -0,0 +1,121 @@
+"""
+async_queries.py: concurrent submission, order of results and cancellation
+"""
+
+import time
+
+import pyarrow as pa
+import pytest
+
+import async_queries
+import snowflake_session
+from async_queries import run_queries
+
+QUERY = 'select :n as n'
+
+
+class FakeSnowflakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.description = [('N',)]
+
+    def execute_async(self, sql, values):
+        assert sql == 'select :1 as n'
+        self.sfqid = f'q{len(self.conn.submitted)}'
+        self.conn.submitted.append(self.sfqid)
+        self.conn.running[self.sfqid] = values[0]
+        self.conn.peak = max(self.conn.peak, len(self.conn.running))
+
+    def get_results_from_sfqid(self, query_id):
+        self.result = self.conn.running.pop(query_id)
+
+    def fetch_arrow_all(self):
+        return pa.table({'N': pa.array([self.result], pa.int64())})
+
+    def execute(self, sql):
+        self.conn.cancelled.append(sql)
+
+    def close(self):
+        pass
+
+
+class FakeSnowflakeConnection:
+    """Async API of the Snowflake connector; queries finish in reverse order of submission"""
+
+    def __init__(self, fail_on=None):
+        self.submitted, self.cancelled = [], []
+        self.running = {}
+        self.peak = 0
+        self.polls = 0
+        self.fail_on = fail_on
+
+    def cursor(self):
+        return FakeSnowflakeCursor(self)
+
+    def get_query_status_throw_if_error(self, query_id):
+        if self.running.get(query_id) == self.fail_on:
+            raise RuntimeError(f'{query_id} failed')
+        self.polls += 1
+        return query_id == max(self.running)
+
+    def is_still_running(self, finished):
+        return not finished
+
+    def is_closed(self):
+        return False
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_snowflake(monkeypatch):
+    holder = {}
+
+    def connect():
+        holder['conn'] = FakeSnowflakeConnection(holder.get('fail_on'))
+        return holder['conn']
+
+    monkeypatch.setitem(snowflake_session.BACKENDS, 'fake_snowflake', connect)
+    monkeypatch.setitem(snowflake_session.PARAMSTYLES, 'fake_snowflake', 'numeric')
+    monkeypatch.setattr(async_queries, 'POLL_INTERVAL_SECONDS', 0)
+    snowflake_session.set_backend('fake_snowflake')
+    return holder
+
+
+def test_async_submission_keeps_order_and_bounds_in_flight(fake_snowflake):
+    frames = run_queries([(QUERY, {'n': n}) for n in range(7)], max_concurrent=3)
+    conn = fake_snowflake['conn']
+    assert [int(df['N'].iloc[0]) for df in frames] == list(range(7))
+    assert len(conn.submitted) == 7 and conn.peak == 3
+    assert conn.cancelled == []
+
+
+def test_async_failure_cancels_running_queries(fake_snowflake):
+    fake_snowflake['fail_on'] = 1
+    with pytest.raises(RuntimeError, match='q1 failed'):
+        run_queries([(QUERY, {'n': n}) for n in range(4)], max_concurrent=4)
+    cancelled = [sql for sql in fake_snowflake['conn'].cancelled if 'system$cancel_query' in sql]
+    assert cancelled == [f"select system$cancel_query('q{i}')" for i in range(4)]
+
+
+def test_threaded_backends_overlap_queries(monkeypatch):
+    monkeypatch.setattr(snowflake_session, 'LOCAL_LATENCY_SECONDS', 0.2)
+    snowflake_session.set_backend('local')
+    queries = [(QUERY, {'n': n}) for n in range(4)]
+
+    started = time.perf_counter()
+    frames = run_queries(queries, max_concurrent=4)
+    concurrent = time.perf_counter() - started
+    started = time.perf_counter()
+    serial = run_queries(queries, max_concurrent=1)
+    serial_seconds = time.perf_counter() - started
+
+    assert [int(df['N'].iloc[0]) for df in frames] == [int(df['N'].iloc[0]) for df in serial] == [0, 1, 2, 3]
+    assert serial_seconds >= 0.8 and concurrent < serial_seconds / 2
+
+
+def test_plain_strings_are_accepted():
+    snowflake_session.set_backend('local')
+    assert run_queries([]) == []
+    assert [int(df['N'].iloc[0]) for df in run_queries(['select 1 as n', 'select 2 as n'])] == [1, 2]
@@ -0,0 +1,80 @@
+"""
+batched_extract.py: fixed-size batches and the streamed Parquet extract
+"""
+
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+import batched_extract
+from batched_extract import extract_to_parquet, iter_frames, iter_record_batches
+
+# 0 .. 9 on the sqlite3 stand-in
+TEN_ROWS = 'with recursive r(x) as (select 0 union all select x + 1 from r where x < 9) select x as n from r'
+
+
+class ChunkedCursor:
+    """Cursor stub delivering Arrow chunks of uneven size and integer width"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def fetch_arrow_batches(self):
+        yield from self.chunks
+
+
+@pytest.fixture(autouse=True)
+def local_backend():
+    from snowflake_session import set_backend
+
+    set_backend('local')
+
+
+def test_batches_are_rechunked_to_one_schema():
+    chunks = [
+        pa.table({'N': pa.array(range(0, 3), pa.int8())}),
+        pa.table({'N': pa.array(range(3, 10), pa.int32())}),
+        pa.table({'N': pa.array([10], pa.int16())})
+    ]
+    batches = list(iter_record_batches(ChunkedCursor(chunks), batch_size=4))
+    assert [b.num_rows for b in batches] == [4, 4, 3]
+    assert {b.schema.field('N').type for b in batches} == {pa.int64()}
+    assert pa.concat_tables(batches)['N'].to_pylist() == list(range(11))
+
+
+def test_fetchmany_fallback():
+    frames = list(iter_frames(TEN_ROWS, batch_size=4))
+    assert [len(df) for df in frames] == [4, 4, 2]
+    assert [n for df in frames for n in df['N']] == list(range(10))
+
+
+def test_extract_writes_one_row_group_per_batch(tmp_path):
+    path = str(tmp_path / 'out.parquet')
+    assert extract_to_parquet(TEN_ROWS, path, batch_size=3) == 10
+    assert pq.ParquetFile(path).metadata.num_row_groups == 4
+    assert pq.read_table(path)['N'].to_pylist() == list(range(10))
+    assert os.listdir(tmp_path) == ['out.parquet']
+
+
+def test_empty_result_keeps_columns(tmp_path):
+    path = str(tmp_path / 'empty.parquet')
+    assert extract_to_parquet(TEN_ROWS + ' where n > 99', path) == 0
+    assert pq.read_table(path).column_names == ['N']
+
+
+def test_failed_extract_leaves_no_file(tmp_path, monkeypatch):
+    def failing_batches(cur, batch_size):
+        yield pa.table({'N': pa.array([1, 2], pa.int64())})
+        raise RuntimeError('connection lost')
+
+    path = str(tmp_path / 'out.parquet')
+    monkeypatch.setattr(batched_extract, 'iter_record_batches', failing_batches)
+    with pytest.raises(RuntimeError):
+        extract_to_parquet(TEN_ROWS, path)
+    assert os.listdir(tmp_path) == []
+
+    with pytest.raises(Exception):
+        extract_to_parquet('select * from missing_table', path)
+    assert os.listdir(tmp_path) == []
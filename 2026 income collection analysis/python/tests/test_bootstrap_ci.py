@@ -0,0 +1,58 @@
+"""
+bootstrap_ci.py: category counts, reproducible bands and coverage of the point estimates
+"""
+
+import pandas as pd
+import pytest
+
+from bootstrap_ci import add_confidence_bands, bootstrap_bands, category_counts
+
+
+def small_curves():
+    """Two statements x three offsets: 10 accounts (4 approved, 6 PIE) and 5 (5 approved)"""
+    return pd.DataFrame({
+        'STATEMENT_NUMBER': [18] * 3 + [26] * 3,
+        'MONTH_OFFSET': [0, 1, 2] * 2,
+        'TOTAL_POPULATION': [10] * 3 + [5] * 3,
+        'APPROVED_OUTRIGHT_COUNT': [4] * 3 + [5] * 3,
+        'PIE_TOTAL_COUNT': [6] * 3 + [0] * 3,
+        'NEW_INCOME_COLLECTIONS_THIS_MONTH': [2, 1, 0, 0, 0, 0],
+        'SUCCESS_RATE_PCT': [60.0, 70.0, 70.0, 100.0, 100.0, 100.0],
+        'PIE_INCOME_COLLECTION_RATE_PCT': [33.3, 50.0, 50.0, float('nan'), float('nan'), float('nan')]
+    })
+
+
+def test_category_counts():
+    keys, totals, counts = category_counts(small_curves().sample(frac=1, random_state=0))
+    assert keys['STATEMENT_NUMBER'].tolist() == [18, 26]
+    assert totals.tolist() == [10, 5]
+    assert counts.tolist() == [[4, 2, 1, 0, 3], [5, 0, 0, 0, 0]]
+
+    curves = small_curves()
+    curves['PIE_TOTAL_COUNT'] = 7
+    with pytest.raises(ValueError):
+        category_counts(curves)
+
+
+def test_bands_are_reproducible():
+    in_process = bootstrap_bands(small_curves(), replicates=6000, seed=3)
+    pooled = bootstrap_bands(small_curves(), replicates=6000, seed=3, workers=2)
+    pd.testing.assert_frame_equal(in_process, pooled)
+
+    # A group without PIE accounts has no collection band and a degenerate success band
+    no_pie = in_process[in_process['STATEMENT_NUMBER'] == 26]
+    assert no_pie['PIE_INCOME_COLLECTION_RATE_PCT_LOW'].isna().all()
+    assert (no_pie['SUCCESS_RATE_PCT_LOW'] == 100.0).all() and (no_pie['SUCCESS_RATE_PCT_HIGH'] == 100.0).all()
+
+
+@pytest.mark.usefixtures('synthetic_backend')
+def test_bands_contain_point_estimates():
+    from cohort_curves import fixed_success_curves
+
+    curves = fixed_success_curves({'cohort_month': '2025-04-01'})
+    df = add_confidence_bands(curves, replicates=2000)
+    assert len(df) == len(curves) > 0
+    assert df['STATEMENT_NUMBER'].tolist() == curves['STATEMENT_NUMBER'].tolist()
+    for rate in ['SUCCESS_RATE_PCT', 'PIE_INCOME_COLLECTION_RATE_PCT']:
+        assert (df[f'{rate}_LOW'] <= df[rate]).all() and (df[rate] <= df[f'{rate}_HIGH']).all()
+        assert (df[f'{rate}_LOW'] < df[f'{rate}_HIGH']).any()
@@ -0,0 +1,77 @@
+"""
+cohort_triangle.py: final cells, diagonal-append refresh and settings checks
+"""
+
+import datetime
+
+import pandas as pd
+import pytest
+
+from cohort_curves import fixed_success_curves
+from cohort_triangle import final_offsets, load_manifest, load_triangle, refresh_triangle
+
+PARAMS = {'horizon_days': 90, 'bucket_days': 30}
+
+
+def test_final_offsets():
+    month = datetime.date(2025, 4, 1)
+    # Evaluations settle EVAL_SLACK_DAYS after the month: 2025-06-01
+    assert final_offsets(month, datetime.date(2025, 5, 31), 90, 30) == -1
+    assert final_offsets(month, datetime.date(2025, 6, 1), 90, 30) == 0
+    assert final_offsets(month, datetime.date(2025, 7, 1), 90, 30) == 1
+    assert final_offsets(month, datetime.date(2025, 8, 29), 90, 30) == 2
+    assert final_offsets(month, datetime.date(2025, 8, 30), 90, 30) == 3
+    assert final_offsets(month, datetime.date(2027, 1, 1), 90, 30) == 3
+    # A partial last bucket is final once the horizon is reached
+    assert final_offsets(month, datetime.date(2025, 8, 30), 90, 60) == 2
+
+
+def cohort_cells(cells, label):
+    cohort = cells[cells['COHORT_MONTH'] == pd.Timestamp(label)]
+    return cohort.drop(columns='COHORT_MONTH').reset_index(drop=True)
+
+
+def expected_cells(label, offsets):
+    curves = fixed_success_curves({**PARAMS, 'cohort_month': label + '-01'})
+    curves = curves[curves['MONTH_OFFSET'] < offsets]
+    return curves.sort_values(['STATEMENT_NUMBER', 'MONTH_OFFSET']).reset_index(drop=True)
+
+
+@pytest.mark.usefixtures('synthetic_backend')
+def test_refresh_appends_only_new_cells(tmp_path):
+    triangle_dir = str(tmp_path / 'triangle')
+    with pytest.raises(ValueError, match='--start'):
+        refresh_triangle(params=PARAMS, as_of=datetime.date(2025, 7, 15), triangle_dir=triangle_dir)
+
+    # 2025-04 has one final offset; 2025-05 and later none yet
+    assert refresh_triangle('2025-04', PARAMS, datetime.date(2025, 7, 15), triangle_dir) == ['2025-04']
+    first = load_triangle(triangle_dir)
+    assert load_manifest(triangle_dir)['cohorts'] == {'2025-04': 1}
+
+    # Two months later: the next diagonal, plus the cohorts that became final
+    assert refresh_triangle(params=PARAMS, as_of=datetime.date(2025, 9, 15),
+                            triangle_dir=triangle_dir) == ['2025-04', '2025-05', '2025-06']
+    assert load_manifest(triangle_dir)['cohorts'] == {'2025-04': 3, '2025-05': 2, '2025-06': 1}
+    assert refresh_triangle(params=PARAMS, as_of=datetime.date(2025, 9, 15), triangle_dir=triangle_dir) == []
+
+    cells = load_triangle(triangle_dir)
+    for label, offsets in [('2025-04', 3), ('2025-05', 2), ('2025-06', 1)]:
+        expected = expected_cells(label, offsets)
+        pd.testing.assert_frame_equal(cohort_cells(cells, label)[list(expected.columns)], expected, check_dtype=False)
+
+    # Stored cells are carried over untouched
+    kept = cells[cells['MONTH_OFFSET'] == 0].head(len(first)).reset_index(drop=True)
+    pd.testing.assert_frame_equal(kept, first)
+
+
+@pytest.mark.usefixtures('synthetic_backend')
+def test_changed_settings_need_a_rebuild(tmp_path):
+    triangle_dir = str(tmp_path / 'triangle')
+    as_of = datetime.date(2025, 7, 15)
+    refresh_triangle('2025-04', PARAMS, as_of, triangle_dir)
+
+    wider = {**PARAMS, 'horizon_days': 120}
+    with pytest.raises(ValueError, match='--rebuild'):
+        refresh_triangle(params=wider, as_of=as_of, triangle_dir=triangle_dir)
+    assert refresh_triangle('2025-04', wider, as_of, triangle_dir, rebuild=True) == ['2025-04']
+    assert load_manifest(triangle_dir)['settings']['horizon_days'] == 120
@@ -0,0 +1,92 @@
+"""
+Engines vs pie_income_collection_over_time_fixed.sql
+
+The same checks as cohort_curves.py --verify, on synthetic data: every
+engine that replaces the fixed SQL must return its rows exactly, for the
+default 240/30-day grid and a 90/7-day one, including after a round trip
+through snapshot_extract.py.
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+from cohort_curves import FIXED_SQL, fixed_success_curves
+from conftest import use_snapshots
+from query_cache import cached_query
+
+COHORT_MONTH = '2025-04-01'
+
+PARAMETER_SETS = [
+    {'cohort_month': COHORT_MONTH, 'horizon_days': 240, 'bucket_days': 30},
+    {'cohort_month': COHORT_MONTH, 'horizon_days': 90, 'bucket_days': 7}
+]
+
+pytestmark = pytest.mark.usefixtures('synthetic_backend')
+
+SINGLE_SCAN_SQL = os.path.join(os.path.dirname(FIXED_SQL), 'pie_income_collection_over_time_single_scan.sql')
+
+
+def run_sql(path, params):
+    with open(path, 'r') as f:
+        df = cached_query(f.read(), params)
+    return df.sort_values(['STATEMENT_NUMBER', 'MONTH_OFFSET']).reset_index(drop=True)
+
+
+def assert_same_curves(df, expected):
+    """cohort_curves.py --verify: the expected columns, compared without dtypes"""
+    df = df.sort_values(['STATEMENT_NUMBER', 'MONTH_OFFSET']).reset_index(drop=True)
+    pd.testing.assert_frame_equal(df[list(expected.columns)], expected, check_dtype=False)
+
+
+@pytest.mark.parametrize('params', PARAMETER_SETS, ids=lambda p: f"{p['horizon_days']}d-{p['bucket_days']}d")
+def test_fixed_success_curves(params):
+    expected = run_sql(FIXED_SQL, params)
+    assert len(expected) > 0
+    assert_same_curves(fixed_success_curves(params), expected)
+    assert_same_curves(fixed_success_curves(params, local_incomes=False), expected)
+
+
+@pytest.mark.parametrize('params', PARAMETER_SETS, ids=lambda p: f"{p['horizon_days']}d-{p['bucket_days']}d")
+def test_single_scan_sql(params):
+    assert_same_curves(run_sql(SINGLE_SCAN_SQL, params), run_sql(FIXED_SQL, params))
+
+
+@pytest.mark.parametrize('params', PARAMETER_SETS, ids=lambda p: f"{p['horizon_days']}d-{p['bucket_days']}d")
+def test_cohort_matrix(params):
+    from cohort_matrix import load_cohort_matrix
+
+    matrix = load_cohort_matrix(COHORT_MONTH, '2025-05-01', params)
+    assert_same_curves(matrix, run_sql(FIXED_SQL, params))
+
+
+def test_snapshot_extract_round_trip(synthetic_dir, tmp_path):
+    """Curves and next outcomes from an extracted month match the full snapshot"""
+    from next_outcome import load_next_outcomes
+    from snapshot_extract import extract_snapshots, load_manifest, month_range
+
+    expected = {i: run_sql(FIXED_SQL, params) for i, params in enumerate(PARAMETER_SETS)}
+    expected_next = load_next_outcomes(COHORT_MONTH, '2025-05-01')
+
+    # Next outcomes need the statement months after the cohort, up to 8 statements on
+    extract_dir = str(tmp_path / 'extract')
+    months = month_range('2025-04', '2025-12')
+    assert extract_snapshots(months, extract_dir, horizon_days=240) == [m.strftime('%Y-%m') for m in months]
+    assert extract_snapshots(months, extract_dir, horizon_days=240) == []
+    assert not os.path.exists(os.path.join(extract_dir, '.staging'))
+    assert load_manifest(extract_dir)['2025-04']['horizon_days'] == 240
+
+    # Only the requested horizon is extracted; curves up to it are unaffected
+    use_snapshots(extract_dir)
+    for i, params in enumerate(PARAMETER_SETS):
+        assert_same_curves(fixed_success_curves(params), expected[i])
+        assert_same_curves(run_sql(FIXED_SQL, params), expected[i])
+
+    # The extract keeps statements >= 18 only
+    keys = ['ACCOUNT_ID', 'EVALUATED_TIMESTAMP', 'STATEMENT_NUMBER']
+    next_df = load_next_outcomes(COHORT_MONTH, '2025-05-01').sort_values(keys).reset_index(drop=True)
+    expected_next = expected_next[expected_next['STATEMENT_NUMBER'] >= 18].sort_values(keys).reset_index(drop=True)
+    assert len(expected_next) > 0
+    pd.testing.assert_frame_equal(next_df, expected_next, check_dtype=False)
+
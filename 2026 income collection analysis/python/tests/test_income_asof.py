@@ -0,0 +1,65 @@
+"""
+income_asof.py: the as-of lookup against INCOME_VALIDATION in the account-level worksheet
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from income_asof import STATEMENT_ACCOUNTS_SQL, VALID_INCOME, income_validation, one_year_before
+from income_index import IncomeIndex, load_income_index
+
+ACCOUNT_LEVEL_SQL = os.path.join(os.path.dirname(STATEMENT_ACCOUNTS_SQL),
+                                 'pie_income_collection_over_time_account_level.sql')
+
+KEY = ['STATEMENT_NUMBER', 'ACCOUNT_ID', 'PERSON_ID']
+
+
+def test_one_year_before():
+    dates = np.array(['2025-03-15', '2024-02-29', '2025-01-01'], dtype='datetime64[D]')
+    assert one_year_before(dates).astype(str).tolist() == ['2024-03-15', '2023-02-28', '2024-01-01']
+
+
+def test_latest_income_is_shared_across_persons():
+    # Account 1 has persons 10 and 11; 11's income is later. Person 12's income is over a year old.
+    index = IncomeIndex([10, 11, 11, 12], pd.to_datetime(['2025-01-05', '2025-02-01', '2025-04-01', '2024-01-01']))
+    accounts = pd.DataFrame({
+        'STATEMENT_NUMBER': [18, 18, 18],
+        'STATEMENT_END_DATE': pd.to_datetime(['2025-03-10', '2025-03-10', '2025-03-10']),
+        'PERSON_ID': [10, 11, 12],
+        'ACCOUNT_ID': [1, 1, 2]
+    })
+    df = income_validation(accounts, index)
+    assert df['INCOME_CREATED_AT'].tolist()[:2] == [pd.Timestamp('2025-02-01')] * 2
+    assert pd.isna(df['INCOME_CREATED_AT'].iloc[2])
+    assert df['INCOME_STATUS'].tolist() == [VALID_INCOME, VALID_INCOME, 'No Valid Income Found']
+
+
+@pytest.mark.usefixtures('synthetic_backend')
+def test_matches_income_validation_sql():
+    from query_cache import cached_query
+    from sql_script import run_script, split_statements
+
+    with open(ACCOUNT_LEVEL_SQL, 'r') as f:
+        worksheet = split_statements(f.read())
+    statements = [s.sql for s in worksheet if s.kind == 'set' or s.name == 'income_validation']
+    frames, _ = run_script(';\n'.join(statements + ['select * from INCOME_VALIDATION']), verbose=False)
+    expected = frames[f'stmt_{len(statements) + 1:03d}']
+    expected.columns = [name.upper() for name in expected.columns]
+
+    params = {'eval_start_date': '2024-11-01', 'eval_end_date': '2025-12-31'}
+    with open(STATEMENT_ACCOUNTS_SQL, 'r') as f:
+        accounts = cached_query(f.read(), params)
+    end_dates = np.asarray(accounts['STATEMENT_END_DATE'], dtype='datetime64[D]')
+    index = load_income_index(one_year_before(end_dates.min()), end_dates.max())
+    df = income_validation(accounts, index)
+
+    assert len(df) == len(expected) > 0
+    assert 0 < (df['INCOME_STATUS'] == VALID_INCOME).mean() < 1
+    df = df.sort_values(KEY).reset_index(drop=True)
+    expected = expected.sort_values(KEY).reset_index(drop=True)
+    pd.testing.assert_series_equal(df['INCOME_STATUS'], expected['INCOME_STATUS'], check_dtype=False)
+    pd.testing.assert_series_equal(df['INCOME_CREATED_AT'], pd.to_datetime(expected['INCOME_CREATED_AT']),
+                                   check_dtype=False)
@@ -0,0 +1,96 @@
+"""
+income_collected.py and next_outcome.income_updates: the income_collected and
+income_updates_after_pie joins of CLIP_USER_INCOMES, from the income index
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from income_collected import MULTI_STATEMENT_SQL, income_collected_counts
+from income_index import IncomeIndex
+from next_outcome import income_updates
+
+SQL_DIR = os.path.dirname(MULTI_STATEMENT_SQL)
+
+QUERIES = [
+    ('pie_income_multi_statement_analysis.sql', {}),
+    ('pie_income_update_tracking.sql', {}),
+    ('pie_income_update_tracking.sql', {'statement_set': [18, 26], 'horizon_days': 90}),
+    ('pie_income_cohort_comparison.sql', {})
+]
+
+# income_updates_after_pie on the account's persons, per PIE evaluation
+INCOME_UPDATES_SQL = """
+select clip.account_id, clip.statement_number, clip.evaluated_timestamp, min(inc.CREATED_AT) as first_income_update_at
+from EDW_DB.PUBLIC.CLIP_RESULTS_DATA clip
+join EDW_DB.PUBLIC.account_statements stmt
+    on stmt.account_id = clip.account_id
+    and stmt.statement_num = clip.statement_number
+join EDW_DB.PUBLIC.ACCOUNTS_CUSTOMERS_BRIDGE acb
+    on clip.account_id = acb.ACCOUNT_ID
+join EDW_DB.PUBLIC.CLIP_USER_INCOMES inc
+    on acb.PERSON_ID = inc.PERSON_ID
+where date_trunc(month, stmt.statement_end_dt) = :cohort_month
+  and clip.outcome = 'PRE_EVAL_APPROVED'
+  and inc.CREATED_AT > clip.evaluated_timestamp
+  and inc.CREATED_AT <= DATEADD(day, 240, clip.evaluated_timestamp)
+  and inc.annual_income IS NOT NULL
+group by 1, 2, 3
+"""
+
+
+@pytest.mark.usefixtures('synthetic_backend')
+@pytest.mark.parametrize('name, params', QUERIES, ids=lambda v: v if isinstance(v, str) else str(v))
+def test_matches_sql(name, params):
+    from query_cache import cached_query
+
+    with open(os.path.join(SQL_DIR, name), 'r') as f:
+        query = f.read()
+    expected = cached_query(query, params)
+    keys = [key for key in ['STMT_MONTH', 'STATEMENT_NUMBER'] if key in expected.columns]
+    expected = expected.sort_values(keys).reset_index(drop=True)
+    df = income_collected_counts(query, params)
+
+    assert len(df) == len(expected) > 0
+    assert (df['PIE_INCOME_COLLECTED_COUNT'] > 0).all()
+    pd.testing.assert_frame_equal(df[list(expected.columns)], expected, check_dtype=False)
+
+
+def test_first_income_across_persons():
+    # Account 1 has persons 10 and 11; account 2's only income is past 240 days
+    index = IncomeIndex([10, 11, 11, 12], pd.to_datetime(['2025-05-20', '2025-05-03', '2025-06-01', '2026-01-01']))
+    persons = pd.DataFrame({'ACCOUNT_ID': [1, 1, 2, 3], 'PERSON_ID': [10, 11, 12, 13]})
+    next_df = pd.DataFrame({
+        'ACCOUNT_ID': [1, 1, 2, 3],
+        'EVALUATED_TIMESTAMP': pd.to_datetime(['2025-05-01', '2025-05-10', '2025-05-01', '2025-05-01'])
+    })
+    df = income_updates(next_df, persons, index)
+    assert df['FIRST_INCOME_UPDATE_AT'].tolist()[:2] == [pd.Timestamp('2025-05-03'), pd.Timestamp('2025-05-20')]
+    assert df['FIRST_INCOME_UPDATE_AT'].iloc[2:].isna().all()
+    assert df['INCOME_UPDATED'].tolist() == [True, True, False, False]
+
+
+@pytest.mark.usefixtures('synthetic_backend')
+def test_income_updates_match_sql():
+    from next_outcome import load_next_outcomes, post_pie_summary
+    from query_cache import cached_query
+
+    keys = ['ACCOUNT_ID', 'STATEMENT_NUMBER', 'EVALUATED_TIMESTAMP']
+    df = load_next_outcomes('2025-04-01', '2025-05-01').sort_values(keys).reset_index(drop=True)
+    expected = cached_query(INCOME_UPDATES_SQL, {'cohort_month': '2025-04-01'})
+    expected.columns = [name.upper() for name in expected.columns]
+    expected = df[keys].merge(expected, on=keys, how='left')
+
+    assert 0 < df['INCOME_UPDATED'].mean() < 1
+    assert np.array_equal(df['INCOME_UPDATED'], expected['FIRST_INCOME_UPDATE_AT'].notna())
+    pd.testing.assert_series_equal(df['FIRST_INCOME_UPDATE_AT'], pd.to_datetime(expected['FIRST_INCOME_UPDATE_AT']),
+                                   check_dtype=False)
+
+    summary = post_pie_summary(df)
+    assert (summary['INCOME_UPDATED_AND_APPROVED'] + summary['APPROVED_WITHOUT_INCOME_UPDATE']
+            == summary['APPROVED_COUNT']).all()
+    assert (summary['INCOME_UPDATED_AND_APPROVED'] + summary['INCOME_UPDATED_BUT_NOT_APPROVED']
+            == summary['INCOME_UPDATED_COUNT']).all()
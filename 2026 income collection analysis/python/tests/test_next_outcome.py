@@ -0,0 +1,93 @@
+"""
+next_outcome.py: the forward scan against hand-built cases and the self-join it replaces
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from next_outcome import approvals_by_gap, next_outcomes, next_wanted_index, post_pie_summary
+
+# First later APPROVED / DECLINED / INELIGIBLE evaluation within 8 statements, as a self-join
+SELF_JOIN_SQL = """
+with evaluations as (
+    select clip.account_id, clip.statement_number, clip.outcome, clip.evaluated_timestamp,
+           date_trunc(month, stmt.statement_end_dt) as stmt_month
+    from EDW_DB.PUBLIC.CLIP_RESULTS_DATA clip
+    left join EDW_DB.PUBLIC.account_statements stmt
+        on stmt.account_id = clip.account_id
+        and stmt.statement_num = clip.statement_number
+)
+select a.account_id, a.statement_number, a.evaluated_timestamp, min(b.evaluated_timestamp) as next_evaluated_timestamp
+from evaluations a
+join evaluations b
+    on a.account_id = b.account_id
+    and a.evaluated_timestamp < b.evaluated_timestamp
+    and a.statement_number + 8 > b.statement_number
+    and b.outcome in ('APPROVED', 'DECLINED', 'INELIGIBLE')
+where a.outcome = 'PRE_EVAL_APPROVED'
+  and a.stmt_month = :cohort_month
+group by 1, 2, 3
+"""
+
+
+def evaluations():
+    """Account 1: PIE at 18, a tie at the same time, DECLINED at 22, APPROVED at 26; account 2: APPROVED past the window"""
+    return pd.DataFrame({
+        'STMT_MONTH': pd.to_datetime(['2025-04-01'] * 4 + ['2025-05-01', '2025-04-01', '2026-01-01']),
+        'ACCOUNT_ID': [1, 1, 1, 1, 1, 2, 2],
+        'STATEMENT_NUMBER': [18, 18, 22, 26, 19, 18, 26],
+        'OUTCOME': ['PRE_EVAL_APPROVED', 'APPROVED', 'DECLINED', 'APPROVED', 'PRE_EVAL_APPROVED',
+                    'PRE_EVAL_APPROVED', 'APPROVED'],
+        'EVALUATED_TIMESTAMP': pd.to_datetime(['2025-04-10', '2025-04-10', '2025-08-10', '2025-12-10', '2025-05-10',
+                                               '2025-04-10', '2025-12-10']),
+        'CLIP_AMOUNT': [300.0, 500.0, 0.0, 400.0, 200.0, 100.0, 600.0],
+        'ASSIGNED_LINE_INCREASE': [np.nan, 500.0, np.nan, 400.0, np.nan, np.nan, 600.0]
+    })
+
+
+def test_next_wanted_index():
+    df = evaluations()
+    wanted = df['OUTCOME'].isin(['APPROVED', 'DECLINED', 'INELIGIBLE']).to_numpy()
+    index = next_wanted_index(df['ACCOUNT_ID'], df['EVALUATED_TIMESTAMP'], df['STATEMENT_NUMBER'], wanted)
+    # The APPROVED row at the PIE row's own timestamp is not later; statement 26 is 8 past 18
+    assert index.tolist() == [2, 2, 3, -1, 2, -1, -1]
+    assert next_wanted_index(df['ACCOUNT_ID'], df['EVALUATED_TIMESTAMP'], df['STATEMENT_NUMBER'], wanted,
+                             window_statements=9).tolist()[5] == 6
+
+
+def test_next_outcomes_and_summaries():
+    df = next_outcomes(evaluations())
+    assert df['ACCOUNT_ID'].tolist() == [1, 1, 2]
+    assert df['NEXT_OUTCOME'].tolist()[:2] == ['DECLINED'] * 2 and pd.isna(df['NEXT_OUTCOME'].iloc[2])
+    assert df['NEXT_STATEMENT_GAP'].tolist()[:2] == [4, 3]
+    # Statement 26 is past the window of the PIE at 18, within that of the PIE at 19
+    assert df['APPROVED_STATEMENT_NUMBER'].isna().tolist() == [True, False, True]
+    assert df['APPROVED_STATEMENT_GAP'].iloc[1] == 7 and df['APPROVED_CLIP_AMOUNT'].iloc[1] == 400.0
+
+    summary = post_pie_summary(df)
+    assert summary['STATEMENT_NUMBER'].tolist() == [18, 19]
+    assert summary['PRE_APPROVED_COUNT'].tolist() == [2, 1]
+    assert summary['EVALUATED_AGAIN_COUNT'].tolist() == [1, 1]
+    assert summary['APPROVED_COUNT'].tolist() == [0, 1]
+    assert summary['DECLINED_FIRST_COUNT'].tolist() == [1, 0]
+    assert summary['MISSED_OPPORTUNITY'].tolist() == [2, 0]
+
+    gaps = approvals_by_gap(df)
+    assert gaps[['STATEMENT_NUMBER', 'APPROVED_STATEMENT_GAP', 'RUNNING_APPROVAL_COUNT']].values.tolist() == [[19, 7, 1]]
+
+@pytest.mark.usefixtures('synthetic_backend')
+def test_matches_self_join():
+    from next_outcome import load_next_outcomes
+    from query_cache import cached_query
+
+    keys = ['ACCOUNT_ID', 'STATEMENT_NUMBER', 'EVALUATED_TIMESTAMP']
+    df = load_next_outcomes('2025-04-01', '2025-05-01').sort_values(keys).reset_index(drop=True)
+    expected = cached_query(SELF_JOIN_SQL, {'cohort_month': '2025-04-01'})
+    expected.columns = [name.upper() for name in expected.columns]
+    expected = df[keys].merge(expected, on=keys, how='left')
+
+    assert 0 < df['NEXT_OUTCOME'].notna().mean() < 1
+    pd.testing.assert_series_equal(pd.to_datetime(df['NEXT_EVALUATED_TIMESTAMP']),
+                                   pd.to_datetime(expected['NEXT_EVALUATED_TIMESTAMP']), check_dtype=False,
+                                   check_names=False)
@@ -0,0 +1,68 @@
+"""
+population_bitsets.py: packed bitmaps and the per-group sets against the cohort matrix
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from population_bitsets import Bitmap, PopulationBitsets
+
+
+def test_bitmap_set_algebra():
+    # 70 ids spans two words; the padding past id 69 must stay clear
+    left = np.zeros(70, dtype=bool)
+    right = np.zeros(70, dtype=bool)
+    left[[0, 5, 63, 64, 69]] = True
+    right[[5, 64, 68]] = True
+    a, b = Bitmap.from_mask(left), Bitmap.from_mask(right)
+
+    assert a.count() == 5 and a.ids().tolist() == [0, 5, 63, 64, 69]
+    assert (a & b).ids().tolist() == [5, 64]
+    assert (a | b).count() == 6
+    assert (a ^ b).ids().tolist() == [0, 63, 68, 69]
+    assert (a - b).ids().tolist() == [0, 63, 69]
+    assert (~a).count() == 65 and not (~a & a).any()
+    assert Bitmap.from_ids([0, 5, 63, 64, 69], 70) == a
+    with pytest.raises(ValueError):
+        a & Bitmap.from_ids([1], 71)
+
+
+def test_from_offsets():
+    # Months since 1970-01: 663 = 2025-04. Account 30 is PIE at 18 and approved at 26.
+    offsets = pd.DataFrame({
+        'COHORT_MONTH': [663, 663, 663, 663],
+        'STATEMENT_NUMBER': [18, 18, 26, 26],
+        'ACCOUNT_ID': [30, 10, 30, 20],
+        'HAD_PIE': [1, 0, 0, 1],
+        'DAYS_TO_COLLECTION': [45.0, np.nan, np.nan, 10.0]
+    })
+    bits = PopulationBitsets.from_offsets(offsets, 90, 30)
+
+    assert bits.groups() == [('2025-04', 18), ('2025-04', 26)]
+    assert bits.to_account_ids(bits.pie('2025-04-01', 18)).tolist() == [30]
+    assert bits.to_account_ids(bits.pie('2025-04', 18) & bits.approved('2025-04', 26)).tolist() == [30]
+    assert [bits.collected('2025-04', 18, k).count() for k in range(3)] == [0, 1, 1]
+    assert [bits.collected('2025-04', 26, k).count() for k in range(3)] == [1, 1, 1]
+    assert bits.check_exclusive('2025-04', 18) and bits.check_exclusive('2025-04', 26)
+    with pytest.raises(KeyError):
+        bits.pie('2025-05', 18)
+
+
+@pytest.mark.usefixtures('synthetic_backend')
+def test_counts_match_cohort_matrix():
+    from cohort_matrix import load_matrix_offsets, matrix_curves
+    from population_bitsets import _cohort_label
+
+    offsets, horizon_days, bucket_days = load_matrix_offsets('2025-03-01', '2025-06-01')
+    bits = PopulationBitsets.from_offsets(offsets, horizon_days, bucket_days)
+    curves = matrix_curves(offsets, horizon_days, bucket_days)
+
+    assert len(bits.groups()) == len(curves[['COHORT_MONTH', 'STATEMENT_NUMBER']].drop_duplicates()) > 0
+    for row in curves.itertuples(index=False):
+        cohort, group = _cohort_label(row.COHORT_MONTH), int(row.STATEMENT_NUMBER)
+        assert bits.total(cohort, group).count() == row.TOTAL_POPULATION
+        assert bits.pie(cohort, group).count() == row.PIE_TOTAL_COUNT
+        assert bits.approved(cohort, group).count() == row.APPROVED_OUTRIGHT_COUNT
+        assert bits.collected(cohort, group, int(row.MONTH_OFFSET)).count() == row.PIE_INCOME_COLLECTED_BY_MONTH
+    assert all(bits.check_exclusive(cohort, group) for cohort, group in bits.groups())
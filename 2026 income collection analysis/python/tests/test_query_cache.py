@@ -0,0 +1,119 @@
+"""
+query_cache.py: content-addressed keys, TTL, watermark invalidation and eviction
+"""
+
+import os
+import time
+
+import pandas as pd
+import pytest
+
+import query_cache
+from query_cache import cache_key, cached_query, evict, normalize_sql, source_tables
+
+QUERY = """
+-- PARAMETERS:
+--   :cohort_month = '2025-04-01'
+select count(*) as n, :cohort_month as cohort_month  -- rows
+from EDW_DB.PUBLIC.CLIP_RESULTS_DATA clip
+where clip.outcome = 'PRE_EVAL_APPROVED'
+"""
+
+
+@pytest.fixture(autouse=True)
+def local_backend(cache_dir):
+    from snowflake_session import set_backend
+
+    set_backend('local')
+    return cache_dir
+
+
+@pytest.fixture
+def runs(monkeypatch):
+    """Queries that reached the backend"""
+    executed = []
+
+    def fake_run_query(query, params=None):
+        executed.append(params)
+        return pd.DataFrame({'N': [len(executed)]})
+
+    monkeypatch.setattr(query_cache, 'run_query', fake_run_query)
+    return executed
+
+
+def test_keys_ignore_formatting_but_not_values():
+    reformatted = "SELECT count(*) AS n, :cohort_month AS cohort_month\n  FROM edw_db.public.clip_results_data clip " \
+                  "WHERE clip.outcome = 'PRE_EVAL_APPROVED';"
+    assert normalize_sql(QUERY).endswith("where clip.outcome = 'PRE_EVAL_APPROVED'")
+    assert cache_key(QUERY) == cache_key(QUERY, {'cohort_month': '2025-04-01'}) == cache_key(reformatted, {'cohort_month': '2025-04-01'})
+    assert cache_key(QUERY) != cache_key(QUERY, {'cohort_month': '2025-05-01'})
+    assert cache_key(QUERY) != cache_key(QUERY.replace('PRE_EVAL_APPROVED', 'pre_eval_approved'))
+    assert source_tables(QUERY) == [('EDW_DB', 'PUBLIC', 'CLIP_RESULTS_DATA')]
+
+
+def test_hits_misses_and_refresh(runs):
+    first = cached_query(QUERY)
+    pd.testing.assert_frame_equal(cached_query(QUERY), first)
+    assert len(runs) == 1
+
+    cached_query(QUERY, {'cohort_month': '2025-05-01'})
+    assert cached_query(QUERY, refresh=True)['N'].iloc[0] == 3
+    assert cached_query(QUERY)['N'].iloc[0] == 3
+    assert len(runs) == 3
+
+
+def test_entries_expire(runs, monkeypatch):
+    cached_query(QUERY)
+    path = query_cache._entry_path(cache_key(QUERY))
+    old = time.time() - 2 * 3600
+    os.utime(path, (old, old))
+
+    monkeypatch.setattr(query_cache, 'CACHE_TTL_SECONDS', 3 * 3600)
+    cached_query(QUERY)
+    monkeypatch.setattr(query_cache, 'CACHE_TTL_SECONDS', 3600)
+    cached_query(QUERY)
+    assert len(runs) == 2
+
+
+def test_watermark_invalidates(runs, monkeypatch):
+    altered = {'at': '2026-01-01 00:00:00'}
+    monkeypatch.setitem(query_cache.WATERMARKS, 'local', lambda tables: altered['at'])
+
+    cached_query(QUERY)
+    cached_query(QUERY)
+    altered['at'] = '2026-01-02 00:00:00'
+    cached_query(QUERY)
+    assert len(runs) == 2
+
+
+def test_snapshot_files_are_the_duckdb_watermark(tmp_path, monkeypatch):
+    import duckdb_backend
+    from snowflake_session import set_backend
+
+    table_dir = tmp_path / 'CLIP_RESULTS_DATA'
+    table_dir.mkdir()
+    pd.DataFrame({'OUTCOME': ['APPROVED']}).to_parquet(table_dir / 'part-0.parquet')
+    monkeypatch.setattr(duckdb_backend, 'SNAPSHOT_DIR', str(tmp_path))
+    set_backend('duckdb')
+
+    key = cache_key(QUERY)
+    assert cache_key(QUERY) == key
+    later = time.time() + 60
+    os.utime(table_dir / 'part-0.parquet', (later, later))
+    assert cache_key(QUERY) != key
+
+
+def test_evict_drops_expired_then_least_recently_used(local_backend, monkeypatch):
+    now = time.time()
+    entries = {}
+    for name, age in [('aa', 10), ('bb', 20), ('cc', 30), ('dd', 10 * 86400)]:
+        path = os.path.join(local_backend, name, name + '.parquet')
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as f:
+            f.write(b'x' * 100)
+        os.utime(path, (now - age, now - age))
+        entries[name] = path
+
+    monkeypatch.setattr(query_cache, 'CACHE_TTL_SECONDS', 86400)
+    evict(max_bytes=200)
+    assert [name for name, path in entries.items() if os.path.exists(path)] == ['aa', 'bb']
@@ -0,0 +1,80 @@
+"""
+query_params.py and pipeline_args.py: placeholders, defaults, binding and flags
+"""
+
+import sys
+
+import pytest
+
+from query_params import MAX_MONTH_OFFSETS, bind, defaults, inline, placeholders, resolve
+
+QUERY = """
+-- PARAMETERS:
+--   :cohort_month  = '2025-04-01'
+--   :statement_set = [18, 26]
+--   :horizon_days  = 240
+--   :bucket_days   = 30
+select clip.DECISION_DATA:fico_08::int, ':not_a_param' as text  -- :not_one_either
+from t
+where month = :cohort_month
+  and array_contains(clip.statement_number::variant, parse_json(:statement_set))
+  and days <= :horizon_days and floor(days / :bucket_days) < 8 and prior = :cohort_month
+"""
+
+
+def test_placeholders_skip_comments_quotes_casts_and_variant_paths():
+    assert placeholders(QUERY) == ['cohort_month', 'statement_set', 'horizon_days', 'bucket_days', 'cohort_month']
+
+
+def test_defaults_come_from_the_header():
+    assert defaults(QUERY) == {'cohort_month': '2025-04-01', 'statement_set': [18, 26],
+                               'horizon_days': 240, 'bucket_days': 30}
+
+
+def test_resolve_overrides_defaults():
+    values = resolve(QUERY, {'cohort_month': '2025-05-01', 'horizon_days': None, 'unused': 1})
+    assert values == {'cohort_month': '2025-05-01', 'statement_set': [18, 26], 'horizon_days': 240, 'bucket_days': 30}
+    with pytest.raises(ValueError, match=':missing'):
+        resolve('select :missing', {})
+
+
+def test_bind_paramstyles():
+    sql, values = bind(QUERY, {'cohort_month': '2025-05-01'}, 'qmark')
+    assert sql.count('?') == 5 and 'month = ?' in sql
+    assert values == ['2025-05-01', '[18, 26]', 240, 30, '2025-05-01']
+    assert "':not_a_param'" in sql and 'DECISION_DATA:fico_08::int' in sql
+
+    sql, values = bind(QUERY, None, 'numeric')
+    assert 'prior = :1' in sql and values == ['2025-04-01', '[18, 26]', 240, 30]
+
+    # The statement text is the same for every cohort
+    assert bind(QUERY, {'cohort_month': '2025-03-01'})[0] == bind(QUERY, {'cohort_month': '2025-06-01'})[0]
+
+
+def test_inline_renders_literals():
+    sql = inline(QUERY, {'statement_set': [42]})
+    assert "month = '2025-04-01'" in sql and "parse_json('[42]')" in sql and 'days <= 240' in sql
+
+
+def test_month_offset_grid_is_bounded():
+    with pytest.raises(ValueError, match=str(MAX_MONTH_OFFSETS)):
+        resolve(QUERY, {'horizon_days': MAX_MONTH_OFFSETS + 1, 'bucket_days': 1})
+    assert resolve(QUERY, {'horizon_days': MAX_MONTH_OFFSETS, 'bucket_days': 1})['horizon_days'] == MAX_MONTH_OFFSETS
+
+
+def test_pipeline_args_collect_params(monkeypatch):
+    from pipeline_args import parse_pipeline_args
+
+    monkeypatch.setattr(sys, 'argv', ['run.py', '--cohort-month', '2025-05-01', '--statements', '18,42', '--refresh'])
+    args = parse_pipeline_args()
+    assert args.params == {'cohort_month': '2025-05-01', 'statement_set': [18, 42]}
+    assert args.refresh
+
+
+def test_pipeline_args_reject_unknown_flags(monkeypatch, capsys):
+    from pipeline_args import parse_pipeline_args
+
+    monkeypatch.setattr(sys, 'argv', ['run.py', '--cohort_month', '2025-03-01'])
+    with pytest.raises(SystemExit):
+        parse_pipeline_args()
+    assert '--cohort_month' in capsys.readouterr().err
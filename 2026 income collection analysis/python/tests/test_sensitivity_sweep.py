@@ -0,0 +1,55 @@
+"""
+sensitivity_sweep.py: every scenario of one sweep against fixed_success_curves at that horizon and bucket width
+"""
+
+import datetime
+
+import pandas as pd
+import pytest
+
+from sensitivity_sweep import horizon_table, load_sensitivity_sweep, sweep_curves
+
+COHORT_MONTH = '2025-04-01'
+HORIZONS = [90, 240]
+BUCKETS = [7, 30]
+
+pytestmark = pytest.mark.usefixtures('synthetic_backend')
+
+
+def test_scenarios_match_fixed_curves():
+    from cohort_curves import fixed_success_curves
+
+    sweep = load_sensitivity_sweep(COHORT_MONTH, '2025-05-01', HORIZONS, BUCKETS, as_of=datetime.date(2026, 6, 1))
+    assert sweep['FOLLOW_UP_COMPLETE'].all()
+
+    keys = ['STATEMENT_NUMBER', 'MONTH_OFFSET']
+    columns = keys + ['STATEMENT_LABEL', 'SUCCESS_RATE_PCT', 'PIE_INCOME_COLLECTION_RATE_PCT', 'EXPOSURE_SUCCESS_RATE_PCT']
+    for horizon in HORIZONS:
+        for bucket in BUCKETS:
+            scenario = sweep[(sweep['HORIZON_DAYS'] == horizon) & (sweep['BUCKET_DAYS'] == bucket)]
+            expected = fixed_success_curves({'cohort_month': COHORT_MONTH, 'horizon_days': horizon, 'bucket_days': bucket})
+            assert len(scenario) == len(expected) > 0
+            pd.testing.assert_frame_equal(scenario.sort_values(keys).reset_index(drop=True)[columns],
+                                          expected.sort_values(keys).reset_index(drop=True)[columns],
+                                          check_dtype=False)
+
+
+def test_offsets_not_yet_final():
+    sweep = load_sensitivity_sweep(COHORT_MONTH, '2025-05-01', HORIZONS, [30], as_of=datetime.date(2025, 9, 15))
+    assert sweep['FOLLOW_UP_COMPLETE'].any() and not sweep['FOLLOW_UP_COMPLETE'].all()
+
+    # The 90-day horizon is final by then, the 240-day one is not
+    table = horizon_table(sweep)
+    assert table.index.tolist() == ['2025-04']
+    assert table[90].notna().all() and table[240].isna().all()
+
+
+def test_horizon_past_the_fetched_offsets():
+    from cohort_curves import histogram_from_offsets
+    from cohort_matrix import GROUP_KEY_BASE, load_matrix_offsets
+
+    offsets, _, _ = load_matrix_offsets(COHORT_MONTH, '2025-05-01', {'horizon_days': 90})
+    keys = offsets['COHORT_MONTH'].to_numpy() * GROUP_KEY_BASE + offsets['STATEMENT_NUMBER'].to_numpy()
+    hist = histogram_from_offsets(offsets, 90, groups=keys)
+    with pytest.raises(ValueError):
+        sweep_curves(hist, [240], [30])
@@ -0,0 +1,70 @@
+"""
+sql_script.py: statement splitting and running a worksheet on one session
+"""
+
+import pytest
+
+import snowflake_session
+from sql_script import run_script, split_statements
+
+SCRIPT = """-- Worksheet header; with a ; inside the comment
+/* block comment; still a comment */
+create temporary table cohort as
+select 18 as statement_number, 'a;b' as label
+union all select :statement, 'it''s; fine';
+
+-- name: cohort_rows
+select * from cohort order by statement_number;
+
+-- just a comment;
+insert into cohort values (42, "x;y");
+select count(*) as n from cohort
+"""
+
+
+def test_split_statements():
+    statements = split_statements(SCRIPT + ';\ncreate function f() returns int as $$ select 1; $$;')
+    assert [s.name for s in statements] == ['stmt_001', 'cohort_rows', 'stmt_003', 'stmt_004', 'stmt_005']
+    assert [s.kind for s in statements] == ['create', 'select', 'insert', 'select', 'create']
+    assert [s.line for s in statements] == [3, 8, 11, 12, 14]
+    assert statements[0].sql.endswith("union all select :statement, 'it''s; fine'")
+    assert statements[-1].sql.endswith('$$ select 1; $$')
+
+
+def test_run_script_keeps_one_session():
+    snowflake_session.set_backend('local')
+    pool = snowflake_session.get_pool()
+    frames, timings = run_script(SCRIPT, {'statement': 26}, verbose=False)
+
+    assert list(frames) == ['cohort_rows', 'stmt_004']
+    assert frames['cohort_rows'].to_dict('list') == {'STATEMENT_NUMBER': [18, 26], 'LABEL': ['a;b', "it's; fine"]}
+    assert frames['stmt_004']['N'].iloc[0] == 3
+    assert [t['rows'] for t in timings] == [None, 2, None, 1]
+    assert all(t['seconds'] >= 0 for t in timings)
+
+    # The session with the temporary table is closed, not returned to the pool
+    assert pool._idle == [] and pool._open == 0
+
+
+def test_failing_statement_is_named():
+    snowflake_session.set_backend('local')
+    with pytest.raises(RuntimeError, match=r'Statement cohort_rows \(line 8\) failed'):
+        run_script(SCRIPT.replace('create temporary table cohort', 'create temporary table other'), {'statement': 26},
+                   verbose=False)
+    assert snowflake_session.get_pool()._open == 0
+
+
+def test_session_variables_on_duckdb(tmp_path, monkeypatch):
+    pytest.importorskip('duckdb')
+    import duckdb_backend
+
+    monkeypatch.setattr(duckdb_backend, 'SNAPSHOT_DIR', str(tmp_path))
+    snowflake_session.set_backend('duckdb')
+    script = """
+    use database EDW_DB;
+    SET EVAL_START_DATE = '2025-04-01'::date;
+    select dateadd(day, 30, $EVAL_START_DATE) as eval_end;
+    unset EVAL_START_DATE
+    """
+    frames, _ = run_script(script, verbose=False)
+    assert str(frames['stmt_003']['EVAL_END'].iloc[0])[:10] == '2025-05-01'
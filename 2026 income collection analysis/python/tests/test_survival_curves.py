@@ -0,0 +1,87 @@
+"""
+survival_curves.py: censoring at the as_of day, Kaplan-Meier steps and agreement with the fixed SQL for mature cohorts
+"""
+
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from income_index import IncomeIndex
+from survival_curves import cohort_is_mature, survival_curves, survival_inputs
+
+# Months since 1970-01
+APRIL_2025 = 663
+
+
+def test_censored_at_end_of_as_of_day():
+    # Incomes at 23:00 on the as_of day count; one an hour after midnight does not
+    base = pd.DataFrame({
+        'COHORT_MONTH': [APRIL_2025] * 5,
+        'STATEMENT_NUMBER': [18] * 5,
+        'ACCOUNT_ID': [1, 2, 3, 4, 5],
+        'PERSON_ID': [10, 20, 30, 40, 50],
+        'HAD_PIE': [1, 1, 1, 1, 0],
+        'EVALUATED_TIMESTAMP': pd.to_datetime(['2025-04-10 10:00', '2025-04-10 10:00', '2025-04-21 08:00',
+                                               '2024-01-02 10:00', '2025-04-10 10:00'])
+    })
+    index = IncomeIndex([10, 20, 50], pd.to_datetime(['2025-04-20 23:00', '2025-04-21 01:00', '2025-04-11 00:00']))
+    df = survival_inputs(base, index, '2025-04-20', horizon_days=240)
+
+    assert df['EVENT'].tolist() == [1, 0, 0, 0, 0]
+    assert df['EVENT_DAY'].iloc[0] == 10
+    # Watched through day 10; evaluated after the cutoff; followed for the whole horizon
+    assert df['CENSOR_DAY'].iloc[1] == 10
+    assert df['CENSOR_DAY'].iloc[2] == -1
+    assert np.isnan(df['CENSOR_DAY'].iloc[3])
+    assert df['HAD_PIE'].tolist() == [1, 1, 1, 1, 0]
+
+
+def test_kaplan_meier_steps():
+    # 5 PIE accounts: an income on day 0, a censoring on day 0 (still at risk that day),
+    # incomes on days 40 and 45, a censoring on day 70; one approved account
+    inputs = pd.DataFrame({
+        'COHORT_MONTH': [APRIL_2025] * 6,
+        'STATEMENT_NUMBER': [18] * 6,
+        'ACCOUNT_ID': [1, 2, 3, 4, 5, 6],
+        'HAD_PIE': [1, 1, 1, 1, 1, 0],
+        'EVENT': [1, 0, 1, 1, 0, 0],
+        'EVENT_DAY': [0, np.nan, 40, 45, np.nan, np.nan],
+        'CENSOR_DAY': [np.nan, 0, np.nan, np.nan, 70, np.nan]
+    })
+    df = survival_curves(inputs, horizon_days=90, bucket_days=30)
+
+    # S = 4/5 after day 0, then x 2/3 and x 1/2; nobody is left at risk by day 89
+    assert df['PIE_AT_RISK'].tolist() == [3, 1, 0]
+    assert df['PIE_INCOME_COLLECTION_RATE_PCT'].tolist()[:2] == [20.0, 73.3]
+    assert df['SUCCESS_RATE_PCT'].tolist()[:2] == [33.3, 77.8]
+    assert df[['PIE_INCOME_COLLECTION_RATE_PCT', 'SUCCESS_RATE_PCT']].iloc[2].isna().all()
+    assert not df['FOLLOW_UP_COMPLETE'].any()
+    assert df['TOTAL_POPULATION'].tolist() == [6] * 3 and df['PIE_TOTAL_COUNT'].tolist() == [5] * 3
+
+
+def test_cohort_is_mature():
+    params = {'cohort_month': '2025-04-01', 'horizon_days': 240, 'bucket_days': 30}
+    assert not cohort_is_mature(params, datetime.date(2025, 9, 15))
+    assert cohort_is_mature(params, datetime.date(2026, 6, 1))
+
+
+@pytest.mark.usefixtures('synthetic_backend')
+def test_mature_cohort_matches_fixed_curves():
+    from cohort_curves import fixed_success_curves
+    from survival_curves import km_success_curves
+
+    params = {'cohort_month': '2025-04-01'}
+    expected = fixed_success_curves(params)
+    df = km_success_curves(params, as_of='2026-06-01')
+
+    assert df['FOLLOW_UP_COMPLETE'].all()
+    keys = ['STATEMENT_NUMBER', 'MONTH_OFFSET']
+    df = df.sort_values(keys).reset_index(drop=True)
+    expected = expected.sort_values(keys).reset_index(drop=True)
+    columns = ['STATEMENT_LABEL', 'STATEMENT_NUMBER', 'MONTH_OFFSET', 'TOTAL_POPULATION', 'APPROVED_OUTRIGHT_COUNT',
+               'PIE_TOTAL_COUNT', 'PIE_INCOME_COLLECTED_BY_MONTH', 'SUCCESS_COUNT', 'SUCCESS_RATE_PCT',
+               'PIE_INCOME_COLLECTION_RATE_PCT', 'NEW_INCOME_COLLECTIONS_THIS_MONTH']
+    assert len(df) == len(expected) > 0
+    pd.testing.assert_frame_equal(df[columns], expected[columns], check_dtype=False)
@@ -0,0 +1,62 @@
+"""
+synthetic_data.py: deterministic chunks in the snapshot layout
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from synthetic_data import EVAL_EVERY_STATEMENTS, EVAL_FIRST_STATEMENT, generate, generate_chunk
+
+
+def test_chunks_are_deterministic():
+    first = generate_chunk(7, 0, 2_000, 0)
+    again = generate_chunk(7, 0, 2_000, 0)
+    other = generate_chunk(8, 0, 2_000, 0)
+    for name, table in first.items():
+        pd.testing.assert_frame_equal(table.to_pandas(), again[name].to_pandas())
+    assert not first['CLIP_RESULTS_DATA'].equals(other['CLIP_RESULTS_DATA'])
+
+
+def test_evaluations_match_statements():
+    tables = generate_chunk(0, 0, 2_000, 0)
+    clip = tables['CLIP_RESULTS_DATA'].to_pandas()
+    statements = tables['ACCOUNT_STATEMENTS'].to_pandas()
+
+    assert ((clip['STATEMENT_NUMBER'] - EVAL_FIRST_STATEMENT) % EVAL_EVERY_STATEMENTS == 0).all()
+    joined = clip.merge(statements, left_on=['ACCOUNT_ID', 'STATEMENT_NUMBER'],
+                        right_on=['ACCOUNT_ID', 'STATEMENT_NUM'], how='left')
+    assert joined['STATEMENT_END_DT'].notna().all()
+    assert (joined['EVALUATED_TIMESTAMP'] > joined['STATEMENT_END_DT']).all()
+    assert set(clip['OUTCOME'].astype(str)) == {'APPROVED', 'PRE_EVAL_APPROVED', 'DECLINED'}
+    assert (clip.loc[clip['OUTCOME'] == 'DECLINED', 'CLIP_AMOUNT'] == 0).all()
+
+
+def test_generate_writes_one_part_per_chunk(tmp_path):
+    totals = generate(str(tmp_path), 20_000, seed=3, chunk_accounts=1_000)
+    parts = sorted(os.listdir(tmp_path / 'CLIP_RESULTS_DATA'))
+    assert len(parts) > 1 and parts[0] == 'part-00000.parquet'
+
+    for name, rows in totals.items():
+        assert pq.read_table(tmp_path / name).num_rows == rows
+
+    # Chunks cover disjoint accounts and persons
+    bridge = pq.read_table(tmp_path / 'ACCOUNTS_CUSTOMERS_BRIDGE').to_pandas()
+    first = bridge.groupby('ACCOUNT_ID')['PERSON_ID'].min()
+    chunk_of_account = first.index.to_numpy() // 1_000
+    chunk_of_person = (first.to_numpy() - 1_000_000_000) // 10_000
+    assert np.array_equal(chunk_of_account, chunk_of_person)
+
+
+def test_datamart_statements_close_once():
+    tables = generate_chunk(0, 0, 2_000, 0)
+    statements = tables['ACCOUNT_STATEMENTS'].to_pandas()
+    datamart = tables['ACCOUNT_STATEMENTS_CLIP'].to_pandas()
+
+    assert datamart['ACCOUNT_ID'].tolist() == statements['ACCOUNT_ID'].tolist()
+    assert datamart['STATEMENT_NUMBER'].tolist() == statements['STATEMENT_NUM'].tolist()
+    # Once closed, an account stays closed
+    assert (datamart.groupby('ACCOUNT_ID')['OPEN_IN_STATEMENT'].diff().fillna(0) <= 0).all()
+    assert 0 < (datamart['OPEN_IN_STATEMENT'] == 0).mean() < 0.1
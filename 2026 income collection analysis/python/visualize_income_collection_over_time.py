@@ -1,50 +1,32 @@
-import snowflake.connector
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
+from async_queries import run_queries
+from sql_script import split_statements
+from pipeline_args import parse_pipeline_args
 
-# Snowflake connection
-conn = snowflake.connector.connect(
-    user='ALFRED_LEE',
-    account='IJ90379-MISSIONLANE',
-    authenticator='externalbrowser',
-    database='EDW_DB',
-    schema='PUBLIC'
-)
+args = parse_pipeline_args()
 
 print("Running PIE Income Collection Over Time Analysis...")
 
-# Load time series data - STATEMENT-LEVEL (April 2025 cohort)
+# Statement-level time series (April 2025 cohort)
 with open('/Users/Alfred.Lee/Documents/github/pie_income_collection_over_time.sql', 'r') as f:
     query_time_stmt = f.read()
 
-cursor = conn.cursor()
-cursor.execute(query_time_stmt)
-df_time = pd.DataFrame(cursor.fetchall(), columns=[col[0] for col in cursor.description])
-cursor.close()
-
-print("Statement-level time series loaded. Loading account-level overall data...")
-
-# Load account-level data for Overall Stmt 18+ line
+# Account-level data for Overall Stmt 18+ line (the worksheet's final query)
 with open('/Users/Alfred.Lee/Documents/github/pie_income_collection_over_time_account_level.sql', 'r') as f:
-    query_account_level = f.read()
+    query_account_level = split_statements(f.read())[-1].sql
 
-cursor = conn.cursor()
-cursor.execute(query_account_level)
-df_account_level = pd.DataFrame(cursor.fetchall(), columns=[col[0] for col in cursor.description])
-cursor.close()
-
-print("Account-level data loaded. Loading cohort comparison data...")
-
-# Load cohort comparison data (Mar-May 2025)
+# Cohort comparison data (Mar-May 2025)
 with open('/Users/Alfred.Lee/Documents/github/pie_income_cohort_comparison.sql', 'r') as f:
     query_cohort = f.read()
 
-cursor = conn.cursor()
-cursor.execute(query_cohort)
-df_cohort = pd.DataFrame(cursor.fetchall(), columns=[col[0] for col in cursor.description])
-cursor.close()
-conn.close()
+# The three queries are independent: submit them together and wait for all
+print("Loading statement-level, account-level and cohort comparison data...")
+df_time, df_account_level, df_cohort = run_queries(
+    [(query_time_stmt, args.params), (query_account_level, args.params), (query_cohort, args.params)],
+    max_concurrent=args.max_concurrent
+)
 
 print("All data loaded. Creating visualizations...")
 
@@ -1,154 +1,175 @@
-import snowflake.connector
-import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
-
-# Snowflake connection
-conn = snowflake.connector.connect(
-    user='ALFRED_LEE',
-    account='IJ90379-MISSIONLANE',
-    authenticator='externalbrowser',
-    database='EDW_DB',
-    schema='PUBLIC'
-)
-
-print("Running PIE Income Collection Analysis (Account-Level)...")
-
-# Load account-level data for all statements
-with open('/Users/Alfred.Lee/Documents/github/pie_income_collection_over_time_account_level_all_statements.sql', 'r') as f:
-    query = f.read()
-
-cursor = conn.cursor()
-cursor.execute(query)
-df = pd.DataFrame(cursor.fetchall(), columns=[col[0] for col in cursor.description])
-cursor.close()
-conn.close()
-
-print("Data loaded. Creating visualization...")
-
-# Add month label (1-8 instead of 0-7)
-df['MONTH_LABEL'] = df['MONTH_OFFSET'] + 1
-
-# Define colors
-statement_colors = {
-    18: '#e74c3c',
-    26: '#3498db',
-    34: '#2ecc71',
-    42: '#f39c12'
-}
-
-# Create standalone visualization (narrower and taller)
-fig, ax = plt.subplots(1, 1, figsize=(10, 10))
-fig.suptitle('PIE Income Collection Rate Over Time - April 2025 Cohort (Account-Level)',
-             fontsize=18, fontweight='bold', y=0.98)
-
-# Track label positions to avoid overlaps
-label_positions = []
-
-def can_add_label(x, y, min_distance=3.0):
-    """Check if a label can be added without overlapping existing labels"""
-    for (lx, ly) in label_positions:
-        if abs(lx - x) < 0.5 and abs(float(ly) - float(y)) < min_distance:
-            return False
-    return True
-
-# Plot individual statement lines
-statements = [18, 26, 34]  # Removed 42
-for stmt in statements:
-    stmt_data = df[df['STATEMENT_NUMBER'] == stmt].sort_values('MONTH_OFFSET')
-    ax.plot(stmt_data['MONTH_LABEL'], stmt_data['PIE_INCOME_COLLECTION_RATE_PCT'],
-            marker='o', linewidth=3, label=f'Stmt {stmt}',
-            color=statement_colors[stmt], markersize=10)
-
-    # Add labels for start and end points
-    start_val = stmt_data.iloc[0]['PIE_INCOME_COLLECTION_RATE_PCT']
-    end_val = stmt_data.iloc[-1]['PIE_INCOME_COLLECTION_RATE_PCT']
-    start_month = stmt_data.iloc[0]['MONTH_LABEL']
-    end_month = stmt_data.iloc[-1]['MONTH_LABEL']
-
-    # Start label (Month 1)
-    if can_add_label(start_month, start_val):
-        ax.text(start_month, start_val, f'{start_val:.1f}%',
+from pipeline_args import parse_pipeline_args
+from query_cache import cached_query
+
+
+def main():
+    """Run the account-level query and draw the collection rate chart"""
+    args = parse_pipeline_args()
+
+    print("Running PIE Income Collection Analysis (Account-Level)...")
+
+    # Load account-level data for all statements
+    with open('/Users/Alfred.Lee/Documents/github/pie_income_collection_over_time_account_level_all_statements.sql', 'r') as f:
+        query = f.read()
+
+    df = cached_query(query, args.params, refresh=args.refresh)
+
+    print("Data loaded. Creating visualization...")
+
+    # Add month label (1-8 instead of 0-7)
+    df['MONTH_LABEL'] = df['MONTH_OFFSET'] + 1
+
+    # Define colors
+    statement_colors = {
+        18: '#e74c3c',
+        26: '#3498db',
+        34: '#2ecc71',
+        42: '#f39c12'
+    }
+
+    # Create standalone visualization (narrower and taller)
+    fig, ax = plt.subplots(1, 1, figsize=(10, 10))
+    fig.suptitle('PIE Income Collection Rate Over Time - April 2025 Cohort (Account-Level)',
+                 fontsize=18, fontweight='bold', y=0.98)
+
+    # Track label positions to avoid overlaps
+    label_positions = []
+
+    def can_add_label(x, y, min_distance=3.0):
+        """Check if a label can be added without overlapping existing labels"""
+        for (lx, ly) in label_positions:
+            if abs(lx - x) < 0.5 and abs(float(ly) - float(y)) < min_distance:
+                return False
+        return True
+
+    # Plot individual statement lines
+    statements = [18, 26, 34]  # Removed 42
+    for stmt in statements:
+        stmt_data = df[df['STATEMENT_NUMBER'] == stmt].sort_values('MONTH_OFFSET')
+        ax.plot(stmt_data['MONTH_LABEL'], stmt_data['PIE_INCOME_COLLECTION_RATE_PCT'],
+                marker='o', linewidth=3, label=f'Stmt {stmt}',
+                color=statement_colors[stmt], markersize=10)
+
+        # Add labels for start and end points
+        start_val = stmt_data.iloc[0]['PIE_INCOME_COLLECTION_RATE_PCT']
+        end_val = stmt_data.iloc[-1]['PIE_INCOME_COLLECTION_RATE_PCT']
+        start_month = stmt_data.iloc[0]['MONTH_LABEL']
+        end_month = stmt_data.iloc[-1]['MONTH_LABEL']
+
+        # Start label (Month 1)
+        if can_add_label(start_month, start_val):
+            ax.text(start_month, start_val, f'{start_val:.1f}%',
+                    fontsize=11, ha='right', va='center',
+                    color=statement_colors[stmt], fontweight='bold',
+                    bbox=dict(boxstyle='round,pad=0.3', facecolor='white', edgecolor=statement_colors[stmt], linewidth=1, alpha=0.8))
+            label_positions.append((start_month, start_val))
+
+        # End label (Month 8)
+        if can_add_label(end_month, end_val):
+            ax.text(end_month, end_val, f'{end_val:.1f}%',
+                    fontsize=11, ha='left', va='center',
+                    color=statement_colors[stmt], fontweight='bold',
+                    bbox=dict(boxstyle='round,pad=0.3', facecolor='white', edgecolor=statement_colors[stmt], linewidth=1, alpha=0.8))
+            label_positions.append((end_month, end_val))
+
+    # Plot overall Stmt 18+ line (ACCOUNT-LEVEL: deduped across all statements)
+    overall_data = df[df['STATEMENT_NUMBER'] == 999].sort_values('MONTH_OFFSET')
+    ax.plot(overall_data['MONTH_LABEL'], overall_data['PIE_INCOME_COLLECTION_RATE_PCT'],
+            marker='s', linewidth=3.5, label='Overall Stmt 18+ (Acct-Level)',
+            color='black', markersize=12, linestyle='--', alpha=0.7)
+
+    # Add labels for overall line
+    overall_start = overall_data.iloc[0]['PIE_INCOME_COLLECTION_RATE_PCT']
+    overall_end = overall_data.iloc[-1]['PIE_INCOME_COLLECTION_RATE_PCT']
+    overall_start_month = overall_data.iloc[0]['MONTH_LABEL']
+    overall_end_month = overall_data.iloc[-1]['MONTH_LABEL']
+
+    if can_add_label(overall_start_month, overall_start):
+        ax.text(overall_start_month, overall_start, f'{overall_start:.1f}%',
                 fontsize=11, ha='right', va='center',
-                color=statement_colors[stmt], fontweight='bold',
-                bbox=dict(boxstyle='round,pad=0.3', facecolor='white', edgecolor=statement_colors[stmt], linewidth=1, alpha=0.8))
-        label_positions.append((start_month, start_val))
+                color='black', fontweight='bold',
+                bbox=dict(boxstyle='round,pad=0.3', facecolor='white', edgecolor='black', linewidth=1.5, alpha=0.9))
+        label_positions.append((overall_start_month, overall_start))
 
-    # End label (Month 8)
-    if can_add_label(end_month, end_val):
-        ax.text(end_month, end_val, f'{end_val:.1f}%',
+    if can_add_label(overall_end_month, overall_end):
+        ax.text(overall_end_month, overall_end, f'{overall_end:.1f}%',
                 fontsize=11, ha='left', va='center',
-                color=statement_colors[stmt], fontweight='bold',
-                bbox=dict(boxstyle='round,pad=0.3', facecolor='white', edgecolor=statement_colors[stmt], linewidth=1, alpha=0.8))
-        label_positions.append((end_month, end_val))
-
-# Plot overall Stmt 18+ line (ACCOUNT-LEVEL: deduped across all statements)
-overall_data = df[df['STATEMENT_NUMBER'] == 999].sort_values('MONTH_OFFSET')
-ax.plot(overall_data['MONTH_LABEL'], overall_data['PIE_INCOME_COLLECTION_RATE_PCT'],
-        marker='s', linewidth=3.5, label='Overall Stmt 18+ (Acct-Level)',
-        color='black', markersize=12, linestyle='--', alpha=0.7)
-
-# Add labels for overall line
-overall_start = overall_data.iloc[0]['PIE_INCOME_COLLECTION_RATE_PCT']
-overall_end = overall_data.iloc[-1]['PIE_INCOME_COLLECTION_RATE_PCT']
-overall_start_month = overall_data.iloc[0]['MONTH_LABEL']
-overall_end_month = overall_data.iloc[-1]['MONTH_LABEL']
-
-if can_add_label(overall_start_month, overall_start):
-    ax.text(overall_start_month, overall_start, f'{overall_start:.1f}%',
-            fontsize=11, ha='right', va='center',
-            color='black', fontweight='bold',
-            bbox=dict(boxstyle='round,pad=0.3', facecolor='white', edgecolor='black', linewidth=1.5, alpha=0.9))
-    label_positions.append((overall_start_month, overall_start))
-
-if can_add_label(overall_end_month, overall_end):
-    ax.text(overall_end_month, overall_end, f'{overall_end:.1f}%',
-            fontsize=11, ha='left', va='center',
-            color='black', fontweight='bold',
-            bbox=dict(boxstyle='round,pad=0.3', facecolor='white', edgecolor='black', linewidth=1.5, alpha=0.9))
-    label_positions.append((overall_end_month, overall_end))
-
-ax.set_xlabel('Months After PIE Evaluation', fontsize=15, fontweight='bold')
-ax.set_ylabel('Cumulative PIE Income Collection Rate (%)', fontsize=15, fontweight='bold')
-ax.set_title('% of PIE Accounts That Collected Income Within N Months\n(Account-Level: Each Unique Account Counted Once)',
-             fontsize=16, pad=15)
-ax.legend(fontsize=13, loc='lower right', framealpha=0.95)
-ax.grid(True, alpha=0.3, linewidth=0.5)
-ax.set_ylim(0, 100)
-ax.set_xticks(range(1, 9))
-ax.set_xticklabels([f'Month {i}' for i in range(1, 9)], fontsize=12)
-ax.tick_params(axis='y', labelsize=12)
-
-# Add annotation for time windows
-ax.text(0.02, 0.02, 'Time Windows: Month 1 = 0-30 days, Month 2 = 31-60 days, ... Month 8 = 211-240 days after PIE',
-        transform=ax.transAxes, fontsize=11, style='italic', color='gray',
-        bbox=dict(boxstyle='round,pad=0.5', facecolor='white', edgecolor='gray', alpha=0.8))
-
-plt.tight_layout()
-
-# Save the plot
-output_file = '/Users/Alfred.Lee/Documents/github/visualizations/pie_income_collection_account_level.png'
-plt.savefig(output_file, dpi=300, bbox_inches='tight')
-print(f"\nVisualization saved to: {output_file}")
-
-# Display summary statistics
-print("\n" + "=" * 120)
-print("ACCOUNT-LEVEL SUMMARY (April 2025 Cohort)")
-print("=" * 120)
-
-for stmt in statements:
+                color='black', fontweight='bold',
+                bbox=dict(boxstyle='round,pad=0.3', facecolor='white', edgecolor='black', linewidth=1.5, alpha=0.9))
+        label_positions.append((overall_end_month, overall_end))
+
+    ax.set_xlabel('Months After PIE Evaluation', fontsize=15, fontweight='bold')
+    ax.set_ylabel('Cumulative PIE Income Collection Rate (%)', fontsize=15, fontweight='bold')
+    ax.set_title('% of PIE Accounts That Collected Income Within N Months\n(Account-Level: Each Unique Account Counted Once)',
+                 fontsize=16, pad=15)
+    ax.legend(fontsize=13, loc='lower right', framealpha=0.95)
+    ax.grid(True, alpha=0.3, linewidth=0.5)
+    ax.set_ylim(0, 100)
+    ax.set_xticks(range(1, 9))
+    ax.set_xticklabels([f'Month {i}' for i in range(1, 9)], fontsize=12)
+    ax.tick_params(axis='y', labelsize=12)
+
+    # Add annotation for time windows
+    ax.text(0.02, 0.02, 'Time Windows: Month 1 = 0-30 days, Month 2 = 31-60 days, ... Month 8 = 211-240 days after PIE',
+            transform=ax.transAxes, fontsize=11, style='italic', color='gray',
+            bbox=dict(boxstyle='round,pad=0.5', facecolor='white', edgecolor='gray', alpha=0.8))
+
+    plt.tight_layout()
+
+    # Save the plot
+    output_file = '/Users/Alfred.Lee/Documents/github/visualizations/pie_income_collection_account_level.png'
+    plt.savefig(output_file, dpi=300, bbox_inches='tight')
+    print(f"\nVisualization saved to: {output_file}")
+
+    # Display summary statistics
+    print("\n" + "=" * 120)
+    print("ACCOUNT-LEVEL SUMMARY (April 2025 Cohort)")
+    print("=" * 120)
+
+    for stmt in statements:
+        print(f"\n{'=' * 120}")
+        print(f"STATEMENT {stmt} (Account-Level)")
+        print(f"{'=' * 120}")
+
+        stmt_data = df[df['STATEMENT_NUMBER'] == stmt].sort_values('MONTH_OFFSET')
+        total_pie = int(stmt_data.iloc[0]['PIE_TOTAL_COUNT'])
+
+        print(f"\nTotal Unique PIE Accounts: {total_pie:,}")
+        print(f"\n{'Month':<10} {'Days':<15} {'Collected':>12} {'Rate':>12} {'New This Month':>18}")
+        print("-" * 120)
+
+        for _, row in stmt_data.iterrows():
+            month_label = int(row['MONTH_LABEL'])
+            days_start = int(row['MONTH_OFFSET']) * 30
+            days_end = (int(row['MONTH_OFFSET']) + 1) * 30
+            days = f"{days_start}-{days_end}"
+            collected = f"{int(row['PIE_INCOME_COLLECTED_BY_MONTH']):,}"
+            rate = f"{row['PIE_INCOME_COLLECTION_RATE_PCT']:.1f}%"
+            new_coll = f"{int(row['NEW_INCOME_COLLECTIONS_THIS_MONTH']):,}"
+
+            print(f"Month {month_label:<4} {days:<15} {collected:>12} {rate:>12} {new_coll:>18}")
+
+        # Final results
+        final_row = stmt_data.iloc[-1]
+        final_rate = final_row['PIE_INCOME_COLLECTION_RATE_PCT']
+        final_collected = int(final_row['PIE_INCOME_COLLECTED_BY_MONTH'])
+
+        print(f"\n  ✓ Final Result (Month 8): {final_collected:,} of {total_pie:,} accounts ({final_rate:.1f}%) collected income within 240 days")
+
     print(f"\n{'=' * 120}")
-    print(f"STATEMENT {stmt} (Account-Level)")
+    print("OVERALL STMT 18+ (Account-Level - Deduped Across All Statements)")
     print(f"{'=' * 120}")
 
-    stmt_data = df[df['STATEMENT_NUMBER'] == stmt].sort_values('MONTH_OFFSET')
-    total_pie = int(stmt_data.iloc[0]['PIE_TOTAL_COUNT'])
+    overall_data = df[df['STATEMENT_NUMBER'] == 999].sort_values('MONTH_OFFSET')
+    total_pie = int(overall_data.iloc[0]['PIE_TOTAL_COUNT'])
 
     print(f"\nTotal Unique PIE Accounts: {total_pie:,}")
     print(f"\n{'Month':<10} {'Days':<15} {'Collected':>12} {'Rate':>12} {'New This Month':>18}")
     print("-" * 120)
 
-    for _, row in stmt_data.iterrows():
+    for _, row in overall_data.iterrows():
         month_label = int(row['MONTH_LABEL'])
         days_start = int(row['MONTH_OFFSET']) * 30
         days_end = (int(row['MONTH_OFFSET']) + 1) * 30
@@ -159,47 +180,22 @@ for stmt in statements:
 
         print(f"Month {month_label:<4} {days:<15} {collected:>12} {rate:>12} {new_coll:>18}")
 
-    # Final results
-    final_row = stmt_data.iloc[-1]
+    final_row = overall_data.iloc[-1]
     final_rate = final_row['PIE_INCOME_COLLECTION_RATE_PCT']
     final_collected = int(final_row['PIE_INCOME_COLLECTED_BY_MONTH'])
 
     print(f"\n  ✓ Final Result (Month 8): {final_collected:,} of {total_pie:,} accounts ({final_rate:.1f}%) collected income within 240 days")
 
-print(f"\n{'=' * 120}")
-print("OVERALL STMT 18+ (Account-Level - Deduped Across All Statements)")
-print(f"{'=' * 120}")
-
-overall_data = df[df['STATEMENT_NUMBER'] == 999].sort_values('MONTH_OFFSET')
-total_pie = int(overall_data.iloc[0]['PIE_TOTAL_COUNT'])
-
-print(f"\nTotal Unique PIE Accounts: {total_pie:,}")
-print(f"\n{'Month':<10} {'Days':<15} {'Collected':>12} {'Rate':>12} {'New This Month':>18}")
-print("-" * 120)
-
-for _, row in overall_data.iterrows():
-    month_label = int(row['MONTH_LABEL'])
-    days_start = int(row['MONTH_OFFSET']) * 30
-    days_end = (int(row['MONTH_OFFSET']) + 1) * 30
-    days = f"{days_start}-{days_end}"
-    collected = f"{int(row['PIE_INCOME_COLLECTED_BY_MONTH']):,}"
-    rate = f"{row['PIE_INCOME_COLLECTION_RATE_PCT']:.1f}%"
-    new_coll = f"{int(row['NEW_INCOME_COLLECTIONS_THIS_MONTH']):,}"
-
-    print(f"Month {month_label:<4} {days:<15} {collected:>12} {rate:>12} {new_coll:>18}")
-
-final_row = overall_data.iloc[-1]
-final_rate = final_row['PIE_INCOME_COLLECTION_RATE_PCT']
-final_collected = int(final_row['PIE_INCOME_COLLECTED_BY_MONTH'])
-
-print(f"\n  ✓ Final Result (Month 8): {final_collected:,} of {total_pie:,} accounts ({final_rate:.1f}%) collected income within 240 days")
-
-print("\n" + "=" * 120)
-print("KEY INSIGHTS")
-print("=" * 120)
-print("\n✓ ALL LINES use ACCOUNT-LEVEL methodology (each unique account counted once)")
-print("✓ Statement 18 has the highest collection rate (83.8% at Month 8)")
-print("✓ Overall Stmt 18+ represents 9,589 unique accounts (deduped across all statements)")
-print("✓ Most collection happens early: 35.5% by Month 1 (first 30 days)")
-print("✓ Collection rate reaches 58.7% by Month 8 (240 days after PIE)")
-print("=" * 120)
+    print("\n" + "=" * 120)
+    print("KEY INSIGHTS")
+    print("=" * 120)
+    print("\n✓ ALL LINES use ACCOUNT-LEVEL methodology (each unique account counted once)")
+    print("✓ Statement 18 has the highest collection rate (83.8% at Month 8)")
+    print("✓ Overall Stmt 18+ represents 9,589 unique accounts (deduped across all statements)")
+    print("✓ Most collection happens early: 35.5% by Month 1 (first 30 days)")
+    print("✓ Collection rate reaches 58.7% by Month 8 (240 days after PIE)")
+    print("=" * 120)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,9 @@
-import snowflake.connector
-import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
+from query_cache import cached_query
+from pipeline_args import parse_pipeline_args
 
-# Snowflake connection
-conn = snowflake.connector.connect(
-    user='ALFRED_LEE',
-    account='IJ90379-MISSIONLANE',
-    authenticator='externalbrowser',
-    database='EDW_DB',
-    schema='PUBLIC'
-)
+args = parse_pipeline_args()
 
 print("Running Overall Success Rate Over Time Analysis...")
 
@@ -18,11 +11,7 @@ print("Running Overall Success Rate Over Time Analysis...")
 with open('/Users/Alfred.Lee/Documents/github/pie_income_collection_over_time.sql', 'r') as f:
     query_time_stmt = f.read()
 
-cursor = conn.cursor()
-cursor.execute(query_time_stmt)
-df_time = pd.DataFrame(cursor.fetchall(), columns=[col[0] for col in cursor.description])
-cursor.close()
-conn.close()
+df_time = cached_query(query_time_stmt, args.params, refresh=args.refresh)
 
 print("Data loaded. Creating visualization...")
 
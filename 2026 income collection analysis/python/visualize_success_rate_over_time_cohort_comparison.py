@@ -1,22 +1,16 @@
-import snowflake.connector
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
+from query_cache import cached_queries
+from pipeline_args import parse_pipeline_args
 
-# Snowflake connection
-conn = snowflake.connector.connect(
-    user='ALFRED_LEE',
-    account='IJ90379-MISSIONLANE',
-    authenticator='externalbrowser',
-    database='EDW_DB',
-    schema='PUBLIC'
-)
+args = parse_pipeline_args()
 
 print("Running Multi-Cohort Success Rate Comparison...")
 
-# Load SQL query template
+# Load SQL query (cohort month is a bind parameter)
 with open('/Users/Alfred.Lee/Documents/github/2026 income collection analysis/sql/pie_income_collection_over_time.sql', 'r') as f:
-    query_template = f.read()
+    query = f.read()
 
 # Define cohorts to analyze
 cohorts = {
@@ -25,25 +19,21 @@ cohorts = {
     'May 2025': '2025-05-01'
 }
 
-# Load data for each cohort
-cohort_data = {}
-cursor = conn.cursor()
-
-for cohort_name, cohort_date in cohorts.items():
-    print(f"Loading data for {cohort_name}...")
-
-    # Replace the date in the query
-    query = query_template.replace("'2025-04-01'", f"'{cohort_date}'")
+# Load data for each cohort. Cohorts are submitted together and run
+# concurrently; the cohort month is bound, so the query text is identical.
+print(f"Loading data for {', '.join(cohorts)}...")
+frames = cached_queries(
+    [(query, {**args.params, 'cohort_month': cohort_date}) for cohort_date in cohorts.values()],
+    refresh=args.refresh,
+    max_concurrent=args.max_concurrent
+)
 
-    cursor.execute(query)
-    df = pd.DataFrame(cursor.fetchall(), columns=[col[0] for col in cursor.description])
+cohort_data = {}
+for cohort_name, df in zip(cohorts, frames):
     df['MONTH_LABEL'] = df['MONTH_OFFSET'] + 1
     df['COHORT'] = cohort_name
     cohort_data[cohort_name] = df
 
-cursor.close()
-conn.close()
-
 print("\nData loaded. Creating visualizations...")
 
 # Combine all cohort data
@@ -1,33 +1,47 @@
-import snowflake.connector
-import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
+from bootstrap_ci import add_confidence_bands
+from cohort_curves import curve_settings, fixed_success_curves, n_buckets
+from pipeline_args import parse_pipeline_args
+from survival_curves import cohort_is_mature, km_success_curves
 
-# Snowflake connection
-conn = snowflake.connector.connect(
-    user='ALFRED_LEE',
-    account='IJ90379-MISSIONLANE',
-    authenticator='externalbrowser',
-    database='EDW_DB',
-    schema='PUBLIC'
-)
+args = parse_pipeline_args()
 
 print("Running FIXED Overall Success Rate Over Time Analysis...")
 
-# Load FIXED time series data - uses corrected SQL
-with open('/Users/Alfred.Lee/Documents/github/2026 income collection analysis/sql/pie_income_collection_over_time_fixed.sql', 'r') as f:
-    query_time_stmt = f.read()
-
-cursor = conn.cursor()
-cursor.execute(query_time_stmt)
-df_time = pd.DataFrame(cursor.fetchall(), columns=[col[0] for col in cursor.description])
-cursor.close()
-conn.close()
+horizon_days, bucket_days = curve_settings(args.params)
+
+if cohort_is_mature(args.params):
+    # Load FIXED time series data - corrected methodology, curves computed locally
+    df_time = fixed_success_curves(args.params, refresh=args.refresh, local_incomes=not args.sql_incomes)
+
+    # 95% bootstrap bands for every curve point
+    df_time = add_confidence_bands(df_time)
+    band_note = 'Shaded bands: 95% bootstrap confidence intervals'
+    ci_label = '95% bootstrap CI'
+else:
+    # Cohort without full follow-up yet: Kaplan-Meier estimates censored at
+    # today, up to the longest follow-up, with Greenwood bands
+    df_time = km_success_curves(args.params, refresh=args.refresh)
+    df_time = df_time.dropna(subset=['SUCCESS_RATE_PCT'])
+    band_note = 'Immature cohort: Kaplan-Meier estimates censored at today, 95% Greenwood bands'
+    ci_label = '95% Greenwood CI'
+    print("Cohort follow-up incomplete - using Kaplan-Meier estimates")
 
 print("Data loaded. Creating visualization...")
 
 # Add month label (1-8 instead of 0-7)
 df_time['MONTH_LABEL'] = df_time['MONTH_OFFSET'] + 1
+month_labels = sorted(df_time['MONTH_LABEL'].unique())
+last_label = n_buckets(horizon_days, bucket_days)
+
+def day_range(month_offset):
+    """Days after PIE covered by a month offset, e.g. '30-60'"""
+    return f"{int(month_offset) * bucket_days}-{min((int(month_offset) + 1) * bucket_days, horizon_days)}"
+
+def as_count(value):
+    """Counts are whole numbers, except Kaplan-Meier estimates: round instead of truncating"""
+    return int(round(float(value)))
 
 # Define colors
 statement_colors = {
@@ -65,6 +79,8 @@ for stmt in statements:
     ax.plot(stmt_data['MONTH_LABEL'], stmt_data['SUCCESS_RATE_PCT'],
             marker='o', linewidth=3, label=label,
             color=statement_colors[stmt], markersize=10)
+    ax.fill_between(stmt_data['MONTH_LABEL'], stmt_data['SUCCESS_RATE_PCT_LOW'], stmt_data['SUCCESS_RATE_PCT_HIGH'],
+                    color=statement_colors[stmt], alpha=0.15, linewidth=0)
 
     # Add labels for start and end points
     start_val = stmt_data.iloc[0]['SUCCESS_RATE_PCT']
@@ -80,7 +96,7 @@ for stmt in statements:
                 bbox=dict(boxstyle='round,pad=0.3', facecolor='white', edgecolor=statement_colors[stmt], linewidth=1, alpha=0.8))
         label_positions.append((start_month, start_val))
 
-    # End label (Month 8)
+    # End label (last month shown)
     if can_add_label(end_month, end_val):
         ax.text(end_month, end_val, f'{end_val:.1f}%',
                 fontsize=11, ha='left', va='center',
@@ -93,6 +109,8 @@ overall_data = df_time[df_time['STATEMENT_NUMBER'] == 999].sort_values('MONTH_OF
 ax.plot(overall_data['MONTH_LABEL'], overall_data['SUCCESS_RATE_PCT'],
         marker='s', linewidth=3.5, label='Overall Stmt 18+ (Acct-Level)',
         color='black', markersize=12, linestyle='--', alpha=0.7)
+ax.fill_between(overall_data['MONTH_LABEL'], overall_data['SUCCESS_RATE_PCT_LOW'], overall_data['SUCCESS_RATE_PCT_HIGH'],
+                color='black', alpha=0.1, linewidth=0)
 
 # Add labels for overall line
 overall_start = overall_data.iloc[0]['SUCCESS_RATE_PCT']
@@ -121,12 +139,15 @@ ax.set_title('Approved Outright (Never PIE) + PIE with Income Collected',
 ax.legend(fontsize=13, loc='lower right', framealpha=0.95)
 ax.grid(True, alpha=0.3, linewidth=0.5)
 ax.set_ylim(70, 100)
-ax.set_xticks(range(1, 9))
-ax.set_xticklabels([f'Month {i}' for i in range(1, 9)], fontsize=12)
+if len(month_labels) <= 12:
+    ax.set_xticks(month_labels)
+    ax.set_xticklabels([f'Month {i}' for i in month_labels], fontsize=12)
 ax.tick_params(axis='y', labelsize=12)
 
 # Add annotation for time windows
-ax.text(0.02, 0.02, 'Time Windows: Month 1 = 0-30 days, Month 2 = 31-60 days, ... Month 8 = 211-240 days after PIE',
+ax.text(0.02, 0.02, f'Time Windows: Month 1 = 0-{bucket_days} days, Month 2 = {bucket_days + 1}-{2 * bucket_days} days, ... '
+        f'Month {last_label} = {(last_label - 1) * bucket_days + 1}-{horizon_days} days after PIE\n'
+        + band_note,
         transform=ax.transAxes, fontsize=11, style='italic', color='gray',
         bbox=dict(boxstyle='round,pad=0.5', facecolor='white', edgecolor='gray', alpha=0.8))
 
@@ -157,7 +178,7 @@ for stmt in statements:
     print(f"{'=' * 120}")
 
     stmt_data = df_time[df_time['STATEMENT_NUMBER'] == stmt].sort_values('MONTH_OFFSET')
-    total_pop = int(stmt_data.iloc[0]['TOTAL_POPULATION'])
+    total_pop = as_count(stmt_data.iloc[0]['TOTAL_POPULATION'])
 
     if stmt == 442:
         print(f"\nTotal Unique Accounts: {total_pop:,}")
@@ -168,24 +189,23 @@ for stmt in statements:
 
     for _, row in stmt_data.iterrows():
         month_label = int(row['MONTH_LABEL'])
-        days_start = int(row['MONTH_OFFSET']) * 30
-        days_end = (int(row['MONTH_OFFSET']) + 1) * 30
-        days = f"{days_start}-{days_end}"
+        days = day_range(row['MONTH_OFFSET'])
         success_rate = f"{row['SUCCESS_RATE_PCT']:.1f}%"
-        approved = f"{int(row['APPROVED_OUTRIGHT_COUNT']):,}"
-        pie_total = f"{int(row['PIE_TOTAL_COUNT']):,}"
-        pie_collected = f"{int(row['PIE_INCOME_COLLECTED_BY_MONTH']):,}"
+        approved = f"{as_count(row['APPROVED_OUTRIGHT_COUNT']):,}"
+        pie_total = f"{as_count(row['PIE_TOTAL_COUNT']):,}"
+        pie_collected = f"{as_count(row['PIE_INCOME_COLLECTED_BY_MONTH']):,}"
 
         print(f"Month {month_label:<4} {days:<15} {success_rate:>15} {approved:>12} {pie_total:>12} {pie_collected:>15}")
 
     # Final results
     final_row = stmt_data.iloc[-1]
     final_success = final_row['SUCCESS_RATE_PCT']
-    final_approved = int(final_row['APPROVED_OUTRIGHT_COUNT'])
-    final_pie_collected = int(final_row['PIE_INCOME_COLLECTED_BY_MONTH'])
+    final_approved = as_count(final_row['APPROVED_OUTRIGHT_COUNT'])
+    final_pie_collected = as_count(final_row['PIE_INCOME_COLLECTED_BY_MONTH'])
     final_total_success = final_approved + final_pie_collected
 
-    print(f"\n  ✓ Final Success Rate (Month 8): {final_success:.1f}%")
+    print(f"\n  ✓ Final Success Rate (Month {int(final_row['MONTH_LABEL'])}): {final_success:.1f}% "
+          f"({ci_label} {final_row['SUCCESS_RATE_PCT_LOW']:.1f}-{final_row['SUCCESS_RATE_PCT_HIGH']:.1f}%)")
     print(f"    - Approved Outright (Never PIE): {final_approved:,}")
     print(f"    - PIE with Income: {final_pie_collected:,}")
     if stmt == 442:
@@ -199,7 +219,7 @@ print("OVERALL STMT 18+ (Account-Level - Deduped Across All Statements)")
 print(f"{'=' * 120}")
 
 overall_data = df_time[df_time['STATEMENT_NUMBER'] == 999].sort_values('MONTH_OFFSET')
-total_pop = int(overall_data.iloc[0]['TOTAL_POPULATION'])
+total_pop = as_count(overall_data.iloc[0]['TOTAL_POPULATION'])
 
 print(f"\nTotal Unique Accounts: {total_pop:,}")
 print(f"\n{'Month':<10} {'Days':<15} {'Success Rate':>15} {'Approved':>12} {'PIE Total':>12} {'PIE Collected':>15}")
@@ -207,25 +227,24 @@ print("-" * 120)
 
 for _, row in overall_data.iterrows():
     month_label = int(row['MONTH_LABEL'])
-    days_start = int(row['MONTH_OFFSET']) * 30
-    days_end = (int(row['MONTH_OFFSET']) + 1) * 30
-    days = f"{days_start}-{days_end}"
+    days = day_range(row['MONTH_OFFSET'])
     success_rate = f"{row['SUCCESS_RATE_PCT']:.1f}%"
-    approved = f"{int(row['APPROVED_OUTRIGHT_COUNT']):,}"
-    pie_total = f"{int(row['PIE_TOTAL_COUNT']):,}"
-    pie_collected = f"{int(row['PIE_INCOME_COLLECTED_BY_MONTH']):,}"
+    approved = f"{as_count(row['APPROVED_OUTRIGHT_COUNT']):,}"
+    pie_total = f"{as_count(row['PIE_TOTAL_COUNT']):,}"
+    pie_collected = f"{as_count(row['PIE_INCOME_COLLECTED_BY_MONTH']):,}"
 
     print(f"Month {month_label:<4} {days:<15} {success_rate:>15} {approved:>12} {pie_total:>12} {pie_collected:>15}")
 
 # Final results
 final_row = overall_data.iloc[-1]
 final_success = final_row['SUCCESS_RATE_PCT']
-final_approved = int(final_row['APPROVED_OUTRIGHT_COUNT'])
-final_pie_total = int(final_row['PIE_TOTAL_COUNT'])
-final_pie_collected = int(final_row['PIE_INCOME_COLLECTED_BY_MONTH'])
+final_approved = as_count(final_row['APPROVED_OUTRIGHT_COUNT'])
+final_pie_total = as_count(final_row['PIE_TOTAL_COUNT'])
+final_pie_collected = as_count(final_row['PIE_INCOME_COLLECTED_BY_MONTH'])
 final_total_success = final_approved + final_pie_collected
 
-print(f"\n  ✓ Final Success Rate (Month 8): {final_success:.1f}%")
+print(f"\n  ✓ Final Success Rate (Month {int(final_row['MONTH_LABEL'])}): {final_success:.1f}% "
+      f"({ci_label} {final_row['SUCCESS_RATE_PCT_LOW']:.1f}-{final_row['SUCCESS_RATE_PCT_HIGH']:.1f}%)")
 print(f"    - Approved Outright (Never PIE): {final_approved:,} ({100.0*final_approved/total_pop:.1f}%)")
 print(f"    - PIE Total: {final_pie_total:,} ({100.0*final_pie_total/total_pop:.1f}%)")
 print(f"    - PIE with Income Collected: {final_pie_collected:,} ({100.0*final_pie_collected/final_pie_total:.1f}% of PIE)")
@@ -239,5 +258,5 @@ print("\n✓ Success Rate = (Approved Outright + PIE with Income Collected) / To
 print("✓ Approved Outright = Accounts that were NEVER PIE at any statement (FIXED)")
 print("✓ Individual statements (18, 26, 34) use statement-level methodology")
 print("✓ Stmt 42+ and Overall Stmt 18+ use account-level methodology (each unique account counted once)")
-print("✓ Most progress happens early, with steady gains through 8 months")
+print(f"✓ Most progress happens early, with steady gains through {last_label} months")
 print("=" * 120)
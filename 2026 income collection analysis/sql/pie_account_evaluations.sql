@@ -0,0 +1,51 @@
+-- ============================================================================
+-- PIE Account Evaluations - Every Evaluation of Accounts with PIE
+-- ============================================================================
+-- PURPOSE: All CLIP evaluations, from :month_start on, of the accounts that
+--          had a PRE_EVAL_APPROVED evaluation on a statement ending in
+--          [:month_start, :month_end). python/next_outcome.py sorts them by
+--          account and timestamp once and finds each PIE evaluation's next
+--          APPROVED / DECLINED / INELIGIBLE outcome within 8 statements in
+--          one forward scan, replacing the result_next_8_stmt and driver
+--          self-joins of CLIP_RESULTS_DATA in
+--          pie_income_collection_over_time_account_level.sql.
+--
+-- stmt_month is the month of the evaluation's statement end date (NULL if
+-- the statement is missing from account_statements; such rows can still be
+-- a next outcome). assigned_line_increase is
+-- DECISION_DATA:assigned_line_increase. On the offline backend the
+-- snapshots must cover the statement months after :month_end as well
+-- (python/snapshot_extract.py keeps DECLINED / INELIGIBLE rows for this).
+--
+-- PARAMETERS (bound at run time, see python/query_params.py):
+--   :month_start = '2025-04-01'
+--   :month_end   = '2025-05-01'
+-- ============================================================================
+
+with pie_accounts as (
+    select distinct clip.account_id
+    from EDW_DB.PUBLIC.CLIP_RESULTS_DATA clip
+    join EDW_DB.PUBLIC.account_statements stmt
+        on stmt.account_id = clip.account_id
+        and stmt.statement_num = clip.statement_number
+    where stmt.statement_end_dt >= :month_start::date
+      and stmt.statement_end_dt < :month_end::date
+      and clip.outcome = 'PRE_EVAL_APPROVED'
+)
+
+select
+    date_trunc(month, stmt.statement_end_dt) as stmt_month,
+    clip.account_id,
+    clip.statement_number,
+    clip.outcome,
+    clip.evaluated_timestamp,
+    clip.clip_amount,
+    clip.DECISION_DATA:assigned_line_increase::float as assigned_line_increase
+
+from EDW_DB.PUBLIC.CLIP_RESULTS_DATA clip
+join pie_accounts
+    on pie_accounts.account_id = clip.account_id
+left join EDW_DB.PUBLIC.account_statements stmt
+    on stmt.account_id = clip.account_id
+    and stmt.statement_num = clip.statement_number
+where clip.evaluated_timestamp >= :month_start::date;
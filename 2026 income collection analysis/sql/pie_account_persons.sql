@@ -0,0 +1,32 @@
+-- ============================================================================
+-- PIE Account Persons - One Row per Account x Person of Accounts with PIE
+-- ============================================================================
+-- PURPOSE: The persons on the accounts of pie_account_evaluations.sql, so
+--          python/next_outcome.py can look up each PIE evaluation's first
+--          income update across the account's persons in a local income
+--          index (python/income_index.py), replacing the
+--          income_updates_after_pie join of CLIP_USER_INCOMES in
+--          pie_income_collection_over_time_account_level.sql.
+--
+-- PARAMETERS (bound at run time, see python/query_params.py):
+--   :month_start = '2025-04-01'
+--   :month_end   = '2025-05-01'
+-- ============================================================================
+
+with pie_accounts as (
+    select distinct clip.account_id
+    from EDW_DB.PUBLIC.CLIP_RESULTS_DATA clip
+    join EDW_DB.PUBLIC.account_statements stmt
+        on stmt.account_id = clip.account_id
+        and stmt.statement_num = clip.statement_number
+    where stmt.statement_end_dt >= :month_start::date
+      and stmt.statement_end_dt < :month_end::date
+      and clip.outcome = 'PRE_EVAL_APPROVED'
+)
+
+select distinct
+    acb.ACCOUNT_ID,
+    acb.PERSON_ID
+from EDW_DB.PUBLIC.ACCOUNTS_CUSTOMERS_BRIDGE acb
+join pie_accounts
+    on pie_accounts.account_id = acb.ACCOUNT_ID;
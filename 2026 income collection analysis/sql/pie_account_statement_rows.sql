@@ -0,0 +1,40 @@
+-- ============================================================================
+-- PIE Account-Level Rows - Every Evaluation, No Dedup
+-- ============================================================================
+-- PURPOSE: Raw Stmt 18+ evaluation rows (one per evaluation and person) of
+--          every statement month in [:month_start, :month_end), loaded by
+--          python/account_state.py. AccountState.dedup() then keeps one row
+--          per cohort month x account x statement (PIE preferred, then the
+--          lowest PERSON_ID) and derives had_pie_in_month in one pass, so the
+--          qualify row_number() and max(...) over windows of each base
+--          population run once locally for all cohort months.
+--
+-- cohort_month is the month of the statement end date. There is no
+-- days_to_collection column: first incomes come from python/income_index.py.
+-- clip_amount is the line increase at stake (eligible amount on PIE rows,
+-- granted amount on APPROVED rows), the exposure weight of the curves.
+--
+-- PARAMETERS (bound at run time, see python/query_params.py):
+--   :month_start = '2024-11-01'
+--   :month_end   = '2026-01-01'
+-- ============================================================================
+
+select
+    date_trunc(month, stmt.statement_end_dt) as cohort_month,
+    clip.account_id,
+    acb.PERSON_ID,
+    clip.statement_number,
+    clip.outcome,
+    clip.evaluated_timestamp,
+    clip.clip_amount
+
+from EDW_DB.PUBLIC.CLIP_RESULTS_DATA clip
+join EDW_DB.PUBLIC.account_statements stmt
+    on stmt.account_id = clip.account_id
+    and stmt.statement_num = clip.statement_number
+join EDW_DB.PUBLIC.ACCOUNTS_CUSTOMERS_BRIDGE acb
+    on clip.account_id = acb.ACCOUNT_ID
+where stmt.statement_end_dt >= :month_start::date
+  and stmt.statement_end_dt < :month_end::date
+  and clip.outcome in ('APPROVED', 'PRE_EVAL_APPROVED')
+  and clip.statement_number >= 18;
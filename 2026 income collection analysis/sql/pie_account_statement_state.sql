@@ -0,0 +1,81 @@
+-- ============================================================================
+-- PIE Account-Level State - One Row per Account x Statement
+-- ============================================================================
+-- PURPOSE: Narrow export of the Stmt 18+ base population of a cohort month,
+--          loaded by python/account_state.py into compact arrays
+--          (int32 account/person ids, int8 outcome, int16 statement,
+--          int16 cohort month, int32 eval day, int16 days to first income)
+--
+-- ROWS: Deduplicated as in base_population of
+--       pie_income_collection_over_time_fixed.sql: one row per account and
+--       statement, PIE preferred over APPROVED, then the lowest PERSON_ID
+--
+-- days_to_collection: calendar days from the evaluation to the first valid
+-- income of the row's person within the horizon; NULL for APPROVED rows and
+-- PIE rows without income
+--
+-- PARAMETERS (bound at run time, see python/query_params.py):
+--   :cohort_month  = '2025-04-01'
+--   :horizon_days  = 240
+-- ============================================================================
+
+with base_population as (
+    select
+        date_trunc(month, stmt.statement_end_dt) as cohort_month,
+        clip.account_id,
+        acb.PERSON_ID,
+        clip.statement_number,
+        clip.outcome,
+        clip.evaluated_timestamp,
+        max(case when clip.outcome = 'PRE_EVAL_APPROVED' then 1 else 0 end) over (
+            partition by clip.account_id, clip.statement_number
+        ) as had_pie_in_month
+
+    from EDW_DB.PUBLIC.CLIP_RESULTS_DATA clip
+    join EDW_DB.PUBLIC.account_statements stmt
+        on stmt.account_id = clip.account_id
+        and stmt.statement_num = clip.statement_number
+    join EDW_DB.PUBLIC.ACCOUNTS_CUSTOMERS_BRIDGE acb
+        on clip.account_id = acb.ACCOUNT_ID
+    where date_trunc(month, stmt.statement_end_dt) = :cohort_month
+      and clip.outcome in ('APPROVED', 'PRE_EVAL_APPROVED')
+      and clip.statement_number >= 18
+
+    qualify row_number() over (
+        partition by clip.account_id, clip.statement_number
+        order by case when clip.outcome = 'PRE_EVAL_APPROVED' then 0 else 1 end, acb.PERSON_ID
+    ) = 1
+),
+
+first_income as (
+    select
+        base.account_id,
+        base.statement_number,
+        datediff(day, base.evaluated_timestamp, inc.CREATED_AT) as days_to_collection
+
+    from base_population base
+    join EDW_DB.PUBLIC.CLIP_USER_INCOMES inc
+        on base.PERSON_ID = inc.PERSON_ID
+    where base.had_pie_in_month = 1
+      and inc.CREATED_AT > base.evaluated_timestamp
+      and inc.CREATED_AT <= DATEADD(day, :horizon_days, base.evaluated_timestamp)
+      and inc.annual_income IS NOT NULL
+
+    qualify row_number() over (
+        partition by base.account_id, base.statement_number
+        order by inc.CREATED_AT
+    ) = 1
+)
+
+select
+    base.cohort_month,
+    base.account_id,
+    base.PERSON_ID,
+    base.statement_number,
+    base.outcome,
+    base.evaluated_timestamp,
+    inc.days_to_collection
+from base_population base
+left join first_income inc
+    on base.account_id = inc.account_id
+    and base.statement_number = inc.statement_number;
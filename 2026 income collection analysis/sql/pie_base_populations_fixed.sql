@@ -0,0 +1,147 @@
+-- ============================================================================
+-- PIE Income Collection - Base Populations (FIXED methodology)
+-- ============================================================================
+-- PURPOSE: The three base populations of
+--          pie_income_collection_over_time_fixed.sql with no income join.
+--          python/cohort_curves.py looks up each row's first income in an
+--          IncomeIndex (python/income_index.py) loaded once from
+--          pie_valid_incomes.sql, instead of joining CLIP_USER_INCOMES in
+--          every income CTE.
+--
+-- GROUPS (statement_number):
+--   - Individual statements (18, 26, 34, 42): Statement-level methodology
+--   - 999 = Overall Stmt 18+: Account-level methodology
+--   - 442 = Stmt 42+: Account-level methodology
+--
+-- evaluated_timestamp is the statement's evaluation for individual
+-- statements and the earliest evaluation for the account-level groups.
+-- clip_amount is the row's exposure: the kept evaluation's amount for
+-- individual statements; for the account-level groups the largest PIE
+-- amount if the account had PIE, else the largest approved amount.
+-- Account-level groups have one row per account and person.
+--
+-- PARAMETERS (bound at run time, see python/query_params.py):
+--   :cohort_month  = '2025-04-01'
+--   :statement_set = [18, 26, 34, 42]
+-- ============================================================================
+
+with base_population as (
+    -- ========================================================================
+    -- BASE POPULATION: PIE accounts at specific statements in April 2025
+    -- ========================================================================
+    select
+        date_trunc(month, stmt.statement_end_dt) as stmt_month,
+        clip.account_id,
+        clip.statement_number,
+        clip.outcome,
+        clip.evaluated_timestamp,
+        clip.clip_amount,
+        acb.PERSON_ID,
+
+        -- PIE Flag: 1 if this account had PIE at any point this month/statement
+        max(case when clip.outcome = 'PRE_EVAL_APPROVED' then 1 else 0 end) over (
+            partition by clip.account_id, date_trunc(month, stmt.statement_end_dt), clip.statement_number
+        ) as had_pie_in_month
+
+    from EDW_DB.PUBLIC.CLIP_RESULTS_DATA clip
+    join EDW_DB.PUBLIC.account_statements stmt
+        on stmt.account_id = clip.account_id
+        and stmt.statement_num = clip.statement_number
+    join EDW_DB.PUBLIC.ACCOUNTS_CUSTOMERS_BRIDGE acb
+        on clip.account_id = acb.ACCOUNT_ID
+    where date_trunc(month, stmt.statement_end_dt) = :cohort_month  -- Cohort month (default April 2025)
+      and clip.outcome in ('APPROVED', 'PRE_EVAL_APPROVED')
+      and array_contains(clip.statement_number::variant, parse_json(:statement_set))
+
+    -- Deduplicate: prioritize PIE if account has both PIE and APPROVED
+    qualify row_number() over (
+        partition by clip.account_id, date_trunc(month, stmt.statement_end_dt), clip.statement_number
+        order by case when clip.outcome = 'PRE_EVAL_APPROVED' then 0 else 1 end, acb.PERSON_ID
+    ) = 1
+),
+
+base_population_overall as (
+    -- ========================================================================
+    -- OVERALL BASE: Account-level across all Stmt 18+
+    -- FIXED: Approved outright now correctly excludes accounts with PIE
+    -- ========================================================================
+    select
+        clip.account_id,
+        min(clip.evaluated_timestamp) as earliest_evaluation,
+        acb.PERSON_ID,
+        -- Account has PIE if they were EVER PIE at any Stmt 18+
+        max(case when clip.outcome = 'PRE_EVAL_APPROVED' then 1 else 0 end) as had_pie,
+        -- Exposure: the amount blocked by PIE, else the amount approved
+        coalesce(max(case when clip.outcome = 'PRE_EVAL_APPROVED' then clip.clip_amount end), max(clip.clip_amount)) as clip_amount
+
+    from EDW_DB.PUBLIC.CLIP_RESULTS_DATA clip
+    join EDW_DB.PUBLIC.account_statements stmt
+        on stmt.account_id = clip.account_id
+        and stmt.statement_num = clip.statement_number
+    join EDW_DB.PUBLIC.ACCOUNTS_CUSTOMERS_BRIDGE acb
+        on clip.account_id = acb.ACCOUNT_ID
+    where date_trunc(month, stmt.statement_end_dt) = :cohort_month
+      and clip.outcome in ('APPROVED', 'PRE_EVAL_APPROVED')
+      and clip.statement_number >= 18
+    group by clip.account_id, acb.PERSON_ID
+),
+
+base_population_42plus as (
+    -- ========================================================================
+    -- STMT 42+ BASE: Account-level across all Stmt 42+
+    -- FIXED: Approved outright now correctly excludes accounts with PIE
+    -- ========================================================================
+    select
+        clip.account_id,
+        min(clip.evaluated_timestamp) as earliest_evaluation,
+        acb.PERSON_ID,
+        -- Account has PIE if they were EVER PIE at any Stmt 42+
+        max(case when clip.outcome = 'PRE_EVAL_APPROVED' then 1 else 0 end) as had_pie,
+        -- Exposure: the amount blocked by PIE, else the amount approved
+        coalesce(max(case when clip.outcome = 'PRE_EVAL_APPROVED' then clip.clip_amount end), max(clip.clip_amount)) as clip_amount
+
+    from EDW_DB.PUBLIC.CLIP_RESULTS_DATA clip
+    join EDW_DB.PUBLIC.account_statements stmt
+        on stmt.account_id = clip.account_id
+        and stmt.statement_num = clip.statement_number
+    join EDW_DB.PUBLIC.ACCOUNTS_CUSTOMERS_BRIDGE acb
+        on clip.account_id = acb.ACCOUNT_ID
+    where date_trunc(month, stmt.statement_end_dt) = :cohort_month
+      and clip.outcome in ('APPROVED', 'PRE_EVAL_APPROVED')
+      and clip.statement_number >= 42
+    group by clip.account_id, acb.PERSON_ID
+)
+
+-- ============================================================================
+-- FINAL OUTPUT: One row per base row and group
+-- ============================================================================
+select
+    base.statement_number,
+    base.account_id,
+    base.PERSON_ID,
+    base.had_pie_in_month as had_pie,
+    base.evaluated_timestamp,
+    base.clip_amount
+from base_population base
+
+union all
+
+select
+    999 as statement_number,
+    base.account_id,
+    base.PERSON_ID,
+    base.had_pie,
+    base.earliest_evaluation as evaluated_timestamp,
+    base.clip_amount
+from base_population_overall base
+
+union all
+
+select
+    442 as statement_number,
+    base.account_id,
+    base.PERSON_ID,
+    base.had_pie,
+    base.earliest_evaluation as evaluated_timestamp,
+    base.clip_amount
+from base_population_42plus base;
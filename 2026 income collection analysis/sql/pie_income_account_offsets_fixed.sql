@@ -0,0 +1,237 @@
+-- ============================================================================
+-- PIE Income Collection - Per-Account Collection Offsets (FIXED methodology)
+-- ============================================================================
+-- PURPOSE: One row per account in each cohort group of
+--          pie_income_collection_over_time_fixed.sql, with its PIE flag and
+--          the days from evaluation to its first income update. The monthly
+--          curves are computed locally from these rows by
+--          python/cohort_curves.py instead of cross joining every account
+--          with month_series.
+--
+-- GROUPS (statement_number):
+--   - Individual statements (18, 26, 34, 42): Statement-level methodology
+--   - 999 = Overall Stmt 18+: Account-level methodology
+--   - 442 = Stmt 42+: Account-level methodology
+--
+-- clip_amount is the account's exposure in the group (see
+-- pie_base_populations_fixed.sql), the weight of the dollar curves.
+--
+-- days_to_collection (calendar days, as datediff(day, ...)) and
+-- seconds_to_collection are NULL when no valid income arrived within the
+-- horizon (or the account never had PIE). Fetched once with a long horizon,
+-- they give the curves for any shorter horizon and any bucket width.
+--
+-- PARAMETERS (bound at run time, see python/query_params.py):
+--   :cohort_month  = '2025-04-01'
+--   :statement_set = [18, 26, 34, 42]
+--   :horizon_days  = 240
+-- ============================================================================
+
+with base_population as (
+    -- ========================================================================
+    -- BASE POPULATION: PIE accounts at specific statements in April 2025
+    -- ========================================================================
+    select
+        date_trunc(month, stmt.statement_end_dt) as stmt_month,
+        clip.account_id,
+        clip.statement_number,
+        clip.outcome,
+        clip.evaluated_timestamp,
+        clip.clip_amount,
+        acb.PERSON_ID,
+
+        -- PIE Flag: 1 if this account had PIE at any point this month/statement
+        max(case when clip.outcome = 'PRE_EVAL_APPROVED' then 1 else 0 end) over (
+            partition by clip.account_id, date_trunc(month, stmt.statement_end_dt), clip.statement_number
+        ) as had_pie_in_month
+
+    from EDW_DB.PUBLIC.CLIP_RESULTS_DATA clip
+    join EDW_DB.PUBLIC.account_statements stmt
+        on stmt.account_id = clip.account_id
+        and stmt.statement_num = clip.statement_number
+    join EDW_DB.PUBLIC.ACCOUNTS_CUSTOMERS_BRIDGE acb
+        on clip.account_id = acb.ACCOUNT_ID
+    where date_trunc(month, stmt.statement_end_dt) = :cohort_month  -- Cohort month (default April 2025)
+      and clip.outcome in ('APPROVED', 'PRE_EVAL_APPROVED')
+      and array_contains(clip.statement_number::variant, parse_json(:statement_set))
+
+    -- Deduplicate: prioritize PIE if account has both PIE and APPROVED
+    qualify row_number() over (
+        partition by clip.account_id, date_trunc(month, stmt.statement_end_dt), clip.statement_number
+        order by case when clip.outcome = 'PRE_EVAL_APPROVED' then 0 else 1 end, acb.PERSON_ID
+    ) = 1
+),
+
+base_population_overall as (
+    -- ========================================================================
+    -- OVERALL BASE: Account-level across all Stmt 18+
+    -- FIXED: Approved outright now correctly excludes accounts with PIE
+    -- ========================================================================
+    select
+        clip.account_id,
+        min(clip.evaluated_timestamp) as earliest_evaluation,
+        acb.PERSON_ID,
+        -- Account has PIE if they were EVER PIE at any Stmt 18+
+        max(case when clip.outcome = 'PRE_EVAL_APPROVED' then 1 else 0 end) as had_pie,
+        -- Exposure: the amount blocked by PIE, else the amount approved
+        coalesce(max(case when clip.outcome = 'PRE_EVAL_APPROVED' then clip.clip_amount end), max(clip.clip_amount)) as clip_amount
+
+    from EDW_DB.PUBLIC.CLIP_RESULTS_DATA clip
+    join EDW_DB.PUBLIC.account_statements stmt
+        on stmt.account_id = clip.account_id
+        and stmt.statement_num = clip.statement_number
+    join EDW_DB.PUBLIC.ACCOUNTS_CUSTOMERS_BRIDGE acb
+        on clip.account_id = acb.ACCOUNT_ID
+    where date_trunc(month, stmt.statement_end_dt) = :cohort_month
+      and clip.outcome in ('APPROVED', 'PRE_EVAL_APPROVED')
+      and clip.statement_number >= 18
+    group by clip.account_id, acb.PERSON_ID
+),
+
+base_population_42plus as (
+    -- ========================================================================
+    -- STMT 42+ BASE: Account-level across all Stmt 42+
+    -- FIXED: Approved outright now correctly excludes accounts with PIE
+    -- ========================================================================
+    select
+        clip.account_id,
+        min(clip.evaluated_timestamp) as earliest_evaluation,
+        acb.PERSON_ID,
+        -- Account has PIE if they were EVER PIE at any Stmt 42+
+        max(case when clip.outcome = 'PRE_EVAL_APPROVED' then 1 else 0 end) as had_pie,
+        -- Exposure: the amount blocked by PIE, else the amount approved
+        coalesce(max(case when clip.outcome = 'PRE_EVAL_APPROVED' then clip.clip_amount end), max(clip.clip_amount)) as clip_amount
+
+    from EDW_DB.PUBLIC.CLIP_RESULTS_DATA clip
+    join EDW_DB.PUBLIC.account_statements stmt
+        on stmt.account_id = clip.account_id
+        and stmt.statement_num = clip.statement_number
+    join EDW_DB.PUBLIC.ACCOUNTS_CUSTOMERS_BRIDGE acb
+        on clip.account_id = acb.ACCOUNT_ID
+    where date_trunc(month, stmt.statement_end_dt) = :cohort_month
+      and clip.outcome in ('APPROVED', 'PRE_EVAL_APPROVED')
+      and clip.statement_number >= 42
+    group by clip.account_id, acb.PERSON_ID
+),
+
+income_by_month as (
+    -- ========================================================================
+    -- INCOME COLLECTION: Track WHEN income was collected (days after PIE)
+    -- ========================================================================
+    select
+        base.account_id,
+        base.statement_number,
+        base.had_pie_in_month,
+        inc.CREATED_AT as income_collected_at,
+        datediff(day, base.evaluated_timestamp, inc.CREATED_AT) as days_to_collection,
+        datediff(second, base.evaluated_timestamp, inc.CREATED_AT) as seconds_to_collection
+
+    from base_population base
+    left join EDW_DB.PUBLIC.CLIP_USER_INCOMES inc
+        on base.PERSON_ID = inc.PERSON_ID
+        and base.had_pie_in_month = 1  -- Only track PIE accounts
+        and inc.CREATED_AT > base.evaluated_timestamp  -- Income AFTER PIE event
+        and inc.CREATED_AT <= DATEADD(day, :horizon_days, base.evaluated_timestamp)  -- Within the horizon (default 240 days)
+        and inc.annual_income IS NOT NULL
+
+    -- Keep only FIRST income update per account/statement
+    qualify row_number() over (
+        partition by base.account_id, base.statement_number
+        order by inc.CREATED_AT
+    ) = 1
+),
+
+income_by_month_overall as (
+    -- ========================================================================
+    -- INCOME COLLECTION: Overall account-level
+    -- ========================================================================
+    select
+        base.account_id,
+        inc.CREATED_AT as income_collected_at,
+        datediff(day, base.earliest_evaluation, inc.CREATED_AT) as days_to_collection,
+        datediff(second, base.earliest_evaluation, inc.CREATED_AT) as seconds_to_collection
+
+    from base_population_overall base
+    left join EDW_DB.PUBLIC.CLIP_USER_INCOMES inc
+        on base.PERSON_ID = inc.PERSON_ID
+        and base.had_pie = 1  -- Only track if account had PIE
+        and inc.CREATED_AT > base.earliest_evaluation
+        and inc.CREATED_AT <= DATEADD(day, :horizon_days, base.earliest_evaluation)
+        and inc.annual_income IS NOT NULL
+
+    -- Keep only FIRST income update per account
+    qualify row_number() over (
+        partition by base.account_id
+        order by inc.CREATED_AT
+    ) = 1
+),
+
+income_by_month_42plus as (
+    -- ========================================================================
+    -- INCOME COLLECTION: Stmt 42+ account-level
+    -- ========================================================================
+    select
+        base.account_id,
+        inc.CREATED_AT as income_collected_at,
+        datediff(day, base.earliest_evaluation, inc.CREATED_AT) as days_to_collection,
+        datediff(second, base.earliest_evaluation, inc.CREATED_AT) as seconds_to_collection
+
+    from base_population_42plus base
+    left join EDW_DB.PUBLIC.CLIP_USER_INCOMES inc
+        on base.PERSON_ID = inc.PERSON_ID
+        and base.had_pie = 1  -- Only track if account had PIE
+        and inc.CREATED_AT > base.earliest_evaluation
+        and inc.CREATED_AT <= DATEADD(day, :horizon_days, base.earliest_evaluation)
+        and inc.annual_income IS NOT NULL
+
+    -- Keep only FIRST income update per account
+    qualify row_number() over (
+        partition by base.account_id
+        order by inc.CREATED_AT
+    ) = 1
+)
+
+-- ============================================================================
+-- FINAL OUTPUT: One row per account and group
+-- ============================================================================
+select
+    base.statement_number,
+    base.account_id,
+    base.had_pie_in_month as had_pie,
+    base.clip_amount,
+    inc.days_to_collection,
+    inc.seconds_to_collection
+from base_population base
+left join income_by_month inc
+    on base.account_id = inc.account_id
+    and base.statement_number = inc.statement_number
+
+union all
+
+-- Account-level groups have one base row per account and person;
+-- the income CTEs already keep the first income across persons
+select
+    999 as statement_number,
+    base.account_id,
+    max(base.had_pie) as had_pie,
+    max(base.clip_amount) as clip_amount,
+    min(inc.days_to_collection) as days_to_collection,
+    min(inc.seconds_to_collection) as seconds_to_collection
+from base_population_overall base
+left join income_by_month_overall inc
+    on base.account_id = inc.account_id
+group by base.account_id
+
+union all
+
+select
+    442 as statement_number,
+    base.account_id,
+    max(base.had_pie) as had_pie,
+    max(base.clip_amount) as clip_amount,
+    min(inc.days_to_collection) as days_to_collection,
+    min(inc.seconds_to_collection) as seconds_to_collection
+from base_population_42plus base
+left join income_by_month_42plus inc
+    on base.account_id = inc.account_id
+group by base.account_id;
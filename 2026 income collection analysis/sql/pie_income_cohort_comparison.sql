@@ -8,6 +8,11 @@
 --   - All within 1 year (income records still exist)
 --   - All have 8+ months of follow-up data (as of Feb 2026)
 --   - Can compare if performance varies by cohort timing
+--
+-- PARAMETERS (bound at run time, see python/query_params.py):
+--   :cohort_months = ['2025-03-01', '2025-04-01', '2025-05-01']
+--   :statement_set = [18, 26, 34, 42]
+--   :horizon_days  = 240
 -- ============================================================================
 
 with base_population as (
@@ -27,9 +32,9 @@ with base_population as (
         and stmt.statement_num = clip.statement_number
     join EDW_DB.PUBLIC.ACCOUNTS_CUSTOMERS_BRIDGE acb
         on clip.account_id = acb.ACCOUNT_ID
-    where date_trunc(month, stmt.statement_end_dt) in ('2025-03-01', '2025-04-01', '2025-05-01')  -- Mar, Apr, May 2025
+    where array_contains(to_char(date_trunc(month, stmt.statement_end_dt), 'YYYY-MM-DD')::variant, parse_json(:cohort_months))  -- Default Mar, Apr, May 2025
       and clip.outcome in ('APPROVED', 'PRE_EVAL_APPROVED')
-      and clip.statement_number in (18, 26, 34, 42)
+      and array_contains(clip.statement_number::variant, parse_json(:statement_set))
     qualify row_number() over (
         partition by clip.account_id, date_trunc(month, stmt.statement_end_dt), clip.statement_number
         order by case when clip.outcome = 'PRE_EVAL_APPROVED' then 0 else 1 end, acb.PERSON_ID
@@ -47,7 +52,7 @@ income_collected as (
         on base.PERSON_ID = inc.PERSON_ID
     where base.had_pie_in_month = 1
       and inc.CREATED_AT > base.evaluated_timestamp
-      and inc.CREATED_AT <= DATEADD(day, 240, base.evaluated_timestamp)
+      and inc.CREATED_AT <= DATEADD(day, :horizon_days, base.evaluated_timestamp)
       and inc.annual_income IS NOT NULL
     qualify row_number() over (
         partition by base.account_id, base.stmt_month, base.statement_number
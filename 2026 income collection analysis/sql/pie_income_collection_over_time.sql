@@ -12,6 +12,12 @@
 --   - Month 1: 31-60 days after PIE
 --   - Month 2: 61-90 days after PIE
 --   - ... up to Month 8: 211-240 days after PIE
+--
+-- PARAMETERS (bound at run time, see python/query_params.py):
+--   :cohort_month  = '2025-04-01'
+--   :statement_set = [18, 26, 34, 42]
+--   :horizon_days  = 240
+--   :bucket_days   = 30
 -- ============================================================================
 
 with base_population as (
@@ -37,9 +43,9 @@ with base_population as (
         and stmt.statement_num = clip.statement_number
     join EDW_DB.PUBLIC.ACCOUNTS_CUSTOMERS_BRIDGE acb
         on clip.account_id = acb.ACCOUNT_ID
-    where date_trunc(month, stmt.statement_end_dt) = '2025-04-01'  -- April 2025 cohort
+    where date_trunc(month, stmt.statement_end_dt) = :cohort_month  -- Cohort month (default April 2025)
       and clip.outcome in ('APPROVED', 'PRE_EVAL_APPROVED')
-      and clip.statement_number in (18, 26, 34, 42)
+      and array_contains(clip.statement_number::variant, parse_json(:statement_set))
 
     -- Deduplicate: prioritize PIE if account has both PIE and APPROVED
     qualify row_number() over (
@@ -67,7 +73,7 @@ base_population_overall as (
         and stmt.statement_num = clip.statement_number
     join EDW_DB.PUBLIC.ACCOUNTS_CUSTOMERS_BRIDGE acb
         on clip.account_id = acb.ACCOUNT_ID
-    where date_trunc(month, stmt.statement_end_dt) = '2025-04-01'
+    where date_trunc(month, stmt.statement_end_dt) = :cohort_month
       and clip.outcome in ('APPROVED', 'PRE_EVAL_APPROVED')
       and clip.statement_number >= 18
     group by clip.account_id, acb.PERSON_ID
@@ -92,7 +98,7 @@ base_population_42plus as (
         and stmt.statement_num = clip.statement_number
     join EDW_DB.PUBLIC.ACCOUNTS_CUSTOMERS_BRIDGE acb
         on clip.account_id = acb.ACCOUNT_ID
-    where date_trunc(month, stmt.statement_end_dt) = '2025-04-01'
+    where date_trunc(month, stmt.statement_end_dt) = :cohort_month
       and clip.outcome in ('APPROVED', 'PRE_EVAL_APPROVED')
       and clip.statement_number >= 42
     group by clip.account_id, acb.PERSON_ID
@@ -109,14 +115,14 @@ income_by_month as (
         inc.CREATED_AT as income_collected_at,
         datediff(day, base.evaluated_timestamp, inc.CREATED_AT) as days_to_collection,
         -- 30-day rolling windows: 0-30=Month 0, 31-60=Month 1, etc.
-        floor(datediff(day, base.evaluated_timestamp, inc.CREATED_AT) / 30) as months_to_collection
+        floor(datediff(day, base.evaluated_timestamp, inc.CREATED_AT) / :bucket_days) as months_to_collection
 
     from base_population base
     left join EDW_DB.PUBLIC.CLIP_USER_INCOMES inc
         on base.PERSON_ID = inc.PERSON_ID
         and base.had_pie_in_month = 1  -- Only track PIE accounts
         and inc.CREATED_AT > base.evaluated_timestamp  -- Income AFTER PIE event
-        and inc.CREATED_AT <= DATEADD(day, 240, base.evaluated_timestamp)  -- Within 240 days (8x30)
+        and inc.CREATED_AT <= DATEADD(day, :horizon_days, base.evaluated_timestamp)  -- Within the horizon (default 240 days)
         and inc.annual_income IS NOT NULL
 
     -- Keep only FIRST income update per account/statement
@@ -134,14 +140,14 @@ income_by_month_overall as (
         base.account_id,
         inc.CREATED_AT as income_collected_at,
         datediff(day, base.earliest_evaluation, inc.CREATED_AT) as days_to_collection,
-        floor(datediff(day, base.earliest_evaluation, inc.CREATED_AT) / 30) as months_to_collection
+        floor(datediff(day, base.earliest_evaluation, inc.CREATED_AT) / :bucket_days) as months_to_collection
 
     from base_population_overall base
     left join EDW_DB.PUBLIC.CLIP_USER_INCOMES inc
         on base.PERSON_ID = inc.PERSON_ID
         and base.had_pie = 1  -- Only track if account had PIE
         and inc.CREATED_AT > base.earliest_evaluation
-        and inc.CREATED_AT <= DATEADD(day, 240, base.earliest_evaluation)
+        and inc.CREATED_AT <= DATEADD(day, :horizon_days, base.earliest_evaluation)
         and inc.annual_income IS NOT NULL
 
     -- Keep only FIRST income update per account
@@ -159,14 +165,14 @@ income_by_month_42plus as (
         base.account_id,
         inc.CREATED_AT as income_collected_at,
         datediff(day, base.earliest_evaluation, inc.CREATED_AT) as days_to_collection,
-        floor(datediff(day, base.earliest_evaluation, inc.CREATED_AT) / 30) as months_to_collection
+        floor(datediff(day, base.earliest_evaluation, inc.CREATED_AT) / :bucket_days) as months_to_collection
 
     from base_population_42plus base
     left join EDW_DB.PUBLIC.CLIP_USER_INCOMES inc
         on base.PERSON_ID = inc.PERSON_ID
         and base.had_pie = 1  -- Only track if account had PIE
         and inc.CREATED_AT > base.earliest_evaluation
-        and inc.CREATED_AT <= DATEADD(day, 240, base.earliest_evaluation)
+        and inc.CREATED_AT <= DATEADD(day, :horizon_days, base.earliest_evaluation)
         and inc.annual_income IS NOT NULL
 
     -- Keep only FIRST income update per account
@@ -177,11 +183,12 @@ income_by_month_42plus as (
 ),
 
 month_series as (
-    -- Generate series 0-7 representing months after PIE evaluation
-    -- Will be displayed as Month 1-8 (Month 1 = 0-30 days, Month 8 = 211-240 days)
-    select 0 as month_offset union all
-    select 1 union all select 2 union all select 3 union all select 4 union all
-    select 5 union all select 6 union all select 7
+    -- One row per bucket after PIE evaluation: 0 .. ceil(:horizon_days / :bucket_days) - 1
+    -- (at most 366; query_params.py rejects larger grids)
+    -- Displayed as Month 1-N (defaults: Month 1 = 0-30 days, Month 8 = 211-240 days)
+    select row_number() over (order by seq4()) - 1 as month_offset
+    from table(generator(rowcount => 366))
+    qualify month_offset < ceil(:horizon_days / :bucket_days)
 ),
 
 cumulative_success as (
@@ -397,6 +397,7 @@ on a.stmt_month = b.stmt_month and a.orig_statement_number = b.statement_number
 SET EVAL_START_DATE = '2024-11-01';
 SET EVAL_END_DATE = '2025-12-31';
 
+-- name: income_validation
 CREATE OR REPLACE TEMPORARY TABLE INCOME_VALIDATION AS (
 WITH StatementAccounts AS (
     SELECT
@@ -930,6 +931,7 @@ select * from EDW_DB.PUBLIC.CLIP_RESULTS_DATA  limit 100;
 --   - ... up to Month 8: 211-240 days after PIE
 -- ============================================================================
 
+-- name: account_level_over_time
 with base_population as (
     -- ========================================================================
     -- BASE POPULATION: Get PIE accounts, deduplicated at account level
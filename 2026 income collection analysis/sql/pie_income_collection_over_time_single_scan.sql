@@ -0,0 +1,190 @@
+-- ============================================================================
+-- PIE Income Collection Over Time - Single Scan (FIXED methodology)
+-- ============================================================================
+-- PURPOSE: Same rows as pie_income_collection_over_time_fixed.sql, reading
+--          each source once. The fixed query scans
+--          CLIP_RESULTS_DATA x account_statements x ACCOUNTS_CUSTOMERS_BRIDGE
+--          three times (base_population, base_population_overall,
+--          base_population_42plus) and joins CLIP_USER_INCOMES three times.
+--          Here:
+--
+--   - groupings: one row per statement grouping. A new grouping is one more
+--     row here, not another scan
+--   - evaluations: the only scan of the evaluation tables; each row is
+--     tagged with every grouping it belongs to
+--   - base_population: one GROUP BY for all groupings; the statement-level
+--     PIE-priority dedup keeps the PIE evaluation if any, with the lowest
+--     PERSON_ID (every person of an account sees the same evaluations)
+--   - first_income: the only join to CLIP_USER_INCOMES, first income per
+--     grouping and account as min(CREATED_AT)
+--   - cumulative_success: a running sum of collections per bucket instead of
+--     cross joining every account with month_series
+--
+-- GROUPS (statement_number):
+--   - Individual statements (18, 26, 34, 42): Statement-level methodology
+--   - 999 = Overall Stmt 18+: Account-level methodology
+--   - 442 = Stmt 42+: Account-level methodology
+--
+-- When a statement has several evaluations with the same outcome, the
+-- earliest one is used (the fixed query keeps an arbitrary one).
+--
+-- PARAMETERS (bound at run time, see python/query_params.py):
+--   :cohort_month  = '2025-04-01'
+--   :statement_set = [18, 26, 34, 42]
+--   :horizon_days  = 240
+--   :bucket_days   = 30
+-- ============================================================================
+
+with groupings as (
+    -- first_statement NULL: statement level, one group per statement in :statement_set
+    -- otherwise: account level across all statements >= first_statement
+    select * from (values
+        (null, null),
+        (18, 999),
+        (42, 442)
+    ) as g (first_statement, group_number)
+),
+
+evaluations as (
+    -- ========================================================================
+    -- SINGLE SCAN: every cohort evaluation, once per grouping it belongs to
+    -- ========================================================================
+    select
+        coalesce(g.group_number, clip.statement_number) as statement_number,
+        g.first_statement is not null as account_level,
+        clip.account_id,
+        acb.PERSON_ID,
+        clip.evaluated_timestamp,
+        case when clip.outcome = 'PRE_EVAL_APPROVED' then 1 else 0 end as is_pie
+
+    from EDW_DB.PUBLIC.CLIP_RESULTS_DATA clip
+    join EDW_DB.PUBLIC.account_statements stmt
+        on stmt.account_id = clip.account_id
+        and stmt.statement_num = clip.statement_number
+    join EDW_DB.PUBLIC.ACCOUNTS_CUSTOMERS_BRIDGE acb
+        on clip.account_id = acb.ACCOUNT_ID
+    join groupings g
+        on (g.first_statement is null and array_contains(clip.statement_number::variant, parse_json(:statement_set)))
+        or clip.statement_number >= g.first_statement
+    where date_trunc(month, stmt.statement_end_dt) = :cohort_month  -- Cohort month (default April 2025)
+      and clip.outcome in ('APPROVED', 'PRE_EVAL_APPROVED')
+),
+
+base_population as (
+    -- ========================================================================
+    -- BASE POPULATIONS: one row per grouping, account and person
+    -- ========================================================================
+    select
+        statement_number,
+        account_id,
+        PERSON_ID,
+        max(is_pie) as had_pie,
+        -- Statement level: the PIE evaluation if any; account level: the earliest
+        case
+            when account_level then min(evaluated_timestamp)
+            else coalesce(min(case when is_pie = 1 then evaluated_timestamp end), min(evaluated_timestamp))
+        end as evaluated_timestamp
+
+    from evaluations
+    group by statement_number, account_level, account_id, PERSON_ID
+
+    -- Statement level keeps one person per account, as the dedup does
+    qualify account_level or PERSON_ID = min(PERSON_ID) over (partition by statement_number, account_id)
+),
+
+first_income as (
+    -- ========================================================================
+    -- INCOME COLLECTION: FIRST income update per grouping and PIE account
+    -- ========================================================================
+    select
+        base.statement_number,
+        base.account_id,
+        floor(datediff(day, base.evaluated_timestamp, min(inc.CREATED_AT)) / :bucket_days) as months_to_collection
+
+    from base_population base
+    join EDW_DB.PUBLIC.CLIP_USER_INCOMES inc
+        on base.PERSON_ID = inc.PERSON_ID
+        and inc.CREATED_AT > base.evaluated_timestamp  -- Income AFTER PIE event
+        and inc.CREATED_AT <= DATEADD(day, :horizon_days, base.evaluated_timestamp)  -- Within the horizon (default 240 days)
+        and inc.annual_income IS NOT NULL
+    where base.had_pie = 1  -- Only track PIE accounts
+    group by base.statement_number, base.account_id, base.evaluated_timestamp
+),
+
+group_totals as (
+    select
+        statement_number,
+        count(*) as total_population,
+        count_if(had_pie = 0) as approved_outright_count,
+        count_if(had_pie = 1) as pie_total_count
+    from (
+        select statement_number, account_id, max(had_pie) as had_pie
+        from base_population
+        group by statement_number, account_id
+    )
+    group by statement_number
+),
+
+collections as (
+    select statement_number, months_to_collection as month_offset, count(*) as new_income_collections
+    from first_income
+    group by statement_number, months_to_collection
+),
+
+month_series as (
+    -- One row per bucket after PIE evaluation: 0 .. ceil(:horizon_days / :bucket_days) - 1
+    -- (at most 366; query_params.py rejects larger grids)
+    select row_number() over (order by seq4()) - 1 as month_offset
+    from table(generator(rowcount => 366))
+    qualify month_offset < ceil(:horizon_days / :bucket_days)
+),
+
+cumulative_success as (
+    -- ========================================================================
+    -- CUMULATIVE CALCULATION: running sum of collections per grouping
+    -- ========================================================================
+    select
+        totals.statement_number,
+        m.month_offset,
+        totals.total_population,
+        totals.approved_outright_count,
+        totals.pie_total_count,
+        sum(coalesce(c.new_income_collections, 0)) over (
+            partition by totals.statement_number order by m.month_offset
+        )::integer as pie_income_collected_by_month,
+        coalesce(c.new_income_collections, 0) as new_income_collections_this_month
+
+    from group_totals totals
+    cross join month_series m
+    left join collections c
+        on c.statement_number = totals.statement_number
+        and c.month_offset = m.month_offset
+)
+
+-- ============================================================================
+-- FINAL OUTPUT: Monthly progression of success rates (as the fixed query)
+-- ============================================================================
+select
+    case
+        when statement_number = 999 then 'Overall Stmt 18+'
+        when statement_number = 442 then 'Stmt 42+'
+        else 'Stmt ' || statement_number
+    end as statement_label,
+    statement_number,
+    month_offset,
+    total_population,
+    approved_outright_count,
+    pie_total_count,
+    pie_income_collected_by_month,
+    approved_outright_count + pie_income_collected_by_month as success_count,
+
+    -- CUMULATIVE SUCCESS RATE at this month mark
+    round(100.0 * (approved_outright_count + pie_income_collected_by_month) / total_population, 1) as success_rate_pct,
+
+    -- CUMULATIVE PIE INCOME COLLECTION RATE at this month mark
+    round(100.0 * pie_income_collected_by_month / nullif(pie_total_count, 0), 1) as pie_income_collection_rate_pct,
+
+    new_income_collections_this_month
+
+from cumulative_success
+order by statement_number, month_offset;
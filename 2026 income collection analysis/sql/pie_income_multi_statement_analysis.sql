@@ -15,6 +15,11 @@
 --   - PIE (PRE_EVAL_APPROVED) = account blocked ONLY by stale income
 --   - Accounts can be PIE and then APPROVED in same month if income updated quickly
 --   - EFX income records expire after 1 year, so use recent cohorts (Apr 2025)
+--
+-- PARAMETERS (bound at run time, see python/query_params.py):
+--   :cohort_month  = '2025-04-01'
+--   :statement_set = [18, 26, 34, 42]
+--   :horizon_days  = 240
 -- ============================================================================
 
 with base_population as (
@@ -51,9 +56,9 @@ with base_population as (
         and stmt.statement_num = clip.statement_number
     join EDW_DB.PUBLIC.ACCOUNTS_CUSTOMERS_BRIDGE acb
         on clip.account_id = acb.ACCOUNT_ID
-    where date_trunc(month, stmt.statement_end_dt) = '2025-04-01'  -- April 2025 cohort
+    where date_trunc(month, stmt.statement_end_dt) = :cohort_month  -- Cohort month (default April 2025)
       and clip.outcome in ('APPROVED', 'PRE_EVAL_APPROVED')
-      and clip.statement_number in (18, 26, 34, 42)  -- Key statement milestones
+      and array_contains(clip.statement_number::variant, parse_json(:statement_set))  -- Key statement milestones
 
     -- DEDUPLICATION: Keep only 1 row per account/month/statement
     -- Priority: PIE first (order by 0), then APPROVED (order by 1)
@@ -86,7 +91,7 @@ income_collected as (
         on base.PERSON_ID = inc.PERSON_ID
     where base.had_pie_in_month = 1  -- Only track PIE accounts
       and inc.CREATED_AT > base.evaluated_timestamp  -- Income AFTER PIE event
-      and inc.CREATED_AT <= DATEADD(day, 240, base.evaluated_timestamp)  -- Within 8 months
+      and inc.CREATED_AT <= DATEADD(day, :horizon_days, base.evaluated_timestamp)  -- Within the horizon (default 240 days)
       and inc.annual_income IS NOT NULL  -- Valid income value
 
     -- Keep only FIRST income update per account/statement
@@ -1,5 +1,10 @@
 -- Combined Success Rate: Immediate Approval OR Income Collection After PIE
 -- Success = (Approved Outright + PIE with Income Collected) / (Total Approved + PIE)
+--
+-- PARAMETERS (bound at run time, see python/query_params.py):
+--   :cohort_month  = '2025-04-01'
+--   :statement_set = [34]
+--   :horizon_days  = 240
 
 with base_population as (
     -- All APPROVED or PRE_EVAL_APPROVED accounts, with PIE flag
@@ -20,9 +25,9 @@ with base_population as (
         and stmt.statement_num = clip.statement_number
     join EDW_DB.PUBLIC.ACCOUNTS_CUSTOMERS_BRIDGE acb
         on clip.account_id = acb.ACCOUNT_ID
-    where date_trunc(month, stmt.statement_end_dt) = '2025-04-01'
+    where date_trunc(month, stmt.statement_end_dt) = :cohort_month
       and clip.outcome in ('APPROVED', 'PRE_EVAL_APPROVED')
-      and clip.statement_number = 34
+      and array_contains(clip.statement_number::variant, parse_json(:statement_set))
     qualify row_number() over (
         partition by clip.account_id, date_trunc(month, stmt.statement_end_dt), clip.statement_number
         order by case when clip.outcome = 'PRE_EVAL_APPROVED' then 0 else 1 end, acb.PERSON_ID
@@ -30,7 +35,7 @@ with base_population as (
 ),
 
 income_collected as (
-    -- Track first income update after PIE (within 8 months)
+    -- Track first income update after PIE (within :horizon_days, default 240 days)
     -- Note that EFX income will disappear after one year so this analysis is only applicable for cohort in last year
     select
         base.account_id,
@@ -41,7 +46,7 @@ income_collected as (
         on base.PERSON_ID = inc.PERSON_ID
     where base.had_pie_in_month = 1
       and inc.CREATED_AT > base.evaluated_timestamp
-      and inc.CREATED_AT <= DATEADD(day, 240, base.evaluated_timestamp)
+      and inc.CREATED_AT <= DATEADD(day, :horizon_days, base.evaluated_timestamp)
       and inc.annual_income IS NOT NULL
     qualify row_number() over (
         partition by base.account_id, base.statement_number
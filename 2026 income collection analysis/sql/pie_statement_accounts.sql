@@ -0,0 +1,24 @@
+-- ============================================================================
+-- Statement Accounts - One Row per Account x Statement x Person (Stmt 18+)
+-- ============================================================================
+-- PURPOSE: The StatementAccounts CTE of INCOME_VALIDATION in
+--          pie_income_collection_over_time_account_level.sql, exported on its
+--          own so python/income_asof.py can attach each statement's latest
+--          valid income locally instead of joining every income record
+--
+-- PARAMETERS (bound at run time, see python/query_params.py):
+--   :eval_start_date = '2024-11-01'
+--   :eval_end_date   = '2025-12-31'
+-- ============================================================================
+
+SELECT
+    dm.statement_number AS STATEMENT_NUMBER,
+    dm.statement_end_dt AS STATEMENT_END_DATE,
+    acb.PERSON_ID,
+    dm.account_id
+FROM datamart_db.dm_consolidated.account_statements_clip dm
+INNER JOIN EDW_DB.PUBLIC.ACCOUNTS_CUSTOMERS_BRIDGE AS acb
+    ON dm.account_id = acb.ACCOUNT_ID
+WHERE dm.statement_end_dt BETWEEN :eval_start_date::date AND :eval_end_date::date
+    AND dm.statement_number >= 18  -- Year 2+ only
+    AND dm.open_in_statement = 1;
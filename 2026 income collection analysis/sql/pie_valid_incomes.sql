@@ -0,0 +1,20 @@
+-- ============================================================================
+-- Valid Incomes - Timestamps of Non-Null Income Records
+-- ============================================================================
+-- PURPOSE: Every valid income record created in a window, loaded once into
+--          python/income_index.py and shared by the local first-income
+--          (cohort curves, triangle) and latest-income (INCOME_VALIDATION)
+--          lookups instead of joining CLIP_USER_INCOMES per query
+--
+-- PARAMETERS (bound at run time, see python/query_params.py):
+--   :created_from = '2023-11-01 00:00:00'
+--   :created_to   = '2025-12-31 00:00:00'
+-- ============================================================================
+
+SELECT
+    inc.PERSON_ID,
+    inc.CREATED_AT
+FROM EDW_DB.PUBLIC.CLIP_USER_INCOMES AS inc
+WHERE inc.CREATED_AT >= :created_from::timestamp
+  AND inc.CREATED_AT <= :created_to::timestamp
+  AND inc.annual_income IS NOT NULL;
@@ -1,17 +1,12 @@
-import snowflake.connector
-import pandas as pd
+import os
+import sys
 import matplotlib
 matplotlib.use('Agg')  # Use non-interactive backend
 import matplotlib.pyplot as plt
 
-# Snowflake connection using your VS Code settings
-conn = snowflake.connector.connect(
-    user='ALFRED_LEE',
-    account='IJ90379-MISSIONLANE',
-    authenticator='externalbrowser',
-    database='EDW_DB',
-    schema='PUBLIC'
-)
+# Shared Snowflake session (pooled, SSO token cached across scripts)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '2026 income collection analysis', 'python'))
+from snowflake_session import run_query
 
 # Your query
 query = """
@@ -30,11 +25,7 @@ order by 1
 """
 
 # Execute query
-cursor = conn.cursor()
-cursor.execute(query)
-df = pd.DataFrame(cursor.fetchall(), columns=[col[0] for col in cursor.description])
-cursor.close()
-conn.close()
+df = run_query(query)
 
 # Display the data
 print("\n=== Query Results ===")